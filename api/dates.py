@@ -0,0 +1,92 @@
+"""
+Tolerant date parsing for imported files
+Supplier feeds mix ISO (2025-01-15), slashed (01/15/2025) and dashed or dotted
+(02-10-2025, 15.01.2025) dates in the same column, and reuse a small set of dates
+across millions of rows - so each column gets its own memoizing parser.
+Day/month order is a property of the column, never guessed per value: 05.01.2025
+means the same day in every row of a column.
+"""
+
+from datetime import date
+
+# Distinct strings remembered per column
+MAX_CACHED_DATES = 10000
+
+
+def parse_iso_date(text):
+    """YYYY-MM-DD (the C-level fast path)"""
+    return date.fromisoformat(text)
+
+
+def parse_dmy_date(text, day_first=False):
+    """
+    Day, month and year separated by '/', '-' or '.' (two-digit years are 20xx)
+    Read month-first, or day-first with day_first - values invalid in that order raise
+    """
+    parts = text.replace('-', '/').replace('.', '/').split('/')
+    if len(parts) != 3:
+        raise ValueError(f"Invalid date: '{text}'")
+    first, second, year = (int(part) for part in parts)
+    if len(parts[2].strip()) == 2:
+        year += 2000
+    if day_first:
+        return date(year, second, first)
+    return date(year, first, second)
+
+
+class DateColumnParser:
+    """
+    Parses the values of one date column
+    The column's layout (ISO or day/month/year) is detected from its first value and
+    tried first from then on; every distinct string is parsed only once
+    The day/month order is day_first if given (True/False), otherwise the first
+    day/month/year value decides it: day-first only if that value can't be month-first.
+    Every later value is read in that order - one that only fits the other order
+    raises instead of being reinterpreted
+    """
+
+    def __init__(self, day_first=None):
+        self.day_first = day_first
+        self.layouts = None
+        self._cache = {}
+
+    def __call__(self, value):
+        try:
+            return self._cache[value]
+        except KeyError:
+            pass
+        parsed = self.parse(value)
+        if len(self._cache) < MAX_CACHED_DATES:
+            self._cache[value] = parsed
+        return parsed
+
+    def parse(self, value):
+        """Parse one value without the cache"""
+        if isinstance(value, date):
+            return value
+        text = value.strip()
+        if self.layouts is None:
+            # Detect the column's layout once - the other layout is still tried
+            iso = len(text) >= 5 and text[4] == '-'
+            self.layouts = (parse_iso_date, self.parse_dmy) if iso else (self.parse_dmy, parse_iso_date)
+
+        for layout in self.layouts:
+            try:
+                return layout(text)
+            except ValueError:
+                continue
+        order = 'DD/MM/YYYY' if self.day_first else 'MM/DD/YYYY'
+        raise ValueError(f"Invalid date: '{value}' (expected YYYY-MM-DD or {order})")
+
+    def parse_dmy(self, text):
+        """A day/month/year value in the column's order, deciding the order on the first one"""
+        if self.day_first is not None:
+            return parse_dmy_date(text, self.day_first)
+        try:
+            parsed = parse_dmy_date(text)
+            self.day_first = False
+        except ValueError:
+            # Raises again if the value isn't a date in either order - nothing is decided then
+            parsed = parse_dmy_date(text, day_first=True)
+            self.day_first = True
+        return parsed
@@ -0,0 +1,83 @@
+"""
+Incremental expiry sweep
+Items turn 'expired' the day after their expiry_date. Instead of re-checking the
+whole table, each run expires only the items whose expiry_date falls between the
+last processed date and today (a range scan on the expiry_date index), then moves
+the checkpoint forward - so a run costs as much as the day's expiring items.
+"""
+
+import logging
+import threading
+
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Item, SchedulerCheckpoint
+
+logger = logging.getLogger(__name__)
+
+# Checkpoint row used by the sweep
+CHECKPOINT_NAME = 'expiry'
+
+# Seconds between runs of the in-process loop
+DEFAULT_INTERVAL = 3600
+
+# Seconds before the first retry of a failed run - doubles per consecutive failure, up to the interval
+FAILURE_BACKOFF = 1
+
+# Consecutive failed runs after which the loop gives up and re-raises
+MAX_CONSECUTIVE_FAILURES = 10
+
+
+def expire_due_items(today=None):
+    """
+    Expire items whose expiry_date is in [last processed date, today)
+    The first run (no checkpoint yet) catches up on every past expiry date
+    Returns (expired_count, from_date, today)
+    """
+    today = today or timezone.now().date()
+
+    with transaction.atomic():
+        # Lock the checkpoint so concurrent runs don't sweep the same range
+        checkpoint, _ = SchedulerCheckpoint.objects.select_for_update().get_or_create(name=CHECKPOINT_NAME)
+        since = checkpoint.last_processed_date
+
+        due = Item.objects.filter(expiry_date__lt=today)
+        if since:
+            due = due.filter(expiry_date__gte=since)
+        expired = due.exclude(status='expired').update(status='expired')
+
+        if since is None or since < today:
+            checkpoint.last_processed_date = today
+            checkpoint.save(update_fields=['last_processed_date', 'updated_at'])
+
+    return expired, since, today
+
+
+def run_expiry_loop(interval=DEFAULT_INTERVAL, stop_event=None, on_run=None):
+    """
+    Run the sweep every `interval` seconds until stop_event is set
+    on_run(expired_count, from_date, today) is called after each run
+    Failed runs are retried with exponential backoff; after MAX_CONSECUTIVE_FAILURES
+    in a row the last error is raised instead of retrying forever
+    """
+    stop_event = stop_event or threading.Event()
+    failures = 0
+    while not stop_event.is_set():
+        close_old_connections()
+        try:
+            result = expire_due_items()
+            if on_run:
+                on_run(*result)
+        except Exception:
+            failures += 1
+            if failures >= MAX_CONSECUTIVE_FAILURES:
+                logger.error('Expiry sweep failed %d times in a row - stopping', failures)
+                raise
+            # The next run retries the same range
+            logger.exception('Expiry sweep failed')
+            stop_event.wait(min(FAILURE_BACKOFF * 2 ** (failures - 1), max(interval, FAILURE_BACKOFF)))
+            continue
+        failures = 0
+        stop_event.wait(interval)
+
@@ -0,0 +1,69 @@
+"""
+Filter backends for the Item API
+"""
+
+from django.db.models import FilteredRelation, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from rest_framework import filters
+
+from .models import Item, ItemSearchTerm
+from .search import SEARCH_FIELDS, trigrams
+
+
+class ItemSearchFilter(filters.SearchFilter):
+    """
+    ?search= backed by the ItemSearchTerm trigram index
+    Terms of 3+ characters first narrow the rows to items holding the term's
+    rarest trigrams (indexed lookups on short posting lists), then the usual
+    icontains check runs on those candidates only. Items not indexed yet
+    (search_indexed=False, after bulk writes) always stay candidates, so they are
+    found by the icontains check until index_pending() catches up. Short terms,
+    and terms made only of very common trigrams, fall back to the plain icontains scan.
+    Every term must match one of the search fields, as with SearchFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+
+        # The index only covers SEARCH_FIELDS - other fields need the full scan
+        indexed = set(search_fields) <= set(SEARCH_FIELDS)
+
+        for term in search_terms:
+            grams = trigrams(term) if indexed else set()
+            # Items holding the term's rarest trigrams - short posting lists on the index
+            for gram in ItemSearchTerm.objects.rarest(grams) if grams else []:
+                queryset = queryset.filter(pk__in=self.candidates(gram))
+            matches = Q()
+            for field in search_fields:
+                matches |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(matches)
+        return queryset
+
+    @staticmethod
+    def candidates(gram):
+        """Subquery of the pks holding the trigram, plus every unindexed item"""
+        # Each UNION branch drops its default ordering so the union can be an IN subquery
+        postings = ItemSearchTerm.objects.filter(trigram=gram).values('item_id').order_by()
+        pending = Item.objects.filter(search_indexed=False).values('pk').order_by()
+        return postings.union(pending, all=True)
+
+    @staticmethod
+    def annotate_rank(queryset, search_terms):
+        """
+        Annotate search_rank - the summed weight of the matched trigrams, so
+        matches in name outrank batch number, manufacturer, then category/supplier
+        Joins the matched index rows and groups by item; unindexed items rank 0
+        """
+        grams = set()
+        for term in search_terms:
+            grams |= trigrams(term)
+        if not grams:
+            return queryset.annotate(search_rank=Value(0))
+        return queryset.annotate(
+            matched_terms=FilteredRelation('search_terms', condition=Q(search_terms__trigram__in=grams)),
+        ).annotate(
+            search_rank=Coalesce(Sum('matched_terms__weight'), Value(0))
+        )
@@ -0,0 +1,420 @@
+"""
+Bulk ingestion of medicine rows
+Rows are parsed and validated in memory, get their derived columns (quality score,
+alerts, status) computed there, and are written with bulk_create in batches inside
+one transaction - no per-row save(), signals or autocommit. Rows matching an
+existing item on its natural key update it, and only when a value changed.
+"""
+
+import codecs
+import csv
+import os
+from contextlib import nullcontext
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections, models, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .dates import DateColumnParser
+from .models import DERIVED_FIELDS, UNKNOWN_BATCH_NUMBERS, Item, ItemAlert
+
+# Rows per bulk_create batch (override with settings.BULK_UPLOAD_BATCH_SIZE)
+DEFAULT_BATCH_SIZE = 1000
+
+# Bytes read from the uploaded file at a time
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# CSV template column -> (Item field, default when the column is missing)
+UPLOAD_COLUMNS = {
+    'Medicine Name': ('name', ''),
+    'Batch Number': ('batch_number', ''),
+    'Manufacture Date': ('manufacture_date', '2000-01-01'),
+    'Expiry Date': ('expiry_date', '2100-01-01'),
+    'Quantity': ('quantity', 0),
+    'Manufacturer': ('manufacturer', 'Unknown'),
+    'Category': ('category', 'General'),
+    'Price': ('price', 0.0),
+    'Supplier': ('supplier', 'Unknown'),
+    'Temperature (°C)': ('temperature', 0.0),
+    'Humidity (%)': ('humidity', 0.0),
+    'pH Level': ('ph_level', 0.0),
+    'Contaminant Level (ppm)': ('contaminant_level', 0.0),
+    'Active Ingredient Purity (%)': ('active_ingredient_purity', 0.0),
+    'Inspected By': ('inspected_by', 'Unknown'),
+    'Status (Accepted/Rejected)': ('accepted_or_rejected', 'Unknown'),
+}
+
+# Item field -> accepted header(s) of the supplier feed format (data/medicines.csv)
+# The temperature header also appears mis-decoded when the file was saved as Latin-1
+MEDICINES_CSV_COLUMNS = {
+    'name': ('Medicine_Name',),
+    'manufacture_date': ('Manufacture_Date',),
+    'expiry_date': ('Expiry_Date',),
+    'batch_number': ('Batch_No',),
+    'supplier': ('Supplier',),
+    'temperature': ('Temperature (°C)', 'Temperature (Â°C)'),
+    'humidity': ('Humidity (%)',),
+    'ph_level': ('pH_Level',),
+    'contaminant_level': ('Contaminant_Level (ppm)',),
+    'active_ingredient_purity': ('Active_Ingredient_Purity (%)',),
+    'inspected_by': ('Inspected_By',),
+    'accepted_or_rejected': ('Accepted_or_Rejected',),
+}
+
+# Date columns, parsed by a memoizing DateColumnParser per column of each file (see date_parsers)
+DATE_FIELDS = ('manufacture_date', 'expiry_date')
+
+# Rows read ahead to decide each date column's day/month order before a file is split
+DATE_ORDER_SAMPLE_ROWS = 1000
+
+# Fields each file format provides - what an upsert may overwrite
+UPLOAD_FIELDS = tuple(field for field, _ in UPLOAD_COLUMNS.values())
+MEDICINES_CSV_FIELDS = tuple(MEDICINES_CSV_COLUMNS)
+
+# Natural key rows are matched on when re-importing (backed by a unique constraint)
+# Rows without a batch number (UNKNOWN_BATCH_NUMBERS) never match - they are always inserted
+DEFAULT_UPSERT_KEY = ('batch_number', 'name')
+
+# Model fields of every upload column, looked up once
+_FIELDS = {field: Item._meta.get_field(field) for field, _ in UPLOAD_COLUMNS.values()}
+
+
+def iter_lines(chunks, encoding='utf-8-sig'):
+    """
+    Decode byte chunks incrementally and yield text lines (line endings kept)
+    Multi-byte characters and lines may straddle chunk boundaries
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ''
+    for chunk in chunks:
+        lines = (pending + decoder.decode(chunk)).split('\n')
+        # The last piece has no newline yet - carry it into the next chunk
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def read_csv_upload(uploaded_file, chunk_size=UPLOAD_CHUNK_SIZE):
+    """Stream an uploaded CSV file as DictReader rows without loading it into memory"""
+    # Read in fixed-size pieces (InMemoryUploadedFile.chunks() yields the whole file at once)
+    uploaded_file.seek(0)
+    chunks = iter(lambda: uploaded_file.read(chunk_size), b'')
+    return csv.DictReader(iter_lines(chunks))
+
+
+def date_parsers(day_first=None):
+    """
+    Fresh {field: DateColumnParser} for one file - layout detection and the memo
+    cache must not carry over to the next file, thread or job
+    day_first sets every column's day/month order (True/False), or each column's
+    as a {field: day_first} dict; None leaves it to each column's first value
+    """
+    if not isinstance(day_first, dict):
+        day_first = dict.fromkeys(DATE_FIELDS, day_first)
+    return {field: DateColumnParser(day_first.get(field)) for field in DATE_FIELDS}
+
+
+def detect_date_orders(rows, parse_row, sample_rows=DATE_ORDER_SAMPLE_ROWS):
+    """
+    {field: day_first} as the first rows of a file decide it (None if undecided),
+    so workers parsing the file in pieces all read its dates in the same order
+    """
+    dates = date_parsers()
+    for row in islice(rows, sample_rows):
+        try:
+            parse_row(row, dates)
+        except Exception:
+            pass
+        if all(parser.day_first is not None for parser in dates.values()):
+            break
+    return {field: parser.day_first for field, parser in dates.items()}
+
+
+def parse_upload_row(row, dates=None):
+    """
+    Map one CSV template row (a DictReader dict) to Item field values
+    dates are the file's date_parsers() (fresh ones when parsing a single row)
+    """
+    values = {}
+    for column, (field, default) in UPLOAD_COLUMNS.items():
+        value = row.get(column)
+        if value is None:
+            value = default
+        values[field] = value.strip() if isinstance(value, str) else value
+    return parse_dates(values, dates or date_parsers())
+
+
+def parse_medicines_row(row, dates=None):
+    """Map one supplier feed row (data/medicines.csv format) to Item field values, as parse_upload_row"""
+    values = {}
+    for field, headers in MEDICINES_CSV_COLUMNS.items():
+        value = next((row[header] for header in headers if row.get(header) is not None), None)
+        if value is None:
+            raise ValueError(f'Missing expected column: {headers[0]}')
+        values[field] = value.strip()
+
+    return parse_dates(values, dates or date_parsers())
+
+
+def parse_dates(values, parsers):
+    """Replace the date strings in a row's field values using per-column parsers"""
+    for field, parser in parsers.items():
+        if field in values:
+            values[field] = parser(values[field])
+    return values
+
+
+def build_item(values):
+    """Build an unsaved Item from raw field values"""
+    return Item(**clean_values(values))
+
+
+def clean_values(values):
+    """
+    Convert raw field values to Python types and validate them
+    Raises ValidationError for values the database would reject
+    """
+    cleaned = {}
+    for name, value in values.items():
+        field = _FIELDS.get(name) or Item._meta.get_field(name)
+        if isinstance(field, models.CharField):
+            value = str(value)
+            if field.max_length and len(value) > field.max_length:
+                raise ValidationError(
+                    f'{name} is longer than {field.max_length} characters'
+                )
+        else:
+            value = field.to_python(value)
+        cleaned[name] = value
+    return cleaned
+
+
+class IngestStats:
+    """Running row counts of an ingest"""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.duplicates = 0  # rows superseded by a later row with the same key in their batch
+        self.failed = 0
+
+    @property
+    def processed(self):
+        return self.created + self.updated + self.unchanged + self.duplicates + self.failed
+
+
+def ingest_rows(rows, parse_row=parse_upload_row, batch_size=None, first_row=2,
+                max_errors=None, on_batch=None, atomic_batches=False, build_row=None,
+                upsert_key=DEFAULT_UPSERT_KEY, update_fields=UPLOAD_FIELDS, day_first=None):
+    """
+    Validate rows and write them with bulk batches in one transaction
+    Rows are numbered from `first_row` (2 = first data row under a CSV header)
+    build_row(row) turns a row into an unsaved Item (default: build_item(parse_row(row, dates))
+    with one set of date_parsers(day_first) for the whole run)
+    Rows whose `upsert_key` fields match an existing item update its `update_fields`
+    (only when a value changed); the others are inserted. upsert_key=None inserts all
+    Only the first `max_errors` errors are kept (all of them if None)
+    on_batch(stats, batch_errors) is called after every batch of rows
+    With atomic_batches each batch commits on its own, so progress is visible to
+    other connections while the ingest runs
+    Returns (IngestStats, errors) - errors are {'row', 'data', 'error'} dicts
+    """
+    batch_size = batch_size or getattr(settings, 'BULK_UPLOAD_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    dates = date_parsers(day_first)
+    build_row = build_row or (lambda row: build_item(parse_row(row, dates)))
+    db = Item.objects.db
+    stats = IngestStats()
+    errors = []
+    batch = []
+    batch_errors = []
+
+    def flush():
+        if batch:
+            with transaction.atomic(using=db):
+                write_batch(batch, stats, upsert_key, update_fields)
+        stats.failed += len(batch_errors)
+        keep = len(batch_errors) if max_errors is None else max(max_errors - len(errors), 0)
+        errors.extend(batch_errors[:keep])
+        if on_batch:
+            on_batch(stats, batch_errors)
+        batch.clear()
+        batch_errors.clear()
+
+    with nullcontext() if atomic_batches else transaction.atomic(using=db):
+        for row_num, row in enumerate(rows, start=first_row):
+            try:
+                batch.append(build_row(row))
+            except Exception as e:
+                batch_errors.append({
+                    'row': row_num,
+                    'data': dict(row),
+                    'error': str(e)
+                })
+
+            # Failed rows count towards the batch so bad files still flush errors
+            if len(batch) + len(batch_errors) >= batch_size:
+                flush()
+
+        if batch or batch_errors:
+            flush()
+
+    return stats, errors
+
+
+def write_batch(items, stats, upsert_key=None, update_fields=UPLOAD_FIELDS):
+    """Write one batch of unsaved items (and their ItemAlert rows), counting into stats"""
+    if upsert_key:
+        items = update_existing(items, stats, upsert_key, update_fields)
+    if not items:
+        return
+
+    Item.objects.prepare(items)
+
+    if connections[Item.objects.db].features.can_return_rows_from_bulk_insert:
+        Item.objects.bulk_create(items)
+        alert_rows = []
+        for item in items:
+            if item.alerts:
+                alert_rows.extend(ItemAlert.from_alerts(item.pk, item.alerts))
+        ItemAlert.objects.bulk_create(alert_rows, batch_size=DEFAULT_BATCH_SIZE)
+    else:
+        # Backends without RETURNING (MySQL) leave pks unset - rebuild the alert rows
+        # of everything inserted above the previous highest pk instead
+        last_pk = Item.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+        Item.objects.bulk_create(items)
+        ItemAlert.objects.rebuild(Item.objects.filter(pk__gt=last_pk, alert_count__gt=0))
+
+    stats.created += len(items)
+
+
+def update_existing(items, stats, key_fields, update_fields):
+    """
+    Apply a batch to the items already stored under the same natural key
+    Only items with a changed value are written (one bulk_update per batch)
+    Returns the items that matched nothing and still need inserting
+    """
+    def natural_key(item):
+        return tuple(getattr(item, field) for field in key_fields)
+
+    # Unknown batch numbers aren't part of the key, as in the unique constraint
+    new_items = []
+    if 'batch_number' in key_fields:
+        new_items = [item for item in items if item.batch_number in UNKNOWN_BATCH_NUMBERS]
+        items = [item for item in items if item.batch_number not in UNKNOWN_BATCH_NUMBERS]
+
+    # A key repeated within the batch - the last row wins, the earlier ones are duplicates
+    incoming = {}
+    for item in items:
+        incoming[natural_key(item)] = item
+    stats.duplicates += len(items) - len(incoming)
+
+    # Narrow by each key column, then match whole keys in Python
+    lookup = {
+        f'{field}__in': {key[i] for key in incoming}
+        for i, field in enumerate(key_fields)
+    }
+    existing = {natural_key(item): item for item in Item.objects.filter(**lookup)}
+
+    changed = []
+    alerts_changed = []
+    now = timezone.now()
+    for key, item in incoming.items():
+        current = existing.get(key)
+        if current is None:
+            new_items.append(item)
+            continue
+        if all(getattr(current, field) == getattr(item, field) for field in update_fields):
+            stats.unchanged += 1
+            continue
+
+        # Recompute the derived columns exactly as Item.save() would
+        for field in update_fields:
+            setattr(current, field, getattr(item, field))
+        current.refresh_quality_score()
+        if current.refresh_alerts():
+            alerts_changed.append(current.pk)
+        current.status = current.update_status()
+        current.updated_at = now
+        changed.append(current)
+
+    if changed:
+        fields = list(dict.fromkeys(update_fields + DERIVED_FIELDS + ('updated_at',)))
+        Item.objects.bulk_update(changed, fields, batch_size=DEFAULT_BATCH_SIZE)
+        stats.updated += len(changed)
+    if alerts_changed:
+        ItemAlert.objects.rebuild(Item.objects.filter(pk__in=alerts_changed))
+
+    return new_items
+
+
+# ============================================
+# PARALLEL FILE IMPORT
+# ============================================
+
+class ParsedRow(dict):
+    """
+    The outcome of parsing one CSV row in a worker process
+    Either `values` holds the cleaned field values, or `error` the reason the
+    row was rejected (and the dict holds the raw row for the error report)
+    """
+    values = None
+    error = None
+
+
+def build_parsed_row(row):
+    """build_row for ParsedRow results - the worker already did the validation"""
+    if row.error is not None:
+        raise ValueError(row.error)
+    return Item(**row.values)
+
+
+def split_csv_ranges(path, chunk_bytes):
+    """
+    Split a CSV file into byte ranges that start and end on line boundaries
+    Returns (header_bytes, [(start, end), ...]) - ranges cover every data line once
+    (records must not contain quoted newlines)
+    """
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, 'rb') as file:
+        header = file.readline()
+        start = file.tell()
+        while start < size:
+            # Jump ahead, then finish the line we landed in
+            file.seek(min(start + chunk_bytes, size))
+            file.readline()
+            end = file.tell()
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+def parse_csv_range(path, header, start, end, parse_row, day_first=None):
+    """
+    Parse and validate the rows in one byte range of a CSV file
+    Module-level so it can run in a worker process; returns a list of ParsedRow
+    Pass the file's detect_date_orders() as day_first so every range reads dates alike
+    """
+    with open(path, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+
+    parsed = []
+    dates = date_parsers(day_first)
+    for row in csv.DictReader(iter_lines([header, data])):
+        try:
+            # Valid rows travel back without their raw data - less to pickle
+            result = ParsedRow()
+            result.values = clean_values(parse_row(row, dates))
+        except Exception as e:
+            result = ParsedRow(row)
+            result.error = str(e)
+        parsed.append(result)
+    return parsed
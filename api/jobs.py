@@ -0,0 +1,111 @@
+"""
+Background bulk-upload jobs
+Uploads are spooled to a temporary file and ingested by an in-process thread pool
+(no external broker). Progress and every rejected row are stored on BulkUploadJob /
+BulkUploadError rows, so any worker process can answer status polls.
+"""
+
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .ingest import UPLOAD_CHUNK_SIZE, read_csv_upload, ingest_rows
+from .models import BulkUploadJob, BulkUploadError, ItemSearchTerm
+
+# Threads ingesting uploads in this process (override with settings.BULK_UPLOAD_WORKERS)
+DEFAULT_WORKERS = 2
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """The process-wide upload worker pool, created on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BULK_UPLOAD_WORKERS', DEFAULT_WORKERS),
+                thread_name_prefix='bulk-upload',
+            )
+        return _executor
+
+
+def create_upload_job(uploaded_file, user=None):
+    """
+    Spool an uploaded file to disk and create its pending job
+    (the request's upload is gone once the response is sent)
+    """
+    directory = getattr(settings, 'BULK_UPLOAD_DIR', None)
+    with tempfile.NamedTemporaryFile(prefix='bulk-upload-', suffix='.csv',
+                                     dir=directory, delete=False) as spool:
+        for chunk in uploaded_file.chunks(UPLOAD_CHUNK_SIZE):
+            spool.write(chunk)
+
+    return BulkUploadJob.objects.create(
+        user=user if user and user.is_authenticated else None,
+        file_name=uploaded_file.name[:255],
+        file_path=spool.name,
+        file_size=uploaded_file.size or 0,
+    )
+
+
+def submit_upload_job(job):
+    """Queue a job on the worker pool once the transaction that created it commits"""
+    transaction.on_commit(lambda: get_executor().submit(_run_in_worker, job.pk))
+
+
+def _run_in_worker(job_id):
+    try:
+        run_upload_job(job_id)
+        # Index the new rows for search - searches scan them until this is done
+        ItemSearchTerm.objects.index_pending()
+    finally:
+        # Worker threads own their connections - don't leak them
+        connections.close_all()
+
+
+def run_upload_job(job_id):
+    """
+    Ingest a spooled upload, recording progress and errors after every batch
+    Runs synchronously - the worker pool calls it, and so can tests or a shell
+    """
+    job = BulkUploadJob.objects.get(pk=job_id)
+    job.status = 'running'
+    job.started_at = timezone.now()
+    job.save(update_fields=['status', 'started_at'])
+
+    def record_batch(stats, batch_errors):
+        BulkUploadError.objects.bulk_create([
+            BulkUploadError(job=job, row=error['row'], data=error['data'], error=error['error'])
+            for error in batch_errors
+        ])
+        job.created_rows = stats.created
+        job.updated_rows = stats.updated
+        job.duplicate_rows = stats.duplicates
+        job.failed_rows = stats.failed
+        job.processed_rows = stats.processed
+        job.save(update_fields=['created_rows', 'updated_rows', 'duplicate_rows', 'failed_rows', 'processed_rows'])
+
+    try:
+        with open(job.file_path, 'rb') as spool:
+            ingest_rows(read_csv_upload(spool), max_errors=0,
+                        on_batch=record_batch, atomic_batches=True)
+        job.status = 'completed'
+    except Exception as e:
+        job.status = 'failed'
+        job.error_message = str(e)
+    finally:
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error_message', 'finished_at'])
+        try:
+            os.remove(job.file_path)
+        except OSError:
+            pass
+
+    return job
@@ -0,0 +1,131 @@
+"""
+Management command to benchmark the import and serialization fast paths
+Timings depend on the machine and its load, so they are reported here instead
+of being asserted in the test suite
+"""
+import csv
+import io
+import random
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.renderers import JSONRenderer
+
+from api.dates import DateColumnParser
+from api.ingest import UPLOAD_COLUMNS, read_csv_upload
+from api.models import Item
+from api.rows import compiled_serializer
+from api.serializers import ItemSerializer, ItemSummarySerializer
+
+
+def _timed(function):
+    """(result, seconds) of one call"""
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+
+def benchmark_dates(rows):
+    """DateColumnParser against per-row strptime on a feed reusing a few hundred dates"""
+    rng = random.Random(7)
+    distinct = [(date(2024, 1, 1) + timedelta(days=i)).strftime('%m/%d/%Y') for i in range(400)]
+    values = [rng.choice(distinct) for _ in range(rows)]
+
+    expected, strptime_seconds = _timed(lambda: [datetime.strptime(value, '%m/%d/%Y').date() for value in values])
+    parse = DateColumnParser()
+    parsed, parser_seconds = _timed(lambda: [parse(value) for value in values])
+    if parsed != expected:
+        raise CommandError('DateColumnParser disagrees with strptime')
+    return [
+        f"strptime: {rows / strptime_seconds:,.0f} rows/sec",
+        f"DateColumnParser: {rows / parser_seconds:,.0f} rows/sec ({strptime_seconds / parser_seconds:.1f}x)",
+    ]
+
+
+def benchmark_serializers(rows):
+    """Compiled row serializers against DRF on the first `rows` stored items, query included"""
+    queryset = Item.objects.order_by('expiry_date', 'id')
+    count = queryset[:rows].count()
+    if not count:
+        raise CommandError('No items to serialize - import some first')
+
+    lines = []
+    for serializer_class in (ItemSerializer, ItemSummarySerializer):
+        compiled = compiled_serializer(serializer_class)
+        expected, drf_seconds = _timed(lambda: serializer_class(queryset[:rows], many=True).data)
+        data, compiled_seconds = _timed(lambda: compiled.serialize(compiled.values_list(queryset[:rows])))
+        if JSONRenderer().render(data) != JSONRenderer().render(expected):
+            raise CommandError(f'Compiled {serializer_class.__name__} disagrees with DRF')
+        lines.append(
+            f"{serializer_class.__name__}: DRF {count / drf_seconds:,.0f} rows/sec, "
+            f"compiled {count / compiled_seconds:,.0f} rows/sec ({drf_seconds / compiled_seconds:.1f}x)"
+        )
+    return lines
+
+
+def benchmark_csv_memory(rows):
+    """Peak memory of streaming CSV uploads of `rows` and 10x `rows` rows"""
+    def upload(count):
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(UPLOAD_COLUMNS)
+        for i in range(count):
+            writer.writerow([f'Medicine {i}', f'BATCH-{i:07d}', '2025-01-01', '2027-01-01'])
+        return SimpleUploadedFile('medicines.csv', out.getvalue().encode('utf-8'))
+
+    def peak(count):
+        file = upload(count)
+        tracemalloc.start()
+        for _ in read_csv_upload(file):
+            pass
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return file.size, peak_bytes
+
+    lines = []
+    for count in (rows, rows * 10):
+        size, peak_bytes = peak(count)
+        lines.append(f"{count} rows ({size / 1024:,.0f} KiB file): peak {peak_bytes / 1024:,.0f} KiB while reading")
+    return lines
+
+
+# Benchmark name -> function(rows) returning report lines
+BENCHMARKS = {
+    'dates': benchmark_dates,
+    'serializers': benchmark_serializers,
+    'csv_memory': benchmark_csv_memory,
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the import and serialization fast paths'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names',
+            nargs='*',
+            help=f'Benchmarks to run (default: all of {", ".join(BENCHMARKS)})',
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=100000,
+            help='Rows per benchmark (default: 100000)',
+        )
+
+    def handle(self, *args, **options):
+        names = options['names'] or list(BENCHMARKS)
+        unknown = [name for name in names if name not in BENCHMARKS]
+        if unknown:
+            raise CommandError(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+        rows = max(options['rows'], 1)
+        for name in names:
+            self.stdout.write(self.style.WARNING(f"⏱️  {name} ({rows} rows)"))
+            for line in BENCHMARKS[name](rows):
+                self.stdout.write(f"   {line}")
+        self.stdout.write(self.style.SUCCESS('✅ Benchmarks complete!'))
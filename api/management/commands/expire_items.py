@@ -0,0 +1,43 @@
+"""
+Management command to expire medicines incrementally
+Only items whose expiry date passed since the last run are touched
+Run it from cron, or with --loop as a long-running process
+"""
+from django.core.management.base import BaseCommand
+from api.expiry import DEFAULT_INTERVAL, expire_due_items, run_expiry_loop
+
+
+class Command(BaseCommand):
+    help = 'Expire medicines whose expiry date passed since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, sweeping every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=DEFAULT_INTERVAL,
+            help=f'Seconds between sweeps with --loop (default: {DEFAULT_INTERVAL})',
+        )
+
+    def handle(self, *args, **options):
+        if options['loop']:
+            self.stdout.write(self.style.WARNING(
+                f"Sweeping expired medicines every {options['interval']}s (Ctrl+C to stop)..."
+            ))
+            try:
+                run_expiry_loop(options['interval'], on_run=self.report)
+            except KeyboardInterrupt:
+                self.stdout.write('Stopped.')
+            return
+
+        self.report(*expire_due_items())
+
+    def report(self, expired, since, today):
+        since = since or 'the beginning'
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Expired {expired} medicines (expiry dates from {since} to before {today})"
+        ))
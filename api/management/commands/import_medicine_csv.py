@@ -1,98 +1,178 @@
-# import csv
-# import os
-# from datetime import datetime
-# from django.core.management.base import BaseCommand
-# from api.models import Item
-
-# class Command(BaseCommand):
-#     help = 'Import medicine data from a CSV file'
-
-#     def handle(self, *args, **kwargs):
-#         file_path = os.path.join('data', 'medicines.csv')  # Path to your CSV file
-
-#         try:
-#             with open(file_path, 'r') as file:
-#                 reader = csv.DictReader(file)
-#                 for row in reader:
-#                     # Convert the date format from MM/DD/YYYY to YYYY-MM-DD
-#                     manufacture_date = datetime.strptime(row['Manufacture_Date'], '%m/%d/%Y').strftime('%Y-%m-%d')
-#                     expiry_date = datetime.strptime(row['Expiry_Date'], '%m/%d/%Y').strftime('%Y-%m-%d')
-
-#                     Item.objects.create(
-#                         name=row['Medicine_Name'],
-#                         manufacture_date=manufacture_date,
-#                         expiry_date=expiry_date,
-#                         batch_number=row['Batch_No'],
-#                         supplier=row['Supplier'],
-#                         temperature=row['Temperature (Â°C)'],
-#                         humidity=row['Humidity (%)'],
-#                         ph_level=row['pH_Level'],
-#                         contaminant_level=row['Contaminant_Level (ppm)'],
-#                         active_ingredient_purity=row['Active_Ingredient_Purity (%)'],
-#                         inspected_by=row['Inspected_By'],
-#                         accepted_or_rejected=row['Accepted_or_Rejected']
-#                     )
-#             self.stdout.write(self.style.SUCCESS('Successfully imported medicine data!'))
-#         except FileNotFoundError:
-#             self.stdout.write(self.style.ERROR(f"File not found: {file_path}"))
-#         except KeyError as e:
-#             self.stdout.write(self.style.ERROR(f"Missing expected column: {e}"))
-#         except ValueError as e:
-#             self.stdout.write(self.style.ERROR(f"Invalid value: {e}"))
-
-
-import csv
+"""
+Management command to import medicine data from a supplier CSV feed
+Rows are validated in memory and written in bulk batches; rows whose natural key
+(batch_number, name by default) already exists update that item, and only when changed
+With --workers N the file is split into byte ranges on line boundaries and
+parsed by a process pool while the main process writes
+Day/month dates follow one order per column - the column's first such date decides it
+unless --date-order sets it
+New and changed rows are indexed for search in one pass after the import
+(--no-search-index leaves that to rebuild_search_index --pending)
+"""
 import os
-from datetime import datetime
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import django
 from django.core.management.base import BaseCommand
-from api.models import Item
+from django.db import connections
+
+from api.ingest import (
+    DEFAULT_BATCH_SIZE, DEFAULT_UPSERT_KEY, MEDICINES_CSV_FIELDS, ingest_rows,
+    read_csv_upload, parse_medicines_row, split_csv_ranges, parse_csv_range, build_parsed_row,
+    detect_date_orders,
+)
+from api.models import ItemSearchTerm
+
+# Bytes of the file parsed per worker task
+CHUNK_BYTES = 4 * 1024 * 1024
+
+# Progress is printed every this many rows
+PROGRESS_EVERY = 100000
+
+# Rejected rows echoed to the console (all of them are counted)
+MAX_REPORTED_ERRORS = 20
+
+# --date-order choices -> DateColumnParser day_first
+DATE_ORDERS = {'auto': None, 'month-first': False, 'day-first': True}
+
 
 class Command(BaseCommand):
     help = 'Import medicine data from a CSV file'
 
-    def handle(self, *args, **kwargs):
-        # Define the path to the CSV file
-        file_path = os.path.join('data', 'medicines.csv')  # Update with correct path if needed
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join('data', 'medicines.csv'),
+            help='CSV file to import (default: data/medicines.csv)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processes parsing the file in parallel (default: 1, no pool)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Rows per bulk insert (default: {DEFAULT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--key',
+            default=','.join(DEFAULT_UPSERT_KEY),
+            help='Comma-separated Item fields matching rows to existing items '
+                 f'(default: {",".join(DEFAULT_UPSERT_KEY)}); "none" always inserts',
+        )
+        parser.add_argument(
+            '--date-order',
+            choices=list(DATE_ORDERS),
+            default='auto',
+            help='How to read dates like 05-01-2025 (default: auto, decided by the first such date in each column)',
+        )
+        parser.add_argument(
+            '--no-search-index',
+            action='store_true',
+            help='Skip indexing the imported rows for search (run rebuild_search_index --pending later)',
+        )
 
-        try:
-            # Open the CSV file for reading
-            with open(file_path, 'r') as file:
-                reader = csv.DictReader(file)
-
-                for row in reader:
-                    try:
-                        # Convert the date format from MM/DD/YYYY to YYYY-MM-DD
-                        manufacture_date = datetime.strptime(row['Manufacture_Date'], '%m/%d/%Y').strftime('%Y-%m-%d')
-                        expiry_date = datetime.strptime(row['Expiry_Date'], '%m/%d/%Y').strftime('%Y-%m-%d')
-
-                        # Create a new Item object from the CSV row
-                        Item.objects.create(
-                            name=row['Medicine_Name'],
-                            manufacture_date=manufacture_date,
-                            expiry_date=expiry_date,
-                            batch_number=row['Batch_No'],
-                            supplier=row['Supplier'],
-                            temperature=row['Temperature (Â°C)'],
-                            humidity=row['Humidity (%)'],
-                            ph_level=row['pH_Level'],
-                            contaminant_level=row['Contaminant_Level (ppm)'],
-                            active_ingredient_purity=row['Active_Ingredient_Purity (%)'],
-                            inspected_by=row['Inspected_By'],
-                            accepted_or_rejected=row['Accepted_or_Rejected']
-                        )
-                    except KeyError as e:
-                        # Handle missing columns gracefully
-                        self.stdout.write(self.style.ERROR(f"Missing expected column: {e}"))
-                    except ValueError as e:
-                        # Handle invalid date or value format
-                        self.stdout.write(self.style.ERROR(f"Invalid value in row: {row}. Error: {e}"))
-
-            # Success message after import completes
-            self.stdout.write(self.style.SUCCESS('Successfully imported medicine data!'))
-
-        except FileNotFoundError:
+    def handle(self, *args, **options):
+        file_path = options['path']
+        workers = max(options['workers'], 1)
+        verbose = options['verbosity'] >= 2
+        key = options['key'].strip()
+        upsert_key = None if key.lower() == 'none' else tuple(field.strip() for field in key.split(','))
+        day_first = DATE_ORDERS[options['date_order']]
+
+        if not os.path.exists(file_path):
             # Handle file not found error
             self.stdout.write(self.style.ERROR(f"File not found: {file_path}"))
+            return
+
+        self.stdout.write(self.style.WARNING(f'Importing {file_path} with {workers} worker(s)...'))
+        progress = {'reported': 0}
+
+        def report_progress(stats, batch_errors):
+            processed = stats.processed
+            if verbose or processed - progress['reported'] >= PROGRESS_EVERY:
+                progress['reported'] = processed
+                self.stdout.write(f"  Processed {processed} rows...")
+
+        ingest_options = {
+            'batch_size': max(options['batch_size'], 1),
+            'max_errors': MAX_REPORTED_ERRORS,
+            'on_batch': report_progress,
+            'upsert_key': upsert_key,
+            'update_fields': MEDICINES_CSV_FIELDS,
+            # Commit batch by batch - a nightly feed is too big for one transaction
+            'atomic_batches': True,
+        }
+        started = time.perf_counter()
+
+        try:
+            if workers == 1:
+                with open(file_path, 'rb') as file:
+                    stats, errors = ingest_rows(
+                        read_csv_upload(file), parse_row=parse_medicines_row, day_first=day_first,
+                        **ingest_options
+                    )
+            else:
+                if day_first is None:
+                    # Decide the order before splitting, so every worker reads the dates alike
+                    with open(file_path, 'rb') as file:
+                        day_first = detect_date_orders(read_csv_upload(file), parse_medicines_row)
+                header, ranges = split_csv_ranges(file_path, CHUNK_BYTES)
+                # Forked workers must not inherit open database connections
+                connections.close_all()
+                with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+                    stats, errors = ingest_rows(
+                        self.parse_in_parallel(pool, workers, file_path, header, ranges, day_first),
+                        build_row=build_parsed_row, **ingest_options
+                    )
         except Exception as e:
             # Handle general exceptions
-            self.stdout.write(self.style.ERROR(f"An unexpected error occurred: {e}"))
\ No newline at end of file
+            self.stdout.write(self.style.ERROR(f"An unexpected error occurred: {e}"))
+            return
+
+        elapsed = time.perf_counter() - started
+        rate = stats.processed / elapsed if elapsed > 0 else 0.0
+
+        for error in errors:
+            # Rows with missing columns or invalid values are skipped
+            self.stdout.write(self.style.ERROR(f"Invalid value in row {error['row']}: {error['error']}"))
+        if stats.failed > len(errors):
+            self.stdout.write(self.style.ERROR(f"... and {stats.failed - len(errors)} more invalid rows"))
+
+        # Success message after import completes
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS('✅ Successfully imported medicine data!'))
+        self.stdout.write(f"   Rows processed: {stats.processed}")
+        self.stdout.write(f"   Imported: {stats.created}")
+        self.stdout.write(f"   Updated: {stats.updated}")
+        self.stdout.write(f"   Unchanged: {stats.unchanged}")
+        self.stdout.write(f"   Duplicates in file: {stats.duplicates}")
+        self.stdout.write(f"   Skipped (invalid): {stats.failed}")
+        self.stdout.write(f"   Time: {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+
+        if options['no_search_index']:
+            self.stdout.write(self.style.WARNING('Search index not updated - run rebuild_search_index --pending'))
+            return
+        started = time.perf_counter()
+        indexed, written = ItemSearchTerm.objects.index_pending(max(options['batch_size'], 1))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"   Search index: {indexed} items, {written} index rows in {elapsed:.2f}s")
+
+    @staticmethod
+    def parse_in_parallel(pool, workers, file_path, header, ranges, day_first=None):
+        """Yield parsed rows in file order while the pool parses the chunks ahead"""
+        pending = deque()
+        for start, end in ranges:
+            pending.append(pool.submit(
+                parse_csv_range, file_path, header, start, end, parse_medicines_row, day_first
+            ))
+            # Keep a bounded number of chunks in flight so memory stays flat
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
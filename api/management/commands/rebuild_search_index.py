@@ -0,0 +1,58 @@
+"""
+Management command to rebuild the medicine search index
+Single-item saves keep the index current; bulk writes only flag their rows
+(search_indexed=False) - --pending indexes just those. Run a full rebuild after loading
+rows behind the ORM's back (raw SQL, database restores) or to re-index with changed search weights
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api.models import Item, ItemSearchTerm
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the trigram search index for all medicines'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Items re-indexed per transaction (default: 1000)',
+        )
+        parser.add_argument(
+            '--pending',
+            action='store_true',
+            help='Only index items flagged by bulk writes since they were last indexed',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        if options['pending']:
+            indexed, written = ItemSearchTerm.objects.index_pending(batch_size)
+            self.stdout.write(self.style.SUCCESS(f"✅ Indexed pending items!"))
+            self.stdout.write(f"   - Items indexed: {indexed}")
+            self.stdout.write(f"   - Index rows: {written}")
+            return
+
+        total = Item.objects.count()
+        self.stdout.write(f"Rebuilding search index for {total} items...")
+
+        # Rows of deleted items go with them (cascade), so rebuilding item by item is complete
+        indexed = 0
+        written = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                Item.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            last_pk = pks[-1]
+            with transaction.atomic():
+                written += ItemSearchTerm.objects.rebuild(Item.objects.filter(pk__in=pks), batch_size)
+            indexed += len(pks)
+            self.stdout.write(f"  Indexed {indexed}/{total} items...")
+
+        self.stdout.write(self.style.SUCCESS(f"\n✅ Search index rebuilt!"))
+        self.stdout.write(f"   - Items indexed: {indexed}")
+        self.stdout.write(f"   - Index rows: {written}")
@@ -0,0 +1,151 @@
+"""
+Management command to regenerate environmental alerts for existing items
+Streams the table in primary-key order, recomputes alerts (and the status that
+depends on them) in memory and writes only changed rows with bulk_update
+--workers N processes N primary-key ranges in a process pool (alert generation is
+CPU-bound Python, so threads would share one core)
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count, Max, Min, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from api.models import ALERT_INPUT_FIELDS, Item
+
+
+def split_pk_ranges(queryset, parts):
+    """Split the queryset's primary keys into up to `parts` contiguous [low, high] ranges"""
+    bounds = queryset.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return []
+    low, high = bounds['low'], bounds['high']
+    step = max((high - low + 1) // parts, 1)
+    ranges = []
+    start = low
+    while start <= high:
+        end = high if len(ranges) == parts - 1 else min(start + step - 1, high)
+        ranges.append((start, end))
+        start = end + 1
+    return ranges
+
+
+def regenerate_queryset(queryset, batch_size, on_batch=None):
+    """
+    Regenerate alerts for every item in the queryset, batch_size rows at a time
+    Alerts whose content is unchanged keep their timestamp (see Item.refresh_alerts)
+    Returns (scanned, updated)
+    """
+    scanned = 0
+    updated = 0
+    last_pk = None
+    items = queryset.order_by('pk').only(*ALERT_INPUT_FIELDS)
+
+    while True:
+        # Keyset pages - MySQL clients buffer a whole result set, even with iterator()
+        page = items if last_pk is None else items.filter(pk__gt=last_pk)
+        chunk = list(page[:batch_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        scanned += len(chunk)
+
+        # Changed items are written with bulk_update and get their ItemAlert rows rebuilt
+        updated += Item.objects.refresh_alert_objects(chunk)
+        if on_batch:
+            on_batch(scanned, updated)
+
+    return scanned, updated
+
+
+def items_since(since=None):
+    """Items updated at or after `since` (every item if None)"""
+    items = Item.objects.all()
+    if since is not None:
+        items = items.filter(updated_at__gte=since)
+    return items
+
+
+def regenerate_range(pk_range, batch_size, since=None):
+    """
+    Regenerate one primary-key range - module-level so it can run in a worker process
+    Returns (scanned, updated)
+    """
+    return regenerate_queryset(items_since(since).filter(pk__range=pk_range), batch_size)
+
+
+class Command(BaseCommand):
+    help = 'Regenerate environmental alerts for existing items'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows read and written per batch (default: 1000)',
+        )
+        parser.add_argument(
+            '--since',
+            help='Only items updated at or after this date/time (YYYY-MM-DD or ISO timestamp)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processes handling primary-key ranges in parallel (default: 1, no pool)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        workers = max(options['workers'], 1)
+
+        since = self.parse_since(options['since']) if options['since'] else None
+        items = items_since(since)
+
+        count = items.count()
+        self.stdout.write(f"Regenerating alerts for {count} items...")
+
+        def report(scanned, updated):
+            if workers == 1:
+                self.stdout.write(f"  Processed {scanned}/{count} items...")
+
+        if workers == 1:
+            scanned, updated = regenerate_queryset(items, batch_size, on_batch=report)
+        else:
+            ranges = split_pk_ranges(items, workers)
+            # Forked workers must not inherit open database connections
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+                results = list(pool.map(partial(regenerate_range, batch_size=batch_size, since=since), ranges))
+            scanned = sum(result[0] for result in results)
+            updated = sum(result[1] for result in results)
+
+        # Count alerts with one aggregate query
+        summary = items.aggregate(
+            with_alerts=Count('id', filter=Q(alert_count__gt=0)),
+            total_alerts=Sum('alert_count'),
+            critical_alerts=Sum('critical_alert_count'),
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"\n✅ Alert generation complete!"))
+        self.stdout.write(f"   - Total items: {scanned}")
+        self.stdout.write(f"   - Items updated: {updated}")
+        self.stdout.write(f"   - Items with alerts: {summary['with_alerts']}")
+        self.stdout.write(f"   - Total alerts: {summary['total_alerts'] or 0}")
+        self.stdout.write(f"   - Critical alerts: {summary['critical_alerts'] or 0}")
+
+    @staticmethod
+    def parse_since(value):
+        since = parse_datetime(value)
+        if since is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f"Invalid --since value: {value}")
+            since = datetime(day.year, day.month, day.day)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
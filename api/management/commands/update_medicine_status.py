@@ -1,10 +1,17 @@
 """
 Management command to update status for all medicines
 Automatically sets status to active/expired/quarantine based on conditions
+Set-based: each transition is applied with UPDATE statements over the stored
+expiry, quality score and alert columns instead of one query per item
 """
 from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
 from api.models import Item
 
+# Statuses in the order transitions are applied (expiry wins over quality)
+TRANSITION_ORDER = ('expired', 'quarantine', 'active')
+
+
 class Command(BaseCommand):
     help = 'Update status for all medicines based on expiry and quality conditions'
 
@@ -14,60 +21,77 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be updated without making changes',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per UPDATE for quarantine/active transitions (default: 1000)',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
-        
+        batch_size = max(options['batch_size'], 1)
+
         self.stdout.write(self.style.WARNING('Starting status update...'))
-        
-        items = Item.objects.all()
-        total_count = items.count()
-        
-        status_changes = {
-            'active': 0,
-            'expired': 0,
-            'quarantine': 0
-        }
-        
-        for i, item in enumerate(items, 1):
-            old_status = item.status
-            new_status = item.update_status()
-            
-            if old_status != new_status:
-                status_changes[new_status] += 1
-                
-                if not dry_run:
-                    # Use update to avoid triggering save() again
-                    Item.objects.filter(pk=item.pk).update(status=new_status)
-                
-                if options['verbosity'] >= 2:
-                    self.stdout.write(
-                        f"  {item.name} ({item.batch_number}): {old_status} → {new_status}"
-                    )
-            
-            # Progress indicator
-            if i % 100 == 0 or i == total_count:
-                self.stdout.write(f"  Processed {i}/{total_count} items...")
-        
+
+        filters = Item.status_filters()
+        status_changes = {new_status: 0 for new_status in TRANSITION_ORDER}
+        transitions = []
+
+        for new_status in TRANSITION_ORDER:
+            pending = Item.objects.filter(filters[new_status]).exclude(status=new_status)
+
+            # Count per transition (old status → new status)
+            counts = pending.values('status').annotate(count=Count('id')).order_by('status')
+            for row in counts:
+                transitions.append((row['status'], new_status, row['count']))
+                status_changes[new_status] += row['count']
+
+            if dry_run or not status_changes[new_status]:
+                continue
+
+            if new_status == 'expired':
+                # Expiry is a pure date check - one UPDATE for the whole table
+                pending.update(status='expired')
+            else:
+                self.update_in_batches(pending, new_status, batch_size)
+
         # Summary
         self.stdout.write('')
         self.stdout.write(self.style.SUCCESS('✅ Status update complete!'))
-        self.stdout.write(f"   Total items: {total_count}")
         self.stdout.write(f"   Changes made:")
         self.stdout.write(f"     - Set to active: {status_changes['active']}")
         self.stdout.write(f"     - Set to expired: {status_changes['expired']}")
         self.stdout.write(f"     - Set to quarantine: {status_changes['quarantine']}")
-        
+        for old_status, new_status, count in transitions:
+            self.stdout.write(f"       {old_status} → {new_status}: {count}")
+
         if dry_run:
             self.stdout.write(self.style.WARNING('   (DRY RUN - no changes saved)'))
-        
-        # Get final counts
-        active = Item.objects.filter(status='active').count()
-        expired = Item.objects.filter(status='expired').count()
-        quarantine = Item.objects.filter(status='quarantine').count()
-        
+
+        # Get final counts in one query
+        counts = Item.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(status='active')),
+            expired=Count('id', filter=Q(status='expired')),
+            quarantine=Count('id', filter=Q(status='quarantine')),
+        )
+        total_count = counts['total'] or 1
+
         self.stdout.write('')
+        self.stdout.write(f"Total items: {counts['total']}")
         self.stdout.write('Current status distribution:')
-        self.stdout.write(f'  Active: {active} ({round(active/total_count*100, 1)}%)')
-        self.stdout.write(f'  Expired: {expired} ({round(expired/total_count*100, 1)}%)')
-        self.stdout.write(f'  Quarantine: {quarantine} ({round(quarantine/total_count*100, 1)}%)')
+        self.stdout.write(f"  Active: {counts['active']} ({round(counts['active']/total_count*100, 1)}%)")
+        self.stdout.write(f"  Expired: {counts['expired']} ({round(counts['expired']/total_count*100, 1)}%)")
+        self.stdout.write(f"  Quarantine: {counts['quarantine']} ({round(counts['quarantine']/total_count*100, 1)}%)")
+
+    def update_in_batches(self, pending, new_status, batch_size):
+        """Move matching rows to new_status, batch_size rows per UPDATE"""
+        updated = 0
+        while True:
+            # Updated rows stop matching, so each pass takes the next batch
+            batch = list(pending.values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                return updated
+            updated += Item.objects.filter(pk__in=batch).update(status=new_status)
+            self.stdout.write(f"  Set {updated} items to {new_status}...")
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:01
+
+from django.db import migrations, models
+
+from api.quality import (
+    QUALITY_INPUT_FIELDS, QUALITY_OUTPUT_FIELDS,
+    score_quality, grade_for_score, status_for_score,
+)
+
+
+def backfill_quality_scores(apps, schema_editor):
+    """Store the quality score, grade and status for existing items"""
+    Item = apps.get_model('api', 'Item')
+    batch = []
+    for pk, *readings in Item.objects.values_list('pk', *QUALITY_INPUT_FIELDS).iterator(chunk_size=1000):
+        score = score_quality(*readings)
+        batch.append(Item(
+            pk=pk,
+            quality_score=score,
+            quality_grade=grade_for_score(score),
+            quality_status=status_for_score(score),
+        ))
+        if len(batch) >= 1000:
+            Item.objects.bulk_update(batch, QUALITY_OUTPUT_FIELDS)
+            batch = []
+    if batch:
+        Item.objects.bulk_update(batch, QUALITY_OUTPUT_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_item_api_item_supplie_ca5bd4_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='quality_grade',
+            field=models.CharField(default='F', max_length=1),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='quality_score',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='quality_status',
+            field=models.CharField(default='Failed', max_length=20),
+        ),
+        migrations.RunPython(backfill_quality_scores, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['quality_score'], name='api_item_quality_6fc909_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['quality_grade'], name='api_item_quality_6404bd_idx'),
+        ),
+    ]
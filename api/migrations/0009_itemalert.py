@@ -0,0 +1,58 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils.dateparse import parse_datetime
+
+
+def backfill_alert_rows(apps, schema_editor):
+    """Copy every alert in the Item.alerts JSON lists into ItemAlert rows"""
+    Item = apps.get_model('api', 'Item')
+    ItemAlert = apps.get_model('api', 'ItemAlert')
+    batch = []
+    rows = Item.objects.exclude(alerts__isnull=True).exclude(alerts=[]).values_list('pk', 'alerts')
+    for pk, alerts in rows.iterator(chunk_size=1000):
+        for alert in alerts:
+            value = alert.get('value')
+            batch.append(ItemAlert(
+                item_id=pk,
+                type=alert.get('type', ''),
+                severity=alert.get('severity', ''),
+                message=alert.get('message', '')[:255],
+                value=value if isinstance(value, (int, float)) else None,
+                threshold=str(alert.get('threshold', '')),
+                timestamp=parse_datetime(alert['timestamp']) if alert.get('timestamp') else None,
+            ))
+        if len(batch) >= 1000:
+            ItemAlert.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ItemAlert.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_item_quality_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(max_length=50)),
+                ('severity', models.CharField(choices=[('critical', 'Critical'), ('warning', 'Warning')], max_length=20)),
+                ('message', models.CharField(blank=True, default='', max_length=255)),
+                ('value', models.FloatField(blank=True, null=True)),
+                ('threshold', models.CharField(blank=True, default='', max_length=50)),
+                ('timestamp', models.DateTimeField(blank=True, null=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alert_rows', to='api.item')),
+            ],
+            options={
+                'ordering': ['item', 'id'],
+                'indexes': [models.Index(fields=['severity', 'type'], name='api_itemale_severit_fb18b2_idx'), models.Index(fields=['type'], name='api_itemale_type_238ce1_idx'), models.Index(fields=['item', 'severity'], name='api_itemale_item_id_9a1b56_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_alert_rows, migrations.RunPython.noop),
+    ]
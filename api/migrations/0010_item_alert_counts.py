@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:08
+
+from django.db import migrations, models
+
+
+def backfill_alert_counts(apps, schema_editor):
+    """Store alert_count / critical_alert_count from the existing alerts JSON"""
+    Item = apps.get_model('api', 'Item')
+    batch = []
+    rows = Item.objects.exclude(alerts__isnull=True).exclude(alerts=[]).values_list('pk', 'alerts')
+    for pk, alerts in rows.iterator(chunk_size=1000):
+        batch.append(Item(
+            pk=pk,
+            alert_count=len(alerts),
+            critical_alert_count=sum(1 for alert in alerts if alert.get('severity') == 'critical'),
+        ))
+        if len(batch) >= 1000:
+            Item.objects.bulk_update(batch, ['alert_count', 'critical_alert_count'])
+            batch = []
+    if batch:
+        Item.objects.bulk_update(batch, ['alert_count', 'critical_alert_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_itemalert'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='alert_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='critical_alert_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_alert_counts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['critical_alert_count', 'alert_count'], name='api_item_critica_8a89e8_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:23
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Batch numbers that mean "none given" - not part of the natural key
+UNKNOWN_BATCH_NUMBERS = ('', 'Unknown')
+
+# Duplicate groups listed in the error
+MAX_LISTED_DUPLICATES = 50
+
+
+def check_duplicate_items(apps, schema_editor):
+    """
+    Refuse to add the natural key while items share one
+    Nothing is deleted - duplicates are listed for manual review (merge or
+    rename them, then run migrate again)
+    """
+    Item = apps.get_model('api', 'Item')
+    duplicates = list(
+        Item.objects.exclude(batch_number__in=UNKNOWN_BATCH_NUMBERS)
+        .values('batch_number', 'name')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+        .order_by('batch_number', 'name')[:MAX_LISTED_DUPLICATES + 1]
+    )
+    if not duplicates:
+        return
+
+    lines = []
+    for group in duplicates[:MAX_LISTED_DUPLICATES]:
+        ids = Item.objects.filter(
+            batch_number=group['batch_number'], name=group['name']
+        ).order_by('id').values_list('id', flat=True)
+        lines.append(f"  batch_number={group['batch_number']!r} name={group['name']!r} ids={list(ids)}")
+    if len(duplicates) > MAX_LISTED_DUPLICATES:
+        lines.append('  ...')
+    raise RuntimeError(
+        'Items share a (batch_number, name) natural key - resolve these before migrating:\n'
+        + '\n'.join(lines)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_bulkuploadjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkuploadjob',
+            name='updated_rows',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(check_duplicate_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='item',
+            constraint=models.UniqueConstraint(
+                models.Case(
+                    models.When(batch_number__in=UNKNOWN_BATCH_NUMBERS, then=models.Value(None)),
+                    default=models.F('batch_number'),
+                    output_field=models.CharField(),
+                ),
+                models.F('name'),
+                name='unique_item_batch_name',
+            ),
+        ),
+    ]
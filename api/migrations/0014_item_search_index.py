@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from api.search import SEARCH_FIELDS, index_terms
+
+
+def backfill_search_index(apps, schema_editor):
+    """Index the searchable columns of every existing item"""
+    Item = apps.get_model('api', 'Item')
+    ItemSearchTerm = apps.get_model('api', 'ItemSearchTerm')
+    batch = []
+    rows = Item.objects.values_list('pk', *SEARCH_FIELDS)
+    for pk, *values in rows.iterator(chunk_size=1000):
+        for gram, weight in index_terms(dict(zip(SEARCH_FIELDS, values))).items():
+            batch.append(ItemSearchTerm(item_id=pk, trigram=gram, weight=weight))
+        if len(batch) >= 1000:
+            ItemSearchTerm.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ItemSearchTerm.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_schedulercheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='api.item')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['trigram', 'item'], name='api_itemsea_trigram_9dcc38_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
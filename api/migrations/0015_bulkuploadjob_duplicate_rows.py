@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_item_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkuploadjob',
+            name='duplicate_rows',
+            field=models.IntegerField(default=0),
+        ),
+    ]
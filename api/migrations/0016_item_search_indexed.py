@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-17 19:13
+
+from django.db import migrations, models
+
+
+def mark_indexed_items(apps, schema_editor):
+    """Items that already have index rows are indexed - the rest wait for index_pending()"""
+    Item = apps.get_model('api', 'Item')
+    ItemSearchTerm = apps.get_model('api', 'ItemSearchTerm')
+    Item.objects.filter(
+        models.Exists(ItemSearchTerm.objects.filter(item_id=models.OuterRef('pk')))
+    ).update(search_indexed=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_bulkuploadjob_duplicate_rows'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='search_indexed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['search_indexed'], name='api_item_search__a3654e_idx'),
+        ),
+        migrations.RunPython(mark_indexed_items, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,217 @@
-from django.db import models
+from django.db import connections, models, router, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
-from datetime import datetime
+from django.utils.dateparse import parse_datetime
+from datetime import datetime, timedelta
+import uuid
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from .quality import (
+    QUALITY_INPUT_FIELDS, QUALITY_OUTPUT_FIELDS,
+    score_quality, grade_for_score, status_for_score,
+    score_quality_rows, as_lists,
+)
+from .search import SEARCH_FIELDS, MAX_POSTINGS, RAREST_TRIGRAMS, index_terms
+
+# Columns Item.save() derives from the readings on every write
+DERIVED_FIELDS = QUALITY_OUTPUT_FIELDS + ('alerts', 'alert_count', 'critical_alert_count', 'status')
+
+# Columns read to regenerate alerts and the status that depends on them
+ALERT_INPUT_FIELDS = ('id', 'expiry_date', 'quality_score', 'alerts', 'status') + QUALITY_INPUT_FIELDS
+
+# Columns regenerating alerts writes
+ALERT_OUTPUT_FIELDS = ('alerts', 'alert_count', 'critical_alert_count', 'status')
+
+
+# Batch numbers that mean "none given" - left out of the (batch_number, name) natural key
+UNKNOWN_BATCH_NUMBERS = ('', 'Unknown')
+
+
+def natural_batch_number():
+    """batch_number as the natural key sees it - NULL (never equal) for unknown batch numbers"""
+    return models.Case(
+        models.When(batch_number__in=UNKNOWN_BATCH_NUMBERS, then=models.Value(None)),
+        default=models.F('batch_number'),
+        output_field=models.CharField(),
+    )
+
+
+def expiry_status_for(days_left):
+    """Expiry bucket for a number of days left (expired, urgent, warning, safe)"""
+    if days_left < 0:
+        return 'expired'
+    elif days_left <= 7:
+        return 'urgent'
+    elif days_left <= 30:
+        return 'warning'
+    else:
+        return 'safe'
+
+
+class ItemQuerySet(models.QuerySet):
+    """
+    QuerySet that keeps the stored quality columns correct on bulk write paths
+    (bulk_create, bulk_update and update() skip Item.save())
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        # Items from prepare() already carry their derived columns - score the rest only
+        unprepared = [obj for obj in objs if not getattr(obj, '_prepared', False)]
+        self._score_objects(unprepared)
+        # Stored counts follow whatever alerts the objects carry
+        for obj in unprepared:
+            obj.set_alerts(obj.alerts)
+        # New rows go in unindexed (search_indexed=False) - ItemSearchTerm.objects.index_pending()
+        # indexes them later, and searches check them with a plain scan until then
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        fields = list(fields)
+        objs = list(objs)
+        regenerate = []
+        if set(fields) & set(QUALITY_INPUT_FIELDS):
+            self._score_objects(objs)
+            fields += [f for f in QUALITY_OUTPUT_FIELDS if f not in fields]
+            if 'alerts' not in fields:
+                # Readings changed under alerts the caller didn't write - regenerate them
+                regenerate = self._refresh_alert_fields(objs)
+                fields += [f for f in ALERT_OUTPUT_FIELDS if f not in fields]
+        if 'alerts' in fields:
+            # Stored counts follow the alerts being written
+            for obj in objs:
+                obj.set_alerts(obj.alerts)
+            fields += [f for f in ('alert_count', 'critical_alert_count') if f not in fields]
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if regenerate:
+            ItemAlert.objects.rebuild(self.model.objects.filter(pk__in=regenerate))
+        if set(fields) & set(SEARCH_FIELDS):
+            # Leave re-indexing to index_pending() - one UPDATE instead of ~40 index rows per item
+            stale = [obj.pk for obj in objs if obj.search_changed()]
+            if stale:
+                models.QuerySet(self.model, using=self.db).filter(pk__in=stale).update(search_indexed=False)
+        return rows
+
+    def update(self, **kwargs):
+        if set(kwargs) & set(SEARCH_FIELDS):
+            # Flag the rows for index_pending() in the same UPDATE
+            kwargs['search_indexed'] = False
+        if not set(kwargs) & set(QUALITY_INPUT_FIELDS):
+            return super().update(**kwargs)
+        # Capture the rows first - the update may change whether they match the filter
+        pks = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        for start in range(0, len(pks), 1000):
+            chunk = self.model.objects.filter(pk__in=pks[start:start + 1000])
+            chunk.refresh_quality_scores()
+            # Alerts, their counts and status follow the readings, as in Item.save()
+            chunk.refresh_alerts()
+        return rows
+
+    def refresh_quality_scores(self, batch_size=1000):
+        """
+        Recompute stored quality columns for every row in the queryset
+        Only rows whose stored values are out of date are written
+        Returns the number of rows updated
+        """
+        updated = 0
+        chunk = []
+        rows = self.values_list('pk', *QUALITY_INPUT_FIELDS, *QUALITY_OUTPUT_FIELDS)
+        for row in rows.iterator(chunk_size=batch_size):
+            chunk.append(row)
+            if len(chunk) >= batch_size:
+                updated += self._refresh_chunk(chunk, batch_size)
+                chunk = []
+        if chunk:
+            updated += self._refresh_chunk(chunk, batch_size)
+        return updated
+
+    def _refresh_chunk(self, rows, batch_size):
+        readings_end = 1 + len(QUALITY_INPUT_FIELDS)
+        computed = zip(*as_lists(*score_quality_rows(row[1:readings_end] for row in rows)))
+        stale = [
+            self.model(pk=row[0], **dict(zip(QUALITY_OUTPUT_FIELDS, values)))
+            for row, values in zip(rows, computed)
+            if tuple(row[readings_end:]) != values
+        ]
+        if not stale:
+            return 0
+        # Plain QuerySet.bulk_update - the objects only carry the computed columns
+        return models.QuerySet(self.model, using=self.db).bulk_update(
+            stale, QUALITY_OUTPUT_FIELDS, batch_size=batch_size
+        )
+
+    def refresh_alerts(self, batch_size=1000):
+        """
+        Regenerate alerts, their stored counts and status for every row in the queryset
+        (as Item.save() does) and rebuild the ItemAlert rows of the items that changed
+        Alerts whose content is unchanged keep their timestamp
+        Returns the number of rows updated
+        """
+        updated = 0
+        chunk = []
+        items = self.order_by().only(*ALERT_INPUT_FIELDS)
+        for item in items.iterator(chunk_size=batch_size):
+            chunk.append(item)
+            if len(chunk) >= batch_size:
+                updated += self.refresh_alert_objects(chunk)
+                chunk = []
+        if chunk:
+            updated += self.refresh_alert_objects(chunk)
+        return updated
+
+    def refresh_alert_objects(self, objs):
+        """
+        Regenerate alerts and status of loaded items (ALERT_INPUT_FIELDS at least),
+        writing only the ones that changed
+        Returns the number of rows updated
+        """
+        changed = self._refresh_alert_fields(objs)
+        if not changed:
+            return 0
+        changed_pks = set(changed)
+        items = [obj for obj in objs if obj.pk in changed_pks]
+        # Plain QuerySet.bulk_update - the counts are already set
+        models.QuerySet(self.model, using=self.db).bulk_update(items, ALERT_OUTPUT_FIELDS)
+        ItemAlert.objects.rebuild(self.model.objects.filter(pk__in=changed))
+        return len(changed)
+
+    @staticmethod
+    def _refresh_alert_fields(objs):
+        """Regenerate alerts and status in memory; returns the pks of items that changed"""
+        changed = []
+        for obj in objs:
+            old_status = obj.status
+            alerts_changed = obj.refresh_alerts()
+            obj.status = obj.update_status()
+            if alerts_changed or obj.status != old_status:
+                changed.append(obj.pk)
+        return changed
+
+    def prepare(self, objs):
+        """
+        Compute every derived column of unsaved items in memory, as Item.save() would
+        (quality score, alerts and status) so they can go straight to bulk_create,
+        which then skips scoring them again - prepare after the last reading changes
+        """
+        objs = list(objs)
+        self._score_objects(objs)
+        for obj in objs:
+            obj.set_alerts(obj.generate_alerts())
+            obj.status = obj.update_status()
+            obj._prepared = True
+        return objs
+
+    @staticmethod
+    def _score_objects(objs):
+        """Score unsaved/in-memory items in one vectorized pass"""
+        readings = [tuple(getattr(obj, f) for f in QUALITY_INPUT_FIELDS) for obj in objs]
+        scores, grades, statuses = as_lists(*score_quality_rows(readings))
+        for obj, score, grade, quality_status in zip(objs, scores, grades, statuses):
+            obj.quality_score = score
+            obj.quality_grade = grade
+            obj.quality_status = quality_status
+
 
 class Item(models.Model):
     # Basic Medicine Information (existing fields from migration 0002)
@@ -42,6 +250,20 @@ class Item(models.Model):
         ('quarantine', 'Quarantine'),
     ]
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+    
+    # Quality Score (stored, recomputed from sensor readings on every save)
+    quality_score = models.FloatField(default=0.0)
+    quality_grade = models.CharField(max_length=1, default='F')
+    quality_status = models.CharField(max_length=20, default='Failed')
+    
+    # Alert counts (stored, written together with alerts)
+    alert_count = models.IntegerField(default=0)
+    critical_alert_count = models.IntegerField(default=0)
+    
+    # Whether the ItemSearchTerm rows match the searchable columns (bulk writes defer indexing)
+    search_indexed = models.BooleanField(default=False)
+
+    objects = ItemQuerySet.as_manager()
 
     class Meta:
         ordering = ['expiry_date']
@@ -52,6 +274,16 @@ class Item(models.Model):
             models.Index(fields=['category']),
             models.Index(fields=['created_at']),
             models.Index(fields=['expiry_date']),
+            models.Index(fields=['quality_score']),
+            models.Index(fields=['quality_grade']),
+            models.Index(fields=['critical_alert_count', 'alert_count']),
+            models.Index(fields=['search_indexed']),
+        ]
+        constraints = [
+            # Natural key re-imports are matched on (see api.ingest upserts)
+            # Items without a batch number may share a name
+            # (an expression, not a condition - MySQL ignores conditional unique constraints)
+            models.UniqueConstraint(natural_batch_number(), models.F('name'), name='unique_item_batch_name'),
         ]
 
     def __str__(self):
@@ -66,15 +298,7 @@ class Item(models.Model):
     @property
     def expiry_status(self):
         """Return expiry status based on days left"""
-        days_left = self.days_until_expiry
-        if days_left < 0:
-            return 'expired'
-        elif days_left <= 7:
-            return 'urgent'
-        elif days_left <= 30:
-            return 'warning'
-        else:
-            return 'safe'
+        return expiry_status_for(self.days_until_expiry)
     
     @property
     def is_expired(self):
@@ -83,127 +307,22 @@ class Item(models.Model):
     
     def calculate_quality_score(self):
         """
-        Calculate overall quality score based on multiple parameters
-        Score range: 0-100
-        Higher score = Better quality
-        
-        Formula breakdown:
-        - Temperature: Ideal range 20-25°C (20% weight)
-        - Humidity: Ideal range 40-60% (20% weight)
-        - pH Level: Ideal range 6.5-7.5 (15% weight)
-        - Contaminant Level: Lower is better, <0.01 ppm (25% weight)
-        - Active Ingredient Purity: Higher is better, >95% (20% weight)
-        """
-        score = 0.0
-        
-        # Temperature Score (20 points max)
-        # Ideal: 20-25°C, acceptable: 15-30°C
-        temp = self.temperature
-        if 20 <= temp <= 25:
-            temp_score = 20
-        elif 15 <= temp <= 30:
-            # Linear decay outside ideal range
-            deviation = min(abs(temp - 20), abs(temp - 25))
-            temp_score = max(0, 20 - (deviation * 2))
-        else:
-            temp_score = 0
-        score += temp_score
-        
-        # Humidity Score (20 points max)
-        # Ideal: 40-60%, acceptable: 30-70%
-        humidity = self.humidity
-        if 40 <= humidity <= 60:
-            humidity_score = 20
-        elif 30 <= humidity <= 70:
-            deviation = min(abs(humidity - 40), abs(humidity - 60))
-            humidity_score = max(0, 20 - (deviation * 1.5))
-        else:
-            humidity_score = 0
-        score += humidity_score
-        
-        # pH Level Score (15 points max)
-        # Ideal: 6.5-7.5, acceptable: 6.0-8.0
-        ph = self.ph_level
-        if 6.5 <= ph <= 7.5:
-            ph_score = 15
-        elif 6.0 <= ph <= 8.0:
-            deviation = min(abs(ph - 6.5), abs(ph - 7.5))
-            ph_score = max(0, 15 - (deviation * 10))
-        else:
-            ph_score = 0
-        score += ph_score
-        
-        # Contaminant Level Score (25 points max)
-        # Ideal: <0.001 ppm, acceptable: <0.01 ppm
-        contaminant = self.contaminant_level
-        if contaminant <= 0.001:
-            contaminant_score = 25
-        elif contaminant <= 0.01:
-            # Linear scoring between 0.001 and 0.01
-            contaminant_score = 25 - ((contaminant - 0.001) / 0.009 * 15)
-        elif contaminant <= 0.1:
-            contaminant_score = max(0, 10 - (contaminant * 50))
-        else:
-            contaminant_score = 0
-        score += contaminant_score
-        
-        # Active Ingredient Purity Score (20 points max)
-        # Ideal: >99%, acceptable: >90%
-        purity = self.active_ingredient_purity
-        if purity >= 99:
-            purity_score = 20
-        elif purity >= 95:
-            purity_score = 15 + ((purity - 95) / 4 * 5)
-        elif purity >= 90:
-            purity_score = 10 + ((purity - 90) / 5 * 5)
-        else:
-            purity_score = max(0, purity / 90 * 10)
-        score += purity_score
-        
-        # Round to 2 decimal places
-        return round(score, 2)
-    
-    @property
-    def quality_score(self):
-        """Get the calculated quality score"""
-        return self.calculate_quality_score()
-    
-    @property
-    def quality_grade(self):
-        """
-        Get quality grade based on score
-        A: 90-100 (Excellent)
-        B: 80-89 (Good)
-        C: 70-79 (Fair)
-        D: 60-69 (Poor)
-        F: <60 (Failed)
+        Calculate overall quality score (0-100) from the sensor readings
+        See api.quality.score_quality for the formula breakdown
         """
-        score = self.quality_score
-        if score >= 90:
-            return 'A'
-        elif score >= 80:
-            return 'B'
-        elif score >= 70:
-            return 'C'
-        elif score >= 60:
-            return 'D'
-        else:
-            return 'F'
+        return score_quality(
+            self.temperature,
+            self.humidity,
+            self.ph_level,
+            self.contaminant_level,
+            self.active_ingredient_purity,
+        )
     
-    @property
-    def quality_status(self):
-        """Get quality status description"""
-        score = self.quality_score
-        if score >= 90:
-            return 'Excellent'
-        elif score >= 80:
-            return 'Good'
-        elif score >= 70:
-            return 'Fair'
-        elif score >= 60:
-            return 'Poor'
-        else:
-            return 'Failed'
+    def refresh_quality_score(self):
+        """Recompute the stored quality score, grade and status from the sensor readings"""
+        self.quality_score = self.calculate_quality_score()
+        self.quality_grade = grade_for_score(self.quality_score)
+        self.quality_status = status_for_score(self.quality_score)
     
     def generate_alerts(self):
         """
@@ -281,19 +400,35 @@ class Item(models.Model):
     @property
     def has_alerts(self):
         """Check if item has any active alerts"""
-        return self.alerts and len(self.alerts) > 0
+        return self.alert_count > 0
     
-    @property
-    def alert_count(self):
-        """Get count of active alerts"""
-        return len(self.alerts) if self.alerts else 0
+    def set_alerts(self, alerts):
+        """Assign the alerts list together with its stored alert counts"""
+        self.alerts = alerts
+        self.alert_count = len(alerts) if alerts else 0
+        self.critical_alert_count = sum(
+            1 for alert in alerts or [] if alert.get('severity') == 'critical'
+        )
     
-    @property
-    def critical_alert_count(self):
-        """Get count of critical alerts"""
-        if not self.alerts:
-            return 0
-        return sum(1 for alert in self.alerts if alert.get('severity') == 'critical')
+    def refresh_alerts(self):
+        """
+        Regenerate alerts (and their stored counts) from the current readings
+        Alerts whose content is unchanged keep their original timestamp
+        Returns True if the alert list changed
+        """
+        def content(alert):
+            return tuple(sorted((key, value) for key, value in alert.items() if key != 'timestamp'))
+
+        previous = self.alerts or []
+        timestamps = {content(alert): alert.get('timestamp') for alert in previous}
+        new_alerts = self.generate_alerts()
+        for alert in new_alerts:
+            timestamp = timestamps.get(content(alert))
+            if timestamp:
+                alert['timestamp'] = timestamp
+
+        self.set_alerts(new_alerts)
+        return new_alerts != previous
     
     def update_status(self):
         """
@@ -322,11 +457,382 @@ class Item(models.Model):
         # Otherwise, medicine is active
         return 'active'
     
+    @staticmethod
+    def expiry_filters(today=None):
+        """
+        Q filters selecting the items expiry_status puts in each bucket
+        Date ranges, so they run on the expiry_date index
+        """
+        today = today or timezone.now().date()
+        return {
+            'expired': models.Q(expiry_date__lt=today),
+            'urgent': models.Q(expiry_date__gte=today, expiry_date__lte=today + timedelta(days=7)),
+            'warning': models.Q(expiry_date__gt=today + timedelta(days=7), expiry_date__lte=today + timedelta(days=30)),
+            'safe': models.Q(expiry_date__gt=today + timedelta(days=30)),
+        }
+    
+    @staticmethod
+    def status_filters(today=None):
+        """
+        Q filters selecting the items update_status() puts in each status
+        Set-based counterpart of update_status, driven by the stored columns
+        """
+        today = today or timezone.now().date()
+        expired = models.Q(expiry_date__lt=today)
+        failing = (
+            models.Q(quality_score__lt=60)
+            | models.Q(critical_alert_count__gt=0)
+            | models.Q(contaminant_level__gt=1)
+        )
+        return {
+            'expired': expired,
+            'quarantine': ~expired & failing,
+            'active': ~expired & ~failing,
+        }
+    
+    # Searchable values as last loaded or indexed (None - never indexed)
+    _indexed_values = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._indexed_values = instance.search_values()
+        return instance
+
+    def search_values(self):
+        """Loaded values of the searchable fields (deferred fields are left out)"""
+        return {field: self.__dict__[field] for field in SEARCH_FIELDS if field in self.__dict__}
+
+    def search_changed(self):
+        """Whether the search index is out of date for this instance"""
+        return self._indexed_values is None or self.search_values() != self._indexed_values
+    
     def save(self, *args, **kwargs):
-        """Override save to auto-update status before saving"""
+        """Override save to store quality score, alerts and status in a single write"""
+        # Score once per save; reads use the stored columns
+        self.refresh_quality_score()
+        # Regenerate alerts before the status that depends on them
+        alerts_changed = self.refresh_alerts()
         # Auto-update status before saving
         self.status = self.update_status()
-        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            # Derived columns follow whatever the caller chose to write
+            kwargs['update_fields'] = set(update_fields) | set(DERIVED_FIELDS)
+
+        # Searchable values only reach the table if they are written
+        search_changed = self.search_changed() and (
+            update_fields is None or bool(set(update_fields) & set(SEARCH_FIELDS))
+        )
+        if search_changed:
+            # A single item is cheap to index right away
+            self.search_indexed = True
+            if update_fields is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'search_indexed'}
+
+        if not alerts_changed and not search_changed:
+            super().save(*args, **kwargs)
+            return
+
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(Item, instance=self)):
+            super().save(*args, **kwargs)
+            # Keep the normalized alert rows in sync
+            if alerts_changed:
+                ItemAlert.objects.sync_item(self)
+            # Re-index only when a searchable value changed
+            if search_changed:
+                ItemSearchTerm.objects.sync_items([self])
+
+
+class ItemAlertQuerySet(models.QuerySet):
+    """Keeps ItemAlert rows in step with the Item.alerts JSON they mirror"""
+
+    def sync_item(self, item):
+        """Replace the alert rows of one item with its current alerts"""
+        self.filter(item_id=item.pk).delete()
+        rows = ItemAlert.from_alerts(item.pk, item.alerts)
+        if rows:
+            self.bulk_create(rows)
+
+    def rebuild(self, items, batch_size=1000):
+        """
+        Rebuild the alert rows of every item in the given Item queryset
+        Idempotent - existing rows for those items are replaced
+        Returns the number of alert rows written
+        """
+        self.filter(item__in=items.values('pk')).delete()
+        written = 0
+        batch = []
+        rows = items.exclude(alerts__isnull=True).exclude(alerts=[]).values_list('pk', 'alerts')
+        for pk, alerts in rows.order_by().iterator(chunk_size=batch_size):
+            batch.extend(ItemAlert.from_alerts(pk, alerts))
+            if len(batch) >= batch_size:
+                written += len(self.bulk_create(batch))
+                batch = []
+        if batch:
+            written += len(self.bulk_create(batch))
+        return written
+
+
+class ItemAlert(models.Model):
+    """
+    One environmental alert of an Item, stored as a row so alerts can be
+    filtered, counted and paginated in SQL (mirrors the Item.alerts JSON list)
+    """
+    SEVERITY_CHOICES = [
+        ('critical', 'Critical'),
+        ('warning', 'Warning'),
+    ]
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='alert_rows')
+    type = models.CharField(max_length=50)
+    severity = models.CharField(max_length=20, choices=SEVERITY_CHOICES)
+    message = models.CharField(max_length=255, blank=True, default='')
+    value = models.FloatField(null=True, blank=True)
+    threshold = models.CharField(max_length=50, blank=True, default='')
+    timestamp = models.DateTimeField(null=True, blank=True)
+
+    objects = ItemAlertQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['item', 'id']
+        indexes = [
+            models.Index(fields=['severity', 'type']),
+            models.Index(fields=['type']),
+            models.Index(fields=['item', 'severity']),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} - {self.type} ({self.severity})"
+
+    @classmethod
+    def from_alerts(cls, item_id, alerts):
+        """Build unsaved rows from an Item.alerts JSON list"""
+        rows = []
+        for alert in alerts or []:
+            value = alert.get('value')
+            rows.append(cls(
+                item_id=item_id,
+                type=alert.get('type', ''),
+                severity=alert.get('severity', ''),
+                message=alert.get('message', '')[:255],
+                value=value if isinstance(value, (int, float)) else None,
+                threshold=str(alert.get('threshold', '')),
+                timestamp=parse_datetime(alert['timestamp']) if alert.get('timestamp') else None,
+            ))
+        return rows
+
+
+class ItemSearchTermQuerySet(models.QuerySet):
+    """Keeps the trigram index in step with the searchable Item columns"""
+
+    def index_items(self, items, batch_size=1000):
+        """Add index rows for saved items that have none yet"""
+        terms = []
+        for item in items:
+            values = {field: getattr(item, field) for field in SEARCH_FIELDS}
+            terms.extend(item_terms(item.pk, values))
+            item._indexed_values = values
+        return self._insert_terms(terms, batch_size)
+
+    def sync_items(self, items, batch_size=1000):
+        """Replace the index rows of the given saved items with their current values"""
+        if not items:
+            return 0
+        self.filter(item_id__in=[item.pk for item in items]).delete()
+        return self.index_items(items, batch_size)
+
+    def rebuild(self, items, batch_size=1000):
+        """
+        Rebuild the index rows of every item in the given Item queryset and mark them indexed
+        Idempotent - existing rows for those items are replaced
+        Returns the number of index rows written
+        """
+        self.filter(item__in=items.values('pk')).delete()
+        written = 0
+        terms = []
+        rows = items.values_list('pk', *SEARCH_FIELDS).order_by()
+        for pk, *values in rows.iterator(chunk_size=batch_size):
+            terms.extend(item_terms(pk, dict(zip(SEARCH_FIELDS, values))))
+            if len(terms) >= batch_size:
+                written += self._insert_terms(terms, batch_size)
+                terms = []
+        written += self._insert_terms(terms, batch_size)
+        items.filter(search_indexed=False).update(search_indexed=True)
+        return written
+
+    def index_pending(self, batch_size=1000):
+        """
+        Index the items bulk writes left unindexed (search_indexed=False), batch_size
+        items per transaction - the deferred step behind bulk ingests
+        Rows are locked while indexed, so concurrent runs take different batches
+        Returns (items_indexed, index_rows_written)
+        """
+        indexed = 0
+        written = 0
+        db = self.db
+        while True:
+            with transaction.atomic(using=db):
+                pending = (
+                    Item.objects.using(db).select_for_update(skip_locked=True)
+                    .filter(search_indexed=False).order_by('pk')
+                    .values_list('pk', *SEARCH_FIELDS)[:batch_size]
+                )
+                rows = list(pending)
+                if not rows:
+                    break
+                pks = [row[0] for row in rows]
+                self.filter(item_id__in=pks).delete()
+                terms = []
+                for pk, *values in rows:
+                    terms.extend(item_terms(pk, dict(zip(SEARCH_FIELDS, values))))
+                written += self._insert_terms(terms, batch_size)
+                models.QuerySet(Item, using=db).filter(pk__in=pks).update(search_indexed=True)
+            indexed += len(rows)
+        return indexed, written
+
+    def _insert_terms(self, terms, batch_size=1000):
+        """
+        Insert (item_id, trigram, weight) tuples with executemany - skipping model
+        instances makes writing ~40 rows per item several times faster than bulk_create
+        """
+        if not terms:
+            return 0
+        connection = connections[self.db]
+        meta = ItemSearchTerm._meta
+        sql = 'INSERT INTO {} ({}) VALUES (%s, %s, %s)'.format(
+            connection.ops.quote_name(meta.db_table),
+            ', '.join(connection.ops.quote_name(meta.get_field(name).column)
+                      for name in ('item', 'trigram', 'weight')),
+        )
+        with connection.cursor() as cursor:
+            for start in range(0, len(terms), batch_size):
+                cursor.executemany(sql, terms[start:start + batch_size])
+        return len(terms)
+
+    def rarest(self, grams, limit=RAREST_TRIGRAMS):
+        """
+        Up to `limit` of the given trigrams held by the fewest items, rarest first
+        Trigrams with MAX_POSTINGS or more items are left out - [] means none narrows
+        One query of bounded counts - each trigram's count stops at MAX_POSTINGS rows,
+        so a common trigram costs no more than a rare one
+        """
+        grams = sorted(grams)
+        if not grams:
+            return []
+        connection = connections[self.db]
+        counts = []
+        params = []
+        for i, gram in enumerate(grams):
+            postings = self.filter(trigram=gram).values('id').order_by()[:MAX_POSTINGS]
+            sql, gram_params = postings.query.get_compiler(using=self.db).as_sql()
+            counts.append(f'(SELECT COUNT(*) FROM ({sql}) {connection.ops.quote_name(f"g{i}")})')
+            params.extend(gram_params)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT ' + ', '.join(counts), params)
+            ranked = sorted(zip(cursor.fetchone(), grams))
+        return [gram for count, gram in ranked[:limit] if count < MAX_POSTINGS]
+
+
+def item_terms(item_id, values):
+    """(item_id, trigram, weight) index rows for an item's searchable values"""
+    return [(item_id, gram, weight) for gram, weight in sorted(index_terms(values).items())]
+
+
+class ItemSearchTerm(models.Model):
+    """
+    One trigram of one searchable Item column - the search index behind ?search=
+    (see api.search for how values are split)
+    """
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='search_terms')
+    trigram = models.CharField(max_length=3)
+    weight = models.PositiveSmallIntegerField(default=1)  # summed SEARCH_WEIGHTS of the fields holding it
+
+    objects = ItemSearchTermQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['trigram', 'item']),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} - {self.trigram} ({self.weight})"
+
+    @classmethod
+    def from_values(cls, item_id, values):
+        """Build unsaved rows from an item's searchable values"""
+        return [cls(item_id=pk, trigram=gram, weight=weight) for pk, gram, weight in item_terms(item_id, values)]
+
+
+class BulkUploadJob(models.Model):
+    """
+    A CSV bulk upload processed in the background
+    Progress is written after every batch so any worker process can report it
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                             related_name='bulk_upload_jobs')
+    file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500, blank=True, default='')  # spooled upload, removed when done
+    file_size = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    processed_rows = models.IntegerField(default=0)
+    created_rows = models.IntegerField(default=0)
+    updated_rows = models.IntegerField(default=0)
+    duplicate_rows = models.IntegerField(default=0)  # repeated a key already in the same batch
+    failed_rows = models.IntegerField(default=0)
+    error_message = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.file_name} ({self.status})"
+
+    @property
+    def rows_per_second(self):
+        """Rows processed per second since the job started"""
+        if not self.started_at:
+            return 0.0
+        elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+        return round(self.processed_rows / elapsed, 2) if elapsed > 0 else 0.0
+
+
+class BulkUploadError(models.Model):
+    """One rejected row of a bulk upload job"""
+    job = models.ForeignKey(BulkUploadJob, on_delete=models.CASCADE, related_name='errors')
+    row = models.IntegerField()
+    data = models.JSONField(default=dict, blank=True)
+    error = models.TextField()
+
+    class Meta:
+        ordering = ['job', 'row']
+        indexes = [
+            models.Index(fields=['job', 'row']),
+        ]
+
+    def __str__(self):
+        return f"Row {self.row}: {self.error}"
+
+
+class SchedulerCheckpoint(models.Model):
+    """Last date a periodic job has processed up to (e.g. the expiry sweep)"""
+    name = models.CharField(max_length=100, unique=True)
+    last_processed_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_processed_date}"
+
 
 class UserProfile(models.Model):
     """Extended user profile model"""
@@ -359,18 +865,3 @@ def save_user_profile(sender, instance, **kwargs):
         instance.profile.save()
     else:
         UserProfile.objects.create(user=instance)
-
-@receiver(post_save, sender=Item)
-def generate_item_alerts(sender, instance, created, **kwargs):
-    """
-    Auto-generate alerts whenever an Item is created or updated
-    Signal triggers on every save to check environmental conditions
-    """
-    # Generate alerts based on current values
-    new_alerts = instance.generate_alerts()
-    
-    # Only update if alerts have changed
-    if instance.alerts != new_alerts:
-        instance.alerts = new_alerts
-        # Use update to avoid triggering the signal again
-        Item.objects.filter(pk=instance.pk).update(alerts=new_alerts)
\ No newline at end of file
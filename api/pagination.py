@@ -0,0 +1,175 @@
+"""
+Keyset (cursor) pagination
+Pages are read with WHERE (expiry_date, id) > (last row) ORDER BY expiry_date, id
+LIMIT n instead of OFFSET, so page 1000 costs the same as page 1 and rows
+inserted meanwhile don't shift later pages. Cursors are the last row's ordering
+values, JSON + base64 so clients treat them as opaque.
+"""
+
+import base64
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# Item ordering used by every keyset-paginated endpoint (id breaks ties)
+KEYSET_ORDERING = ('expiry_date', 'id')
+
+# Rows per page unless the client asks for ?page_size=
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """?page_size= value clamped to [1, maximum]; raises ValueError if not a number"""
+    if value in (None, ''):
+        return default
+    return min(max(int(value), 1), maximum)
+
+
+def encode_cursor(values):
+    """Opaque cursor for a row's ordering values"""
+    payload = json.dumps([str(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, model, ordering=KEYSET_ORDERING):
+    """
+    Ordering values from a cursor, converted to the model's field types
+    Raises ValueError for cursors this endpoint didn't issue
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise ValueError
+        return [
+            model._meta.get_field(name.lstrip('-')).to_python(value) for name, value in zip(ordering, values)
+        ]
+    except (ValueError, TypeError, DjangoValidationError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def keyset_filter(values, ordering=KEYSET_ORDERING):
+    """Q selecting rows after `values` in `ordering` ('-name' for descending columns)"""
+    after = Q()
+    equal = Q()
+    for name, value in zip(ordering, values):
+        field = name.lstrip('-')
+        after |= equal & Q(**{f'{field}__{"lt" if name.startswith("-") else "gt"}': value})
+        equal &= Q(**{field: value})
+    # Redundant bound on the leading column keeps it an index range scan
+    leading = ordering[0]
+    bound = f'{leading.lstrip("-")}__{"lte" if leading.startswith("-") else "gte"}'
+    return Q(**{bound: values[0]}) & after
+
+
+def keyset_page(queryset, page_size, after=None, ordering=KEYSET_ORDERING, columns=None):
+    """
+    One page of the queryset after the given ordering values
+    Returns (rows, last_values) - last_values is None on the last page
+    Works on model querysets, values() querysets and values_list() querysets
+    (pass the values_list columns so the ordering values can be found in the tuples)
+    """
+    queryset = queryset.order_by(*ordering)
+    if after is not None:
+        queryset = queryset.filter(keyset_filter(after, ordering))
+
+    # One extra row tells whether another page follows
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, ordering_values(rows[-1], ordering, columns)
+
+
+def ordering_values(row, ordering=KEYSET_ORDERING, columns=None):
+    """A row's ordering values (model instance, values() dict or values_list() tuple)"""
+    names = [name.lstrip('-') for name in ordering]
+    if isinstance(row, dict):
+        return [row[name] for name in names]
+    if isinstance(row, tuple):
+        return [row[columns.index(name)] for name in names]
+    return [getattr(row, name) for name in names]
+
+
+def iter_keyset(queryset, batch_size, ordering=KEYSET_ORDERING, columns=None):
+    """
+    Yield every row of the queryset, reading batch_size rows per query
+    Memory stays at one batch even where the database driver buffers whole results
+    """
+    after = None
+    while True:
+        rows, after = keyset_page(queryset, batch_size, after, ordering, columns)
+        yield from rows
+        if after is None:
+            return
+
+
+class ItemKeysetPagination(BasePagination):
+    """
+    Keyset pagination for Item lists, ordered by (expiry_date, id)
+    ?page_size=N (default 100, max 1000), ?cursor= from the previous page's 'next'
+    ?count=false skips the COUNT(*) over the filtered rows
+    """
+    page_size = DEFAULT_PAGE_SIZE
+    max_page_size = MAX_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering = KEYSET_ORDERING
+    # Whether 'count' is included when the client doesn't pass ?count=
+    count_by_default = True
+
+    def paginate_queryset(self, queryset, request, view=None, columns=None):
+        """columns - the fields of a values_list() queryset, so tuple rows can be paged"""
+        self.request = request
+        params = request.query_params
+        try:
+            self.current_page_size = parse_page_size(
+                params.get(self.page_size_query_param), self.page_size, self.max_page_size
+            )
+            cursor = params.get(self.cursor_query_param)
+            after = decode_cursor(cursor, queryset.model, self.ordering) if cursor else None
+        except ValueError as e:
+            raise ValidationError({'error': str(e)})
+
+        with_count = params.get(self.count_query_param)
+        if with_count is None:
+            with_count = self.count_by_default
+        else:
+            with_count = with_count.lower() not in ('false', '0', 'no')
+        self.count = queryset.count() if with_count else None
+
+        rows, last = keyset_page(queryset, self.current_page_size, after, self.ordering, columns)
+        self.next_cursor = encode_cursor(last) if last is not None else None
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        body = {}
+        if self.count is not None:
+            body['count'] = self.count
+        body['next'] = self.get_next_link()
+        body['page_size'] = self.current_page_size
+        body['results'] = data
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'page_size': {'type': 'integer'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,231 @@
+"""
+Quality scoring for medicine batches
+Single source of truth for the 0-100 quality score, its letter grade and status label.
+Used by Item.save(), bulk write paths and data migrations (which cannot call model methods).
+"""
+
+# NumPy is optional - the batch scorer falls back to the scalar formula without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Sensor columns the quality score is computed from (in argument order)
+QUALITY_INPUT_FIELDS = (
+    'temperature',
+    'humidity',
+    'ph_level',
+    'contaminant_level',
+    'active_ingredient_purity',
+)
+
+# Stored columns derived from the sensor readings
+QUALITY_OUTPUT_FIELDS = ('quality_score', 'quality_grade', 'quality_status')
+
+# (minimum score, grade, status) - checked from best to worst
+QUALITY_BANDS = [
+    (90, 'A', 'Excellent'),
+    (80, 'B', 'Good'),
+    (70, 'C', 'Fair'),
+    (60, 'D', 'Poor'),
+]
+FAILING_GRADE = 'F'
+FAILING_STATUS = 'Failed'
+
+
+def score_quality(temperature, humidity, ph_level, contaminant_level, active_ingredient_purity):
+    """
+    Calculate overall quality score based on multiple parameters
+    Score range: 0-100
+    Higher score = Better quality
+
+    Formula breakdown:
+    - Temperature: Ideal range 20-25°C (20% weight)
+    - Humidity: Ideal range 40-60% (20% weight)
+    - pH Level: Ideal range 6.5-7.5 (15% weight)
+    - Contaminant Level: Lower is better, <0.01 ppm (25% weight)
+    - Active Ingredient Purity: Higher is better, >95% (20% weight)
+    """
+    score = 0.0
+
+    # Temperature Score (20 points max)
+    # Ideal: 20-25°C, acceptable: 15-30°C
+    temp = temperature
+    if 20 <= temp <= 25:
+        temp_score = 20
+    elif 15 <= temp <= 30:
+        # Linear decay outside ideal range
+        deviation = min(abs(temp - 20), abs(temp - 25))
+        temp_score = max(0, 20 - (deviation * 2))
+    else:
+        temp_score = 0
+    score += temp_score
+
+    # Humidity Score (20 points max)
+    # Ideal: 40-60%, acceptable: 30-70%
+    if 40 <= humidity <= 60:
+        humidity_score = 20
+    elif 30 <= humidity <= 70:
+        deviation = min(abs(humidity - 40), abs(humidity - 60))
+        humidity_score = max(0, 20 - (deviation * 1.5))
+    else:
+        humidity_score = 0
+    score += humidity_score
+
+    # pH Level Score (15 points max)
+    # Ideal: 6.5-7.5, acceptable: 6.0-8.0
+    ph = ph_level
+    if 6.5 <= ph <= 7.5:
+        ph_score = 15
+    elif 6.0 <= ph <= 8.0:
+        deviation = min(abs(ph - 6.5), abs(ph - 7.5))
+        ph_score = max(0, 15 - (deviation * 10))
+    else:
+        ph_score = 0
+    score += ph_score
+
+    # Contaminant Level Score (25 points max)
+    # Ideal: <0.001 ppm, acceptable: <0.01 ppm
+    contaminant = contaminant_level
+    if contaminant <= 0.001:
+        contaminant_score = 25
+    elif contaminant <= 0.01:
+        # Linear scoring between 0.001 and 0.01
+        contaminant_score = 25 - ((contaminant - 0.001) / 0.009 * 15)
+    elif contaminant <= 0.1:
+        contaminant_score = max(0, 10 - (contaminant * 50))
+    else:
+        contaminant_score = 0
+    score += contaminant_score
+
+    # Active Ingredient Purity Score (20 points max)
+    # Ideal: >99%, acceptable: >90%
+    purity = active_ingredient_purity
+    if purity >= 99:
+        purity_score = 20
+    elif purity >= 95:
+        purity_score = 15 + ((purity - 95) / 4 * 5)
+    elif purity >= 90:
+        purity_score = 10 + ((purity - 90) / 5 * 5)
+    else:
+        purity_score = max(0, purity / 90 * 10)
+    score += purity_score
+
+    # Round to 2 decimal places
+    return round(score, 2)
+
+
+def grade_for_score(score):
+    """
+    Get quality grade based on score
+    A: 90-100 (Excellent)
+    B: 80-89 (Good)
+    C: 70-79 (Fair)
+    D: 60-69 (Poor)
+    F: <60 (Failed)
+    """
+    for minimum, grade, _ in QUALITY_BANDS:
+        if score >= minimum:
+            return grade
+    return FAILING_GRADE
+
+
+def status_for_score(score):
+    """Get quality status description based on score"""
+    for minimum, _, quality_status in QUALITY_BANDS:
+        if score >= minimum:
+            return quality_status
+    return FAILING_STATUS
+
+
+def score_quality_batch(temperature, humidity, ph_level, contaminant_level, active_ingredient_purity):
+    """
+    Vectorized score_quality for whole columns of sensor readings
+    Takes one sequence per sensor column (same order as QUALITY_INPUT_FIELDS)
+    Returns (scores, grades, statuses) as NumPy arrays, or lists when NumPy is unavailable
+
+    Mirrors score_quality operation for operation so both give identical results
+    """
+    if np is None:
+        scores = [
+            score_quality(*readings)
+            for readings in zip(temperature, humidity, ph_level, contaminant_level, active_ingredient_purity)
+        ]
+        return scores, [grade_for_score(s) for s in scores], [status_for_score(s) for s in scores]
+
+    temp = np.asarray(temperature, dtype=np.float64)
+    humidity = np.asarray(humidity, dtype=np.float64)
+    ph = np.asarray(ph_level, dtype=np.float64)
+    contaminant = np.asarray(contaminant_level, dtype=np.float64)
+    purity = np.asarray(active_ingredient_purity, dtype=np.float64)
+
+    # np.fmax matches max(0, x) for NaN (returns 0) where np.maximum would propagate NaN
+    with np.errstate(invalid='ignore'):
+        temp_score = np.select(
+            [(temp >= 20) & (temp <= 25), (temp >= 15) & (temp <= 30)],
+            [20.0, np.fmax(0, 20 - (np.minimum(np.abs(temp - 20), np.abs(temp - 25)) * 2))],
+            0.0,
+        )
+        humidity_score = np.select(
+            [(humidity >= 40) & (humidity <= 60), (humidity >= 30) & (humidity <= 70)],
+            [20.0, np.fmax(0, 20 - (np.minimum(np.abs(humidity - 40), np.abs(humidity - 60)) * 1.5))],
+            0.0,
+        )
+        ph_score = np.select(
+            [(ph >= 6.5) & (ph <= 7.5), (ph >= 6.0) & (ph <= 8.0)],
+            [15.0, np.fmax(0, 15 - (np.minimum(np.abs(ph - 6.5), np.abs(ph - 7.5)) * 10))],
+            0.0,
+        )
+        contaminant_score = np.select(
+            [contaminant <= 0.001, contaminant <= 0.01, contaminant <= 0.1],
+            [25.0, 25 - ((contaminant - 0.001) / 0.009 * 15), np.fmax(0, 10 - (contaminant * 50))],
+            0.0,
+        )
+        purity_score = np.select(
+            [purity >= 99, purity >= 95, purity >= 90],
+            [20.0, 15 + ((purity - 95) / 4 * 5), 10 + ((purity - 90) / 5 * 5)],
+            np.fmax(0, purity / 90 * 10),
+        )
+
+    # Same summation order as the scalar version
+    raw = temp_score + humidity_score + ph_score + contaminant_score + purity_score
+    scores = _round_scores(raw)
+
+    minimums = [minimum for minimum, _, _ in QUALITY_BANDS]
+    conditions = [scores >= minimum for minimum in minimums]
+    grades = np.select(conditions, [grade for _, grade, _ in QUALITY_BANDS], FAILING_GRADE)
+    statuses = np.select(conditions, [label for _, _, label in QUALITY_BANDS], FAILING_STATUS)
+    return scores, grades, statuses
+
+
+def score_quality_rows(rows):
+    """
+    Score the tuples returned by values_list(*QUALITY_INPUT_FIELDS)
+    Returns (scores, grades, statuses) - see score_quality_batch
+    """
+    rows = list(rows)
+    if np is None or not rows:
+        columns = list(zip(*rows)) or [()] * len(QUALITY_INPUT_FIELDS)
+    else:
+        columns = np.array(rows, dtype=np.float64).T
+    return score_quality_batch(*columns)
+
+
+def as_lists(*arrays):
+    """Convert batch scorer output to plain Python lists (for model fields and JSON)"""
+    return tuple(a if isinstance(a, list) else a.tolist() for a in arrays)
+
+
+def _round_scores(raw):
+    """
+    Round to 2 decimal places exactly like round(score, 2)
+    np.round works on the binary value scaled by 100, so values sitting on a
+    half-cent boundary can round the other way - those few are re-rounded in Python
+    """
+    rounded = np.round(raw, 2)
+    scaled = raw * 100
+    with np.errstate(invalid='ignore'):
+        ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if ties.any():
+        rounded[ties] = [round(value, 2) for value in raw[ties].tolist()]
+    return rounded
@@ -0,0 +1,120 @@
+"""
+Fast JSON rendering and streamed JSON arrays
+FastJSONRenderer renders with orjson when it is installed and produces the same
+bytes as DRF's JSONRenderer (compact, unicode, dates and Decimals as DRF encodes
+them). streaming_json_response() emits a generator of rows as a JSON array
+without holding the whole list or the whole payload in memory.
+"""
+
+import datetime
+import logging
+from itertools import chain, islice
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+# orjson is optional - rendering falls back to DRF's json encoder without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Rows rendered per chunk of a streamed response
+STREAM_CHUNK_ROWS = 500
+
+# Line/paragraph separators DRF escapes (valid JSON, but not valid JavaScript)
+_LINE_SEPARATORS = ('\u2028'.encode(), '\u2029'.encode())
+
+_drf_default = JSONEncoder().default
+
+logger = logging.getLogger(__name__)
+
+
+def _default(obj):
+    """DRF's encoding for what orjson leaves to us (datetimes, Decimal, lazy strings...)"""
+    # Dates are the common case - skip DRF's isinstance chain
+    if type(obj) is datetime.date:
+        return obj.isoformat()
+    return _drf_default(obj)
+
+
+def dumps(data):
+    """
+    data as compact JSON bytes, identical to DRF's JSONRenderer output
+    (only differences: NaN/Infinity render as null instead of raising, and very
+    large/small floats may use a different exponent notation)
+    """
+    if orjson is None:
+        # JSONRenderer renders None as an empty body
+        return JSONRenderer().render(data) if data is not None else b'null'
+    content = orjson.dumps(
+        data, default=_default,
+        # Datetimes go through DRF's encoder, which keeps milliseconds only
+        option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+    )
+    if b'\xe2\x80' in content:
+        for separator, escaped in zip(_LINE_SEPARATORS, (b'\\u2028', b'\\u2029')):
+            content = content.replace(separator, escaped)
+    return content
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson
+    Indented output (browsable API, ?indent) and non-default JSON settings use DRF's renderer
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        fast = (
+            orjson is not None
+            and api_settings.COMPACT_JSON and api_settings.UNICODE_JSON
+            and self.get_indent(accepted_media_type, renderer_context) is None
+        )
+        if not fast:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+def iter_json_array(rows, chunk_rows=STREAM_CHUNK_ROWS):
+    """Yield a JSON array of the rows in byte chunks of chunk_rows rows"""
+    rows = iter(rows)
+    separator = b'['
+    while True:
+        chunk = list(islice(rows, chunk_rows))
+        if not chunk:
+            break
+        yield separator + b','.join(dumps(row) for row in chunk)
+        separator = b','
+    yield b']' if separator == b',' else b'[]'
+
+
+def streaming_json_response(rows, envelope=None, key=None, chunk_rows=STREAM_CHUNK_ROWS, status=200):
+    """
+    StreamingHttpResponse of the rows as a JSON array
+    With an envelope the body is {**envelope, key: [rows...]} (key must not be in envelope)
+    The rows iterable is consumed lazily, chunk_rows at a time
+    The first chunk is read here, so errors running the query are raised to the
+    caller, which can still answer with an error status. Later errors can't change
+    the status that was sent: they are logged and the body stops unterminated, so
+    clients get invalid JSON instead of a complete-looking short list
+    """
+    rows = iter(rows)
+    first = list(islice(rows, chunk_rows))
+
+    def body():
+        try:
+            if envelope is not None:
+                head = dumps(dict(envelope))[:-1]  # drop the closing brace
+                yield head + (b',' if envelope else b'') + dumps(key) + b':'
+            yield from iter_json_array(chain(first, rows), chunk_rows)
+            if envelope is not None:
+                yield b'}'
+        except Exception:
+            logger.exception('Streamed JSON response failed - body truncated')
+
+    return StreamingHttpResponse(body(), content_type='application/json', status=status)
@@ -0,0 +1,54 @@
+"""
+Trigram search index for medicines
+Every searchable column is split into lowercase 3-character substrings stored as
+ItemSearchTerm rows (trigram, item, weight). A search term matches a value only if the
+value holds all of the term's trigrams, so candidates come from an indexed
+lookup on the trigram column instead of LIKE '%term%' over the whole table.
+Kept free of model imports so models and migrations can use it.
+"""
+
+# Searchable columns and their ranking weight (a name match outranks a supplier match)
+SEARCH_WEIGHTS = {
+    'name': 5,
+    'batch_number': 4,
+    'manufacturer': 2,
+    'category': 1,
+    'supplier': 1,
+}
+SEARCH_FIELDS = tuple(SEARCH_WEIGHTS)
+
+# Shorter terms have no trigrams and fall back to a plain icontains scan
+TRIGRAM_LENGTH = 3
+
+# Trigrams held by this many items or more are too common to narrow a search
+# (counting stops here, so a common trigram costs no more to check than a rare one)
+MAX_POSTINGS = 1000
+
+# Rarest trigrams of a term whose postings are intersected
+RAREST_TRIGRAMS = 2
+
+
+def normalize(text):
+    """Lowercase with runs of whitespace collapsed, as indexed"""
+    return ' '.join(str(text).lower().split())
+
+
+def trigrams(text):
+    """Set of the 3-character substrings of the normalized text"""
+    text = normalize(text)
+    return {text[i:i + TRIGRAM_LENGTH] for i in range(len(text) - TRIGRAM_LENGTH + 1)}
+
+
+def index_terms(values):
+    """
+    {trigram: weight} for one item's searchable values
+    A trigram found in several fields gets the sum of their weights
+    values maps field name -> value; fields not in SEARCH_WEIGHTS are ignored
+    """
+    terms = {}
+    for field, weight in SEARCH_WEIGHTS.items():
+        value = values.get(field)
+        if value:
+            for gram in trigrams(value):
+                terms[gram] = terms.get(gram, 0) + weight
+    return terms
@@ -4,20 +4,67 @@ from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
-from .models import Item, UserProfile
+from .models import UNKNOWN_BATCH_NUMBERS, Item, UserProfile
 from django.utils import timezone
 
-class ItemSerializer(serializers.ModelSerializer):
+def _field_names(value):
+    """Field names from a comma-separated query parameter"""
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def requested_field_names(request, names):
+    """The names a GET request's ?fields= / ?exclude= keep, in serializer order"""
+    if request is None or request.method != 'GET':
+        return list(names)
+    fields = _field_names(request.query_params.get('fields'))
+    exclude = set(_field_names(request.query_params.get('exclude')))
+    return [name for name in names if (not fields or name in fields) and name not in exclude]
+
+
+class DynamicFieldsMixin:
+    """
+    Lets GET requests choose the output fields: ?fields=a,b keeps only those,
+    ?exclude=a,b drops those. Unrequested fields are removed before serialization,
+    so their SerializerMethodFields never run.
+    column_sources maps computed fields to the model columns they read.
+    """
+    column_sources = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        keep = set(requested_field_names(self.context.get('request'), self.fields))
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+    @classmethod
+    def columns_for(cls, request):
+        """
+        Model columns the fields requested by ?fields= / ?exclude= read, for queryset.only()
+        None when every field is wanted (or a field's columns aren't known)
+        """
+        params = request.query_params
+        if request.method != 'GET' or not (params.get('fields') or params.get('exclude')):
+            return None
+        model = cls.Meta.model
+        concrete = {field.attname for field in model._meta.concrete_fields}
+        columns = {model._meta.pk.attname}
+        for name, field in cls(context={'request': request}).fields.items():
+            if name in cls.column_sources:
+                columns.update(cls.column_sources[name])
+            elif field.source in concrete:
+                columns.add(field.source)
+            else:
+                return None
+        return columns
+
+
+class ItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     days_until_expiry = serializers.SerializerMethodField()
     expiry_status = serializers.SerializerMethodField()
     is_expired = serializers.SerializerMethodField()
     days_since_manufacture = serializers.SerializerMethodField()
-    quality_score = serializers.SerializerMethodField()
-    quality_grade = serializers.SerializerMethodField()
-    quality_status = serializers.SerializerMethodField()
     has_alerts = serializers.SerializerMethodField()
-    alert_count = serializers.SerializerMethodField()
-    critical_alert_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Item
@@ -32,6 +79,19 @@ class ItemSerializer(serializers.ModelSerializer):
             'alerts', 'has_alerts', 'alert_count', 'critical_alert_count',
             'created_at', 'updated_at'
         ]
+        # Stored columns recomputed by Item.save()
+        read_only_fields = [
+            'quality_score', 'quality_grade', 'quality_status',
+            'alert_count', 'critical_alert_count'
+        ]
+
+    column_sources = {
+        'days_until_expiry': ('expiry_date',),
+        'expiry_status': ('expiry_date',),
+        'is_expired': ('expiry_date',),
+        'days_since_manufacture': ('manufacture_date',),
+        'has_alerts': ('alert_count',),
+    }
 
     def get_days_until_expiry(self, obj):
         """Get days until expiry"""
@@ -50,31 +110,25 @@ class ItemSerializer(serializers.ModelSerializer):
         today = timezone.now().date()
         return (today - obj.manufacture_date).days
     
-    def get_quality_score(self, obj):
-        """Get quality score"""
-        return obj.quality_score
-    
-    def get_quality_grade(self, obj):
-        """Get quality grade (A, B, C, D, F)"""
-        return obj.quality_grade
-    
-    def get_quality_status(self, obj):
-        """Get quality status description"""
-        return obj.quality_status
-    
     def get_has_alerts(self, obj):
         """Check if item has alerts"""
         return obj.has_alerts
-    
-    def get_alert_count(self, obj):
-        """Get total alert count"""
-        return obj.alert_count
-    
-    def get_critical_alert_count(self, obj):
-        """Get critical alert count"""
-        return obj.critical_alert_count
 
-class ItemSummarySerializer(serializers.ModelSerializer):
+    def validate(self, attrs):
+        """Reject a (batch_number, name) natural key another item holds (unknown batch numbers may repeat)"""
+        name = attrs.get('name', getattr(self.instance, 'name', None))
+        batch_number = attrs.get('batch_number', getattr(self.instance, 'batch_number', 'Unknown'))
+        if batch_number not in UNKNOWN_BATCH_NUMBERS:
+            duplicates = Item.objects.filter(batch_number=batch_number, name=name)
+            if self.instance is not None:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError(
+                    "An item with this batch number and name already exists."
+                )
+        return attrs
+
+class ItemSummarySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Simplified serializer for list views"""
     days_until_expiry = serializers.SerializerMethodField()
     expiry_status = serializers.SerializerMethodField()
@@ -86,6 +140,11 @@ class ItemSummarySerializer(serializers.ModelSerializer):
             'manufacturer', 'category', 'days_until_expiry', 'expiry_status'
         ]
 
+    column_sources = {
+        'days_until_expiry': ('expiry_date',),
+        'expiry_status': ('expiry_date',),
+    }
+
     def get_days_until_expiry(self, obj):
         return obj.days_until_expiry
 
@@ -1,3 +1,1844 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import math
+import os
+import random
+import tempfile
+import threading
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.db import DatabaseError, connection
+from django.db.models import Q, QuerySet
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .dates import DateColumnParser, parse_dmy_date
+from .expiry import MAX_CONSECUTIVE_FAILURES, expire_due_items, run_expiry_loop
+from .ingest import (
+    UPLOAD_COLUMNS, MEDICINES_CSV_COLUMNS, ingest_rows, iter_lines, read_csv_upload,
+    parse_medicines_row, clean_values, split_csv_ranges, parse_csv_range, date_parsers,
+    detect_date_orders,
+)
+from .jobs import run_upload_job
+from .models import Item, ItemAlert, ItemQuerySet, ItemSearchTerm, BulkUploadJob
+from .quality import (
+    QUALITY_INPUT_FIELDS,
+    score_quality, grade_for_score, status_for_score,
+    score_quality_batch, score_quality_rows, as_lists,
+)
+from .search import SEARCH_FIELDS, index_terms
+from .pagination import iter_keyset
+from .renderers import FastJSONRenderer, dumps, streaming_json_response
+from .rows import compiled_serializer
+from .serializers import ItemSerializer, ItemSummarySerializer
+
+
+# ============================================
+# QUALITY SCORING
+# ============================================
+
+# Ideal readings - each field is swept while the others stay here
+IDEAL_READINGS = (22.0, 50.0, 7.0, 0.0005, 99.5)
+
+# Band edges of every sensor column in score_quality
+BAND_EDGES = (
+    (15, 20, 25, 30),            # temperature
+    (30, 40, 60, 70),            # humidity
+    (6.0, 6.5, 7.5, 8.0),        # pH level
+    (0.001, 0.01, 0.1),          # contaminant level
+    (90, 95, 99),                # active ingredient purity
+)
+
+
+def _around(edge):
+    """Values at, just below and just above a band edge"""
+    edge = float(edge)
+    return [
+        math.nextafter(edge, -math.inf), edge, math.nextafter(edge, math.inf),
+        edge - 0.001, edge + 0.001, edge - 0.5, edge + 0.5,
+    ]
+
+
+class VectorizedQualityScoreTests(SimpleTestCase):
+    """The batch scorer must agree with Item.calculate_quality_score on every row"""
+
+    def assertParity(self, rows):
+        scores, grades, statuses = as_lists(*score_quality_rows(rows))
+        self.assertEqual(len(scores), len(rows))
+        for row, score, grade, quality_status in zip(rows, scores, grades, statuses):
+            expected = score_quality(*row)
+            self.assertEqual(score, expected, f'score mismatch for {row}')
+            self.assertEqual(grade, grade_for_score(expected), f'grade mismatch for {row}')
+            self.assertEqual(quality_status, status_for_score(expected), f'status mismatch for {row}')
+
+    def test_sensor_band_edges(self):
+        rows = []
+        for column, edges in enumerate(BAND_EDGES):
+            for edge in edges:
+                for value in _around(edge):
+                    row = list(IDEAL_READINGS)
+                    row[column] = value
+                    rows.append(tuple(row))
+        self.assertParity(rows)
+
+    def test_grade_band_edges(self):
+        # Sweep purity below 90% so the total crosses every grade boundary,
+        # including raw scores that land on a half-cent before rounding
+        rows = [(22.0, 50.0, 7.0, 0.0, step / 2000) for step in range(0, 200001)]
+        self.assertParity(rows)
+
+    def test_out_of_range_and_nan_readings(self):
+        rows = [
+            (-40.0, 0.0, 0.0, 5.0, 0.0),
+            (100.0, 100.0, 14.0, 100.0, -5.0),
+            (float('nan'), 50.0, 7.0, 0.0, 99.0),
+            (22.0, 50.0, 7.0, 0.0, float('nan')),
+        ]
+        self.assertParity(rows)
+
+    def test_random_readings(self):
+        rng = random.Random(42)
+        rows = [
+            (
+                round(rng.uniform(5, 40), 2),
+                round(rng.uniform(20, 90), 1),
+                round(rng.uniform(5, 9), 2),
+                round(rng.uniform(0, 0.2), 4),
+                round(rng.uniform(70, 100), 2),
+            )
+            for _ in range(20000)
+        ]
+        self.assertParity(rows)
+
+    def test_empty_input(self):
+        self.assertEqual(as_lists(*score_quality_rows([])), ([], [], []))
+
+    def test_columns_interface(self):
+        scores, grades, statuses = as_lists(*score_quality_batch([22, 40], [50, 90], [7, 7], [0, 0.5], [99, 85]))
+        self.assertEqual(scores, [score_quality(22, 50, 7, 0, 99), score_quality(40, 90, 7, 0.5, 85)])
+        self.assertEqual(grades, ['A', 'F'])
+        self.assertEqual(statuses, ['Excellent', 'Failed'])
+
+
+# ============================================
+# DASHBOARD QUERY COUNTS
+# ============================================
+
+def _create_items(count, **fields):
+    """Create `count` items in one bulk insert, cycling through the given per-field choices"""
+    start = Item.objects.count()  # keep (batch_number, name) unique across calls
+    Item.objects.bulk_create([
+        Item(
+            name=f'Medicine {start + i}',
+            batch_number=f'BATCH-{start + i:05d}',
+            **{field: choices[i % len(choices)] for field, choices in fields.items()}
+        )
+        for i in range(count)
+    ])
+
+
+def _response_json(response):
+    """Parsed body of a regular or streamed response"""
+    if response.streaming:
+        return json.loads(b''.join(response.streaming_content))
+    return response.json()
+
+
+class QueryCountBenchmarkMixin:
+    """Asserts an endpoint's query count does not grow with the data"""
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(queries)
+
+
+class AcceptanceStatsQueryTests(QueryCountBenchmarkMixin, TestCase):
+
+    def test_query_count_is_constant_in_number_of_suppliers(self):
+        url = reverse('acceptance_stats')
+        _create_items(
+            30,
+            supplier=[f'Supplier {i}' for i in range(3)],
+            accepted_or_rejected=['Accepted', 'Rejected', 'accepted'],
+        )
+        few_suppliers = self.count_queries(url)
+
+        _create_items(
+            600,
+            supplier=[f'Supplier {i}' for i in range(300)],
+            accepted_or_rejected=['Rejected', 'Accepted'],
+        )
+        many_suppliers = self.count_queries(url)
+
+        self.assertEqual(few_suppliers, many_suppliers)
+        self.assertLessEqual(many_suppliers, 3)
+
+    def test_supplier_breakdown(self):
+        _create_items(
+            4,
+            supplier=['Acme', 'Acme', 'Zenith', 'Acme'],
+            accepted_or_rejected=['Accepted', 'Rejected', 'Accepted', 'accepted'],
+        )
+        data = self.client.get(reverse('acceptance_stats')).json()
+
+        self.assertEqual(data['overview']['total_batches'], 4)
+        self.assertEqual(data['overview']['accepted_batches'], 3)
+        self.assertEqual(data['overview']['rejected_batches'], 1)
+        by_supplier = {row['supplier']: row for row in data['supplier_stats']}
+        self.assertEqual(by_supplier['Acme']['total_batches'], 3)
+        self.assertEqual(by_supplier['Acme']['accepted'], 2)
+        self.assertEqual(by_supplier['Acme']['rejected'], 1)
+        self.assertEqual(by_supplier['Zenith']['acceptance_rate'], 100.0)
+        self.assertEqual(sum(r['count'] for r in data['rejection_reasons']), 1)
+
+
+class InspectorStatsQueryTests(QueryCountBenchmarkMixin, TestCase):
+
+    def test_query_count_is_constant_in_number_of_inspectors(self):
+        url = reverse('inspector_stats')
+        _create_items(10, inspected_by=['Dr. A', 'Dr. B'])
+        few_inspectors = self.count_queries(url)
+
+        _create_items(200, inspected_by=[f'Dr. {i}' for i in range(40)])
+        many_inspectors = self.count_queries(url)
+
+        self.assertEqual(few_inspectors, many_inspectors)
+
+    def test_exact_averages_and_grades(self):
+        _create_items(
+            3,
+            inspected_by=['Dr. A'],
+            temperature=[22.0, 22.0, 40.0],
+            humidity=[50.0],
+            ph_level=[7.0],
+            contaminant_level=[0.0],
+            active_ingredient_purity=[99.5],
+        )
+        data = self.client.get(reverse('inspector_stats')).json()
+        inspector = data['inspectors'][0]
+        scores = list(Item.objects.values_list('quality_score', flat=True))
+
+        self.assertEqual(inspector['total_inspections'], 3)
+        self.assertEqual(inspector['average_quality_score'], round(sum(scores) / 3, 2))
+        self.assertEqual(inspector['current_month']['inspections'], 3)
+        self.assertEqual(inspector['grade_distribution']['A'], 2)
+        self.assertEqual(inspector['grade_distribution']['B'], 1)
+
+
+class SupplierStatsQueryTests(QueryCountBenchmarkMixin, TestCase):
+
+    def test_query_count_is_constant_in_number_of_suppliers(self):
+        url = reverse('supplier_stats')
+        _create_items(10, supplier=['Acme', 'Zenith'])
+        few_suppliers = self.count_queries(url)
+
+        _create_items(200, supplier=[f'Supplier {i}' for i in range(40)])
+        many_suppliers = self.count_queries(url)
+
+        self.assertEqual(few_suppliers, many_suppliers)
+
+    def test_critical_alert_batches_are_counted_over_all_rows(self):
+        _create_items(
+            150,
+            supplier=['Acme'],
+            temperature=[22.0, 22.0, 37.0],  # every third batch is critical
+            humidity=[50.0],
+            ph_level=[7.0],
+            contaminant_level=[0.0],
+            active_ingredient_purity=[99.5],
+        )
+        for item in Item.objects.all():
+            item.save()
+        supplier = self.client.get(reverse('supplier_stats')).json()['suppliers'][0]
+        with_critical = sum(1 for item in Item.objects.all() if item.critical_alert_count > 0)
+
+        self.assertEqual(with_critical, 50)
+        self.assertEqual(supplier['critical_alert_batches'], with_critical)
+        self.assertEqual(supplier['environmental_compliance'], round(100 / 150 * 100, 2))
+
+
+class DashboardStatsQueryTests(QueryCountBenchmarkMixin, TestCase):
+
+    def setUp(self):
+        today = timezone.now().date()
+        _create_items(
+            8,
+            expiry_date=[today - timedelta(days=3), today, today + timedelta(days=7),
+                         today + timedelta(days=8), today + timedelta(days=30), today + timedelta(days=31)],
+            status=['active', 'expired', 'quarantine', 'active'],
+        )
+
+    def test_expiry_stats_is_one_query(self):
+        url = reverse('item-expiry-stats')
+        self.assertEqual(self.count_queries(url), 1)
+
+        data = self.client.get(url).json()
+        self.assertEqual(data, {'total_medicines': 8, 'expired': 2, 'urgent': 3, 'warning': 2, 'safe': 1})
+
+    def test_status_statistics_is_one_query(self):
+        url = reverse('status_statistics')
+        self.assertEqual(self.count_queries(url), 1)
+
+        data = self.client.get(url).json()
+        self.assertEqual(data['total_items'], 8)
+        self.assertEqual(data['active'], {'count': 4, 'percentage': 50.0})
+        self.assertEqual(data['expired'], {'count': 2, 'percentage': 25.0})
+        self.assertEqual(data['quarantine'], {'count': 2, 'percentage': 25.0})
+
+    def test_quality_statistics_reads_the_stored_columns(self):
+        url = reverse('quality_statistics')
+        # Stored values differ from what the readings would score - the stored ones are reported
+        stale = list(Item.objects.order_by('id').values_list('pk', flat=True)[:3])
+        Item.objects.filter(pk__in=stale).update(quality_score=72.5, quality_grade='C')
+        self.assertEqual(self.count_queries(url), 1)
+
+        data = self.client.get(url).json()
+        scores = list(Item.objects.values_list('quality_score', flat=True))
+        self.assertEqual(data['total_medicines'], 8)
+        self.assertEqual(data['average_score'], round(sum(scores) / 8, 2))
+        self.assertEqual(data['lowest_score'], min(scores))
+        self.assertEqual(data['grade_distribution']['C'], 3)
+        self.assertEqual(data['fair_count'], 3)
+        self.assertEqual(sum(data['grade_distribution'].values()), 8)
+
+
+class ExpiryReportTests(QueryCountBenchmarkMixin, TestCase):
+
+    def setUp(self):
+        today = timezone.now().date()
+        # Repeated expiry dates, so pages split inside runs of equal dates
+        _create_items(25, expiry_date=[today + timedelta(days=d) for d in (-2, 0, 5, 20, 40)])
+        self.url = reverse('item-expiry-report')
+
+    def fetch_all(self, url):
+        rows = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            rows += response.json()['results']
+            url = response.json()['next']
+        return rows
+
+    def test_pages_cover_every_row_in_expiry_order(self):
+        rows = self.fetch_all(self.url + '?page_size=4')
+        expected = list(Item.objects.order_by('expiry_date', 'id').values_list('id', flat=True))
+
+        self.assertEqual([row['id'] for row in rows], expected)
+        by_days = {row['days_left']: (row['status'], row['is_expired']) for row in rows}
+        self.assertEqual(by_days, {
+            -2: ('expired', 1), 0: ('urgent', 0), 5: ('urgent', 0), 20: ('warning', 0), 40: ('safe', 0),
+        })
+
+    def test_bucket_filter(self):
+        rows = self.fetch_all(self.url + '?status=urgent&page_size=3')
+        self.assertEqual(len(rows), 10)
+        self.assertEqual({row['status'] for row in rows}, {'urgent'})
+
+        response = self.client.get(self.url + '?status=soon')
+        self.assertEqual(response.status_code, 400)
+
+    def test_deep_pages_cost_one_query(self):
+        first = self.count_queries(self.url + '?page_size=5')
+        cursor = self.client.get(self.url + '?page_size=20').json()['next']
+        self.assertEqual(self.count_queries(cursor.replace('page_size=20', 'page_size=5')), first)
+        self.assertEqual(first, 1)
+
+    def test_invalid_cursor(self):
+        for cursor in ('garbage', 'WyJ4Il0', 'WyJ4IiwiMSJd'):
+            response = self.client.get(self.url + f'?cursor={cursor}')
+            self.assertEqual(response.status_code, 400)
+
+    def test_csv_export_streams_every_row(self):
+        from .views import EXPIRY_REPORT_FIELDS
+        with mock.patch('api.views.EXPIRY_EXPORT_BATCH_SIZE', 7):
+            response = self.client.get(self.url + '?export=csv&status=expired')
+            self.assertTrue(response.streaming)
+            rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+        self.assertEqual(rows[0], list(EXPIRY_REPORT_FIELDS) + ['days_left', 'status', 'is_expired'])
+        self.assertEqual(len(rows), 6)
+        self.assertEqual({row[-2] for row in rows[1:]}, {'expired'})
+
+
+class ItemListPaginationTests(QueryCountBenchmarkMixin, TestCase):
+
+    def setUp(self):
+        today = timezone.now().date()
+        _create_items(
+            30,
+            expiry_date=[today + timedelta(days=d) for d in (3, 1, 3, 2)],
+            status=['active', 'quarantine'],
+        )
+        self.url = reverse('item-list')
+
+    def test_cursor_pages_are_stable_and_ordered(self):
+        response = self.client.get(self.url + '?page_size=7')
+        data = response.json()
+        self.assertEqual(data['count'], 30)
+        self.assertEqual(len(data['results']), 7)
+
+        ids = [row['id'] for row in data['results']]
+        url = data['next']
+        # Rows inserted before the cursor don't shift the following pages
+        _create_items(5, expiry_date=[timezone.now().date() - timedelta(days=1)])
+        while url:
+            data = self.client.get(url).json()
+            ids += [row['id'] for row in data['results']]
+            url = data['next']
+
+        expected = Item.objects.filter(expiry_date__gte=timezone.now().date()).order_by('expiry_date', 'id')
+        self.assertEqual(ids, list(expected.values_list('id', flat=True)))
+
+    def test_filters_apply_before_paging(self):
+        data = self.client.get(self.url + '?status=quarantine&search=Medicine&page_size=100').json()
+        self.assertEqual(data['count'], 15)
+        self.assertIsNone(data['next'])
+        self.assertEqual({row['status'] for row in data['results']}, {'quarantine'})
+
+    def test_count_false_skips_count_and_deep_pages_cost_the_same(self):
+        first = self.count_queries(self.url + '?page_size=5&count=false')
+        self.assertEqual(first, 1)
+        self.assertNotIn('count', self.client.get(self.url + '?count=false').json())
+
+        cursor = self.client.get(self.url + '?page_size=25&count=false').json()['next']
+        deep = self.count_queries(cursor.replace('page_size=25', 'page_size=5'))
+        self.assertEqual(deep, first)
+        self.assertEqual(self.count_queries(self.url + '?page_size=5'), 2)
+
+    def test_page_size_is_clamped_and_validated(self):
+        self.assertEqual(self.client.get(self.url).json()['page_size'], 100)
+        self.assertEqual(self.client.get(self.url + '?page_size=5000').json()['page_size'], 1000)
+        self.assertEqual(self.client.get(self.url + '?page_size=ten').status_code, 400)
+        self.assertEqual(self.client.get(self.url + '?cursor=abc').status_code, 400)
+
+
+class ItemFieldSelectionTests(TestCase):
+
+    def setUp(self):
+        _create_items(12, temperature=[22.0, 37.0], humidity=[50.0])
+        self.url = reverse('item-list')
+
+    def get_rows(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['results'], queries[-1]['sql']
+
+    def test_fields_keeps_only_requested_fields_and_columns(self):
+        rows, sql = self.get_rows(self.url, {'fields': 'name,batch_number,days_until_expiry', 'count': 'false'})
+
+        self.assertEqual(set(rows[0]), {'name', 'batch_number', 'days_until_expiry'})
+        self.assertIn('"api_item"."expiry_date"', sql)
+        for column in ('alerts', 'humidity', 'supplier', 'manufacture_date'):
+            self.assertNotIn(f'"api_item"."{column}"', sql)
+
+    def test_exclude_drops_fields(self):
+        rows, sql = self.get_rows(self.url, {'exclude': 'alerts,has_alerts,temperature'})
+        full, _ = self.get_rows(self.url, {})
+
+        self.assertEqual(set(rows[0]), set(full[0]) - {'alerts', 'has_alerts', 'temperature'})
+        self.assertNotIn('"api_item"."alerts"', sql)
+        self.assertEqual(rows, [{k: v for k, v in row.items() if k in rows[0]} for row in full])
+
+    def test_unrequested_method_fields_are_not_evaluated(self):
+        items = list(Item.objects.all())
+
+        def serialize(query):
+            request = Request(APIRequestFactory().get('/', {'fields': query}))
+            return ItemSerializer(items, many=True, context={'request': request}).data
+
+        with mock.patch.object(ItemSerializer, 'get_has_alerts', return_value=True) as has_alerts, \
+                mock.patch.object(ItemSerializer, 'get_days_since_manufacture', return_value=0) as since:
+            self.assertEqual(len(serialize('id,name')), 12)
+            has_alerts.assert_not_called()
+            since.assert_not_called()
+
+            serialize('id,has_alerts')
+            self.assertEqual(has_alerts.call_count, 12)
+
+    def test_payload_shrinks_with_the_field_list(self):
+        full = len(self.client.get(self.url).content)
+        narrow = len(self.client.get(self.url, {'fields': 'id,name,expiry_date'}).content)
+        self.assertLess(narrow * 5, full)
+
+    def test_detail_and_summary_endpoints(self):
+        item = Item.objects.first()
+        data = self.client.get(reverse('item-detail', args=[item.pk]), {'fields': 'id,quality_grade'}).json()
+        self.assertEqual(data, {'id': item.pk, 'quality_grade': item.quality_grade})
+
+        rows = _response_json(self.client.get(reverse('item-by-status'), {'fields': 'name,expiry_status'}))
+        self.assertEqual(len(rows), 12)
+        self.assertEqual(set(rows[0]), {'name', 'expiry_status'})
+
+    def test_writes_ignore_field_selection(self):
+        client = APIClient()
+        response = client.post(self.url + '?fields=id', {
+            'name': 'Cefalexin', 'batch_number': 'CEF-1',
+            'manufacture_date': '2025-01-01', 'expiry_date': '2027-01-01',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertIn('quality_score', response.json())
+
+
+# ============================================
+# ITEM SAVE
+# ============================================
+
+class ItemSaveTests(TestCase):
+
+    def setUp(self):
+        self.item = Item.objects.create(
+            name='Amoxicillin', batch_number='AMX-001',
+            temperature=37.0, humidity=50.0, ph_level=7.0,
+            contaminant_level=0.0, active_ingredient_purity=99.5,
+            manufacture_date=date(2025, 1, 1), expiry_date=date(2100, 1, 1),
+        )
+
+    def test_save_is_a_single_update(self):
+        item = Item.objects.get(pk=self.item.pk)
+        item.quantity = 10
+        with CaptureQueriesContext(connection) as queries:
+            item.save()
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0]['sql'].startswith('UPDATE'))
+
+    def test_unchanged_alerts_keep_their_timestamp(self):
+        original = Item.objects.get(pk=self.item.pk).alerts
+        item = Item.objects.get(pk=self.item.pk)
+        item.quantity = 10
+        item.save()
+        self.assertEqual(Item.objects.get(pk=self.item.pk).alerts, original)
+
+    def test_changed_readings_regenerate_alerts_and_rows(self):
+        item = Item.objects.get(pk=self.item.pk)
+        item.temperature = 22.0
+        item.humidity = 85.0
+        item.save()
+        stored = Item.objects.get(pk=self.item.pk)
+        self.assertEqual([alert['type'] for alert in stored.alerts], ['humidity'])
+        self.assertEqual(stored.critical_alert_count, 1)
+        self.assertEqual(list(stored.alert_rows.values_list('type', flat=True)), ['humidity'])
+
+
+# ============================================
+# ENVIRONMENTAL ALERTS
+# ============================================
+
+# Readings with known alerts: (temperature, humidity, ph_level, contaminant_level, purity)
+ALERT_READINGS = [
+    (22.0, 50.0, 7.0, 0.0, 99.5),    # none
+    (37.0, 50.0, 7.0, 0.0, 99.5),    # temperature critical
+    (32.0, 75.0, 7.0, 0.0, 99.5),    # temperature warning, humidity warning
+    (22.0, 85.0, 5.5, 0.0, 99.5),    # humidity critical, ph_level warning
+    (37.0, 85.0, 7.0, 12.0, 75.0),   # temperature, humidity, contamination, purity - all critical
+    (22.0, 50.0, 7.0, 0.5, 85.0),    # contamination warning, purity warning
+]
+
+
+class AlertEndpointTests(TestCase):
+
+    def setUp(self):
+        for i in range(12):
+            Item.objects.create(
+                name=f'Alert {i}', batch_number=f'ALT-{i:03d}',
+                manufacture_date=date(2025, 1, 1), expiry_date=date(2100, 1, 1),
+                **dict(zip(QUALITY_INPUT_FIELDS, ALERT_READINGS[i % len(ALERT_READINGS)])),
+            )
+
+    def expected_items(self, severity=None, alert_type=None):
+        """(id, critical, warning) per item with matching alerts, in alerts_list order"""
+        expected = []
+        for item in Item.objects.all():
+            alerts = [
+                a for a in item.generate_alerts()
+                if (not severity or a['severity'] == severity) and (not alert_type or a['type'] == alert_type)
+            ]
+            if alerts:
+                critical = sum(1 for a in alerts if a['severity'] == 'critical')
+                expected.append((item.id, critical, len(alerts) - critical))
+        return sorted(expected, key=lambda row: (-row[1], -(row[1] + row[2]), row[0]))
+
+    def test_alerts_count_breakdown(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(reverse('alerts_count')).json()
+        self.assertEqual(len(queries), 2)
+
+        alerts = [a for item in Item.objects.all() for a in item.generate_alerts()]
+        self.assertEqual(data['total_items'], 12)
+        self.assertEqual(data['items_with_alerts'], 10)
+        self.assertEqual(data['total_alerts'], len(alerts))
+        self.assertEqual(data['critical_alerts'], sum(1 for a in alerts if a['severity'] == 'critical'))
+        self.assertEqual(data['warning_alerts'], sum(1 for a in alerts if a['severity'] == 'warning'))
+        self.assertEqual(data['alert_types'], {
+            alert_type: sum(1 for a in alerts if a['type'] == alert_type)
+            for alert_type in ('temperature', 'humidity', 'contamination', 'purity', 'ph_level')
+        })
+
+    def test_alerts_list_with_and_without_filters(self):
+        for severity, alert_type in ((None, None), ('critical', None), ('warning', None),
+                                     (None, 'humidity'), ('critical', 'temperature'), ('warning', 'ph_level')):
+            params = {'page_size': 200}
+            if severity:
+                params['severity'] = severity
+            if alert_type:
+                params['type'] = alert_type
+            data = self.client.get(reverse('alerts_list'), params).json()
+
+            expected = self.expected_items(severity, alert_type)
+            self.assertEqual(data['total'], len(expected), params)
+            self.assertEqual(
+                [(row['id'], row['critical_count'], row['warning_count']) for row in data['items']],
+                expected, params,
+            )
+            for row in data['items']:
+                self.assertEqual(row['alert_count'], len(row['alerts']))
+                self.assertTrue(all(
+                    (not severity or a['severity'] == severity) and (not alert_type or a['type'] == alert_type)
+                    for a in row['alerts']
+                ))
+
+    def test_alerts_list_pages(self):
+        expected = [row[0] for row in self.expected_items('critical')]
+        pages = [
+            self.client.get(reverse('alerts_list'), {'severity': 'critical', 'page': page, 'page_size': 2}).json()
+            for page in (1, 2, 3)
+        ]
+        self.assertEqual(pages[0]['total_pages'], 3)
+        self.assertEqual([row['id'] for page in pages for row in page['items']], expected)
+
+    def test_invalid_pages_are_rejected(self):
+        for params in ({'page': 0}, {'page': -1}, {'page_size': 0}, {'page': 'last'}, {'page_size': 'all'}):
+            response = self.client.get(reverse('alerts_list'), params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('page', response.json()['error'])
+
+    def test_alert_rows_follow_changed_readings(self):
+        item = Item.objects.get(name='Alert 1')
+        self.assertEqual(list(item.alert_rows.values_list('type', 'severity')), [('temperature', 'critical')])
+
+        item.temperature = 32.0
+        item.contaminant_level = 12.0
+        item.save()
+        self.assertEqual(
+            sorted(item.alert_rows.values_list('type', 'severity')),
+            [('contamination', 'critical'), ('temperature', 'warning')],
+        )
+
+        item.temperature = 22.0
+        item.contaminant_level = 0.0
+        item.save()
+        self.assertFalse(item.alert_rows.exists())
+        self.assertEqual(
+            ItemAlert.objects.count(),
+            sum(len(i.generate_alerts()) for i in Item.objects.all()),
+        )
+
+
+class StoredAlertCountTests(TestCase):
+    """alert_count / critical_alert_count follow the alerts on every write path"""
+
+    def assertCountsInSync(self):
+        for item in Item.objects.all():
+            alerts = item.generate_alerts()
+            self.assertEqual(
+                (item.alert_count, item.critical_alert_count),
+                (len(alerts), sum(1 for a in alerts if a['severity'] == 'critical')),
+                item.name,
+            )
+            self.assertEqual(item.alert_rows.count(), item.alert_count, item.name)
+
+    def create_items(self):
+        """Items with known alerts (prepared as the ingest does) and their ItemAlert rows"""
+        Item.objects.bulk_create(Item.objects.prepare([
+            Item(name=f'Count {i}', batch_number=f'CNT-{i:03d}',
+                 manufacture_date=date(2025, 1, 1), expiry_date=date(2100, 1, 1),
+                 **dict(zip(QUALITY_INPUT_FIELDS, ALERT_READINGS[i % len(ALERT_READINGS)])))
+            for i in range(12)
+        ]))
+        ItemAlert.objects.rebuild(Item.objects.all())
+
+    def test_save(self):
+        self.create_items()
+        item = Item.objects.get(name='Count 0')
+        item.temperature = 37.0
+        item.humidity = 85.0
+        item.save()
+        self.assertEqual((item.alert_count, item.critical_alert_count), (2, 2))
+        self.assertCountsInSync()
+
+    def test_bulk_create_counts_the_alerts_it_is_given(self):
+        alerts = [{'type': 'humidity', 'severity': 'critical'}, {'type': 'ph_level', 'severity': 'warning'}]
+        Item.objects.bulk_create([Item(name='Given', alerts=alerts, expiry_date=date(2100, 1, 1))])
+        item = Item.objects.get(name='Given')
+        self.assertEqual((item.alert_count, item.critical_alert_count), (2, 1))
+
+    def test_bulk_update_regenerates_alerts_for_changed_readings(self):
+        self.create_items()
+        items = list(Item.objects.all())
+        for item in items:
+            item.temperature = 37.0
+        Item.objects.bulk_update(items, ['temperature'])
+        for item in Item.objects.all():
+            self.assertIn('temperature', [alert['type'] for alert in item.alerts])
+        self.assertCountsInSync()
+
+    def test_bulk_update_recounts_written_alerts(self):
+        self.create_items()
+        items = list(Item.objects.all())
+        for item in items:
+            item.alerts = [{'type': 'purity', 'severity': 'critical'}]
+        Item.objects.bulk_update(items, ['alerts'])
+        self.assertEqual(
+            set(Item.objects.values_list('alert_count', 'critical_alert_count')), {(1, 1)}
+        )
+
+    def test_queryset_update_regenerates_alerts_and_status(self):
+        self.create_items()
+        Item.objects.filter(name__in=['Count 0', 'Count 6']).update(contaminant_level=12.0)
+
+        self.assertCountsInSync()
+        for item in Item.objects.filter(name__in=['Count 0', 'Count 6']):
+            self.assertEqual(item.critical_alert_count, 1)
+            self.assertEqual(item.status, 'quarantine')
+            self.assertEqual(item.status, item.update_status())
+
+    def test_backfill_migration(self):
+        from importlib import import_module
+        from django.apps import apps
+        migration = import_module('api.migrations.0010_item_alert_counts')
+
+        self.create_items()
+        QuerySet(Item).update(alert_count=0, critical_alert_count=0)
+        migration.backfill_alert_counts(apps, None)
+        self.assertCountsInSync()
+
+    def test_unfiltered_alerts_list_orders_by_the_stored_counts(self):
+        self.create_items()
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(reverse('alerts_list'), {'page_size': 200}).json()
+        self.assertNotIn('api_itemalert', ' '.join(q['sql'] for q in queries))
+
+        expected = Item.objects.filter(alert_count__gt=0).order_by(
+            '-critical_alert_count', '-alert_count', 'id'
+        )
+        self.assertEqual([row['id'] for row in data['items']], [item.id for item in expected])
+        self.assertEqual(
+            [(row['critical_count'], row['warning_count']) for row in data['items']],
+            [(i.critical_alert_count, i.alert_count - i.critical_alert_count) for i in expected],
+        )
+
+
+# ============================================
+# BULK INGEST
+# ============================================
+
+def _upload_row(i, **overrides):
+    """One CSV template row as csv.DictReader yields it"""
+    row = {
+        'Medicine Name': f'Medicine {i}',
+        'Batch Number': f'BATCH-{i:05d}',
+        'Manufacture Date': '2024-01-15',
+        'Expiry Date': '2100-01-15' if i % 4 else '2020-01-15',
+        'Quantity': str(i),
+        'Manufacturer': 'PharmaCorp Ltd',
+        'Category': 'Pain Relief',
+        'Price': '25.99',
+        'Supplier': 'MedSupply Inc',
+        'Temperature (°C)': str(20 + i % 20),
+        'Humidity (%)': str(45 + i % 40),
+        'pH Level': '7.0',
+        'Contaminant Level (ppm)': '0.001',
+        'Active Ingredient Purity (%)': str(85 + i % 15),
+        'Inspected By': 'Dr. John Smith',
+        'Status (Accepted/Rejected)': 'Accepted',
+    }
+    row.update(overrides)
+    return row
+
+
+class BulkIngestTests(TestCase):
+
+    def test_derived_columns_match_item_save(self):
+        stats, errors = ingest_rows([_upload_row(i) for i in range(60)], batch_size=25)
+        self.assertEqual((stats.created, stats.failed, errors), (60, 0, []))
+
+        for item in Item.objects.all():
+            stored = (item.quality_score, item.quality_grade, item.status,
+                      item.alert_count, item.critical_alert_count,
+                      [alert['type'] for alert in item.alerts])
+            item.save()
+            self.assertEqual(stored, (item.quality_score, item.quality_grade, item.status,
+                                      item.alert_count, item.critical_alert_count,
+                                      [alert['type'] for alert in item.alerts]))
+        self.assertEqual(
+            ItemAlert.objects.count(),
+            sum(Item.objects.values_list('alert_count', flat=True)),
+        )
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        rows = [
+            _upload_row(1),
+            _upload_row(2, **{'Quantity': 'many'}),
+            _upload_row(3, **{'Expiry Date': 'soon'}),
+            _upload_row(4, **{'Medicine Name': 'x' * 101}),
+            _upload_row(5),
+        ]
+        stats, errors = ingest_rows(rows)
+
+        self.assertEqual((stats.created, stats.failed), (2, 3))
+        self.assertEqual([error['row'] for error in errors], [3, 4, 5])
+        self.assertEqual(errors[0]['data'], rows[1])
+        self.assertTrue(all(set(error) == {'row', 'data', 'error'} for error in errors))
+
+    def test_missing_columns_use_template_defaults(self):
+        stats, errors = ingest_rows([{'Medicine Name': ' Aspirin ', 'Quantity': '5'}])
+        item = Item.objects.get()
+
+        self.assertEqual((stats.created, stats.failed, errors), (1, 0, []))
+        self.assertEqual(item.name, 'Aspirin')
+        self.assertEqual(item.supplier, UPLOAD_COLUMNS['Supplier'][1])
+        self.assertEqual(str(item.expiry_date), '2100-01-01')
+
+    def test_rows_are_scored_once(self):
+        scored = []
+        score = ItemQuerySet._score_objects
+        with mock.patch.object(ItemQuerySet, '_score_objects', side_effect=lambda objs: scored.extend(objs) or score(objs)):
+            stats, errors = ingest_rows([_upload_row(i) for i in range(40)], batch_size=15)
+        self.assertEqual(stats.created, 40)
+        self.assertEqual(len(scored), 40)
+        # Items that didn't go through prepare() are still scored by bulk_create
+        with mock.patch.object(ItemQuerySet, '_score_objects', side_effect=lambda objs: scored.extend(objs) or score(objs)):
+            _create_items(5, temperature=[37.0])
+        self.assertEqual(len(scored), 45)
+        for item in Item.objects.filter(temperature=37.0):
+            self.assertEqual(item.quality_score, item.calculate_quality_score())
+
+    def test_each_ingest_detects_its_own_date_layout(self):
+        # An ISO file doesn't leave its layout or cached dates behind for the next file
+        ingest_rows([_upload_row(i) for i in range(3)])
+        with mock.patch('api.ingest.DateColumnParser', wraps=DateColumnParser) as parsers:
+            ingest_rows([_upload_row(10 + i, **{'Manufacture Date': '01/15/2024'}) for i in range(3)])
+            ingest_rows([_upload_row(20 + i) for i in range(3)])
+        self.assertEqual(parsers.call_count, 2 * 2)  # two date columns per ingest
+        self.assertEqual(Item.objects.filter(manufacture_date=date(2024, 1, 15)).count(), 9)
+
+    def test_rows_are_inserted_in_bulk(self):
+        with CaptureQueriesContext(connection) as queries:
+            stats, errors = ingest_rows([_upload_row(i) for i in range(500)], batch_size=500)
+        self.assertEqual(stats.created, 500)
+        # A handful of multi-row INSERTs (the backend may split a batch), not one per row
+        self.assertLess(len(queries), 50)
+        # Search indexing is deferred to one pass after the import
+        self.assertFalse(any('api_itemsearchterm' in q['sql'] for q in queries))
+        self.assertEqual(Item.objects.filter(search_indexed=False).count(), 500)
+
+        with CaptureQueriesContext(connection) as queries:
+            indexed, written = ItemSearchTerm.objects.index_pending(batch_size=500)
+        self.assertEqual(indexed, 500)
+        self.assertEqual(written, ItemSearchTerm.objects.count())
+        # Index rows are written in batches, not one query per row
+        self.assertLess(len(queries), written / 100)
+        self.assertFalse(Item.objects.filter(search_indexed=False).exists())
+
+
+
+class UpsertIngestTests(TestCase):
+
+    def setUp(self):
+        self.rows = [_upload_row(i) for i in range(200)]
+        ingest_rows(self.rows)
+        self.ids = dict(Item.objects.values_list('batch_number', 'id'))
+
+    def test_reimport_writes_nothing(self):
+        with CaptureQueriesContext(connection) as queries:
+            stats, errors = ingest_rows(self.rows, batch_size=50)
+
+        self.assertEqual((stats.created, stats.updated, stats.unchanged), (0, 0, 200))
+        self.assertEqual(Item.objects.count(), 200)
+        writes = [q['sql'] for q in queries if not q['sql'].startswith(('SELECT', 'SAVEPOINT', 'RELEASE'))]
+        self.assertEqual(writes, [])
+
+    def test_only_changed_rows_are_written(self):
+        rows = [dict(row) for row in self.rows]
+        rows[3]['Quantity'] = '9999'
+        rows[7]['Temperature (°C)'] = '39'  # new critical alert
+        rows.append(_upload_row(500))
+
+        with CaptureQueriesContext(connection) as queries:
+            stats, errors = ingest_rows(rows)
+
+        self.assertEqual((stats.created, stats.updated, stats.unchanged), (1, 2, 198))
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(dict(Item.objects.exclude(batch_number='BATCH-00500')
+                              .values_list('batch_number', 'id')), self.ids)
+
+        changed = Item.objects.get(batch_number='BATCH-00007')
+        stored = (changed.quality_score, changed.alert_count, changed.status)
+        changed.save()
+        self.assertEqual(stored, (changed.quality_score, changed.alert_count, changed.status))
+        self.assertEqual(changed.critical_alert_count, 1)
+        self.assertEqual(changed.alert_rows.count(), changed.alert_count)
+        self.assertEqual(Item.objects.get(batch_number='BATCH-00003').quantity, 9999)
+
+    def test_repeated_key_in_one_file_keeps_the_last_row(self):
+        rows = [_upload_row(900, Quantity='1'), _upload_row(900, Quantity='2')]
+        stats, errors = ingest_rows(rows)
+
+        self.assertEqual(Item.objects.filter(batch_number='BATCH-00900').get().quantity, 2)
+        self.assertEqual((stats.created, stats.updated, stats.duplicates), (1, 0, 1))
+        self.assertEqual(stats.processed, 2)
+
+        # Matching a stored row is an update; the repeat within the batch is still a duplicate
+        rows = [_upload_row(900, Quantity='3'), _upload_row(900, Quantity='4'), _upload_row(5)]
+        stats, errors = ingest_rows(rows)
+        self.assertEqual((stats.created, stats.updated, stats.unchanged, stats.duplicates), (0, 1, 1, 1))
+
+    def test_command_reimport_is_idempotent(self):
+        call_command('import_medicine_csv', path=MEDICINES_CSV, stdout=io.StringIO())
+        count = Item.objects.count()
+        out = io.StringIO()
+        call_command('import_medicine_csv', path=MEDICINES_CSV, stdout=out)
+
+        self.assertEqual(Item.objects.count(), count)
+        self.assertIn('Imported: 0', out.getvalue())
+        self.assertIn('Updated: 0', out.getvalue())
+
+    def test_api_rejects_duplicate_natural_key(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('qa', password='secret'))
+        item = Item.objects.first()
+        response = client.post('/api/items/', {
+            'name': item.name, 'batch_number': item.batch_number,
+            'manufacture_date': '2024-01-01', 'expiry_date': '2100-01-01',
+        })
+        self.assertEqual(response.status_code, 400, response.content)
+
+    def test_unknown_batch_numbers_are_not_a_natural_key(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('qa', password='secret'))
+        for batch_number in (None, None, 'Unknown', ''):
+            data = {'name': 'Saline', 'manufacture_date': '2024-01-01', 'expiry_date': '2100-01-01'}
+            if batch_number is not None:
+                data['batch_number'] = batch_number
+            response = client.post('/api/items/', data)
+            self.assertEqual(response.status_code, 201, response.content)
+
+        # Re-imports insert them again rather than updating one of them
+        rows = [_upload_row(i, **{'Medicine Name': 'Saline', 'Batch Number': batch})
+                for i, batch in enumerate(['', '', 'Unknown'])]
+        stats, errors = ingest_rows(rows)
+        self.assertEqual((stats.created, stats.updated), (3, 0))
+        self.assertEqual(Item.objects.filter(name='Saline').count(), 7)
+
+    @skipUnless(connection.vendor == 'sqlite', 'drops the unique index inside the test transaction')
+    def test_migration_lists_duplicates_instead_of_deleting_them(self):
+        from importlib import import_module
+        from django.apps import apps
+        migration = import_module('api.migrations.0012_item_natural_key')
+
+        migration.check_duplicate_items(apps, None)  # no duplicates - passes
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX unique_item_batch_name')
+        first = Item.objects.get(batch_number='BATCH-00001')
+        QuerySet(Item).create(name=first.name, batch_number=first.batch_number, expiry_date=date(2100, 1, 1))
+
+        with self.assertRaisesMessage(RuntimeError, f"batch_number='BATCH-00001' name='{first.name}'"):
+            migration.check_duplicate_items(apps, None)
+        self.assertEqual(Item.objects.filter(batch_number='BATCH-00001').count(), 2)
+
+
+def _upload_csv(rows, line_ending='\n'):
+    """Encode template rows as an uploaded CSV file's bytes"""
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(UPLOAD_COLUMNS), lineterminator=line_ending)
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue().encode('utf-8')
+
+
+class StreamingCsvTests(SimpleTestCase):
+
+    def test_lines_survive_any_chunk_boundary(self):
+        data = '\ufeffname,temp\r\nAspirin,22 °C\r\n"Multi\nline",Ω\nlast'.encode('utf-8')
+        expected = list(csv.reader(io.StringIO(data.decode('utf-8-sig'), newline='')))
+        for size in (1, 2, 3, 7, len(data)):
+            chunks = [data[i:i + size] for i in range(0, len(data), size)]
+            self.assertEqual(list(csv.reader(iter_lines(chunks))), expected, f'chunk size {size}')
+
+    def test_upload_rows_match_the_template(self):
+        rows = [_upload_row(i) for i in range(5)]
+        upload = SimpleUploadedFile('medicines.csv', _upload_csv(rows, '\r\n'))
+        self.assertEqual(list(read_csv_upload(upload, chunk_size=16)), rows)
+
+    def test_the_file_is_read_as_rows_are_consumed(self):
+        # Lazy reads keep memory flat; `benchmark csv_memory` reports the actual peak
+        reads = []
+
+        class CountingFile(io.BytesIO):
+            def read(self, size=-1):
+                reads.append(size)
+                return super().read(size)
+
+        upload = CountingFile(_upload_csv([_upload_row(i) for i in range(2000)]))
+        rows = read_csv_upload(upload, chunk_size=1024)
+        self.assertEqual(next(rows), _upload_row(0))
+        self.assertEqual(reads, [1024])
+        self.assertNotIn(-1, reads)
+
+        self.assertEqual(sum(1 for _ in rows), 1999)
+        self.assertGreater(len(reads), 100)
+
+    def test_memory_benchmark_command(self):
+        out = io.StringIO()
+        call_command('benchmark', 'csv_memory', rows=100, stdout=out)
+        self.assertIn('1000 rows', out.getvalue())
+
+
+class BulkUploadViewTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('qa', password='secret'))
+
+    def upload(self, rows):
+        """Post a CSV and run its background job in-line"""
+        upload = SimpleUploadedFile('medicines.csv', _upload_csv(rows))
+        with self.captureOnCommitCallbacks(execute=False) as queued:
+            response = self.client.post(reverse('bulk_upload'), {'file': upload})
+        self.assertEqual(response.status_code, 202, response.content)
+        self.assertEqual(len(queued), 1)
+        run_upload_job(response.json()['job_id'])
+        return response.json()
+
+    def test_upload_returns_a_job_and_reports_progress(self):
+        rows = [_upload_row(i) for i in range(30)]
+        rows += [_upload_row(100 + i, **{'Quantity': 'n/a'}) for i in range(12)]
+        rows.append(_upload_row(0, Quantity='7'))  # repeats row 0's key
+        job = self.upload(rows)
+
+        self.assertEqual(job['status'], 'pending')
+        data = self.client.get(reverse('bulk_upload_status', args=[job['job_id']])).json()
+        self.assertEqual(data['status'], 'completed')
+        self.assertEqual((data['processed_rows'], data['created'], data['errors_count']), (43, 30, 12))
+        self.assertEqual((data['updated'], data['duplicates'], data['unchanged']), (0, 1, 0))
+        self.assertGreater(data['rows_per_second'], 0)
+        self.assertEqual(Item.objects.count(), 30)
+        self.assertFalse(os.path.exists(BulkUploadJob.objects.get().file_path))
+
+    def test_every_error_can_be_paged_through(self):
+        rows = [_upload_row(i, **{'Price': 'free'}) for i in range(25)]
+        job = self.upload(rows)
+        url = reverse('bulk_upload_errors', args=[job['job_id']])
+
+        first = self.client.get(url, {'page_size': 10}).json()
+        last = self.client.get(url, {'page_size': 10, 'page': 3}).json()
+        self.assertEqual((first['total'], first['total_pages']), (25, 3))
+        self.assertEqual([error['row'] for error in first['errors']], list(range(2, 12)))
+        self.assertEqual([error['row'] for error in last['errors']], list(range(22, 27)))
+        self.assertEqual(last['errors'][0]['data'], rows[20])
+
+    def test_jobs_are_only_visible_to_their_owner_and_staff(self):
+        job = self.upload([_upload_row(i, **{'Price': 'free'}) for i in range(3)])
+        urls = [reverse('bulk_upload_status', args=[job['job_id']]),
+                reverse('bulk_upload_errors', args=[job['job_id']])]
+
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user('other', password='secret'))
+        staff = APIClient()
+        staff.force_authenticate(User.objects.create_user('admin', password='secret', is_staff=True))
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertEqual(other.get(url).status_code, 404)
+            self.assertEqual(staff.get(url).status_code, 200)
+
+    def test_non_numeric_paging_is_a_bad_request(self):
+        job = self.upload([_upload_row(0, **{'Price': 'free'})])
+        url = reverse('bulk_upload_errors', args=[job['job_id']])
+        for params in ({'page': 'two'}, {'page_size': 'all'}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_progress_is_recorded_per_batch(self):
+        job = BulkUploadJob.objects.create(file_name='medicines.csv')
+        seen = []
+        with self.settings(BULK_UPLOAD_BATCH_SIZE=10):
+            with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as spool:
+                spool.write(_upload_csv([_upload_row(i) for i in range(35)]))
+            job.file_path = spool.name
+            job.save()
+            with mock.patch.object(BulkUploadJob, 'save', autospec=True,
+                                   side_effect=lambda self, **kw: seen.append(self.processed_rows)):
+                run_upload_job(job.pk)
+        self.assertEqual(seen[1:-1], [10, 20, 30, 35])
+
+
+MEDICINES_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'medicines.csv')
+
+
+class ParallelCsvImportTests(TestCase):
+
+    def test_byte_ranges_cover_every_line_once(self):
+        with open(MEDICINES_CSV, 'rb') as file:
+            header = file.readline()
+            body = file.read()
+        for chunk_bytes in (1, 100, 4096, len(body) * 2):
+            found_header, ranges = split_csv_ranges(MEDICINES_CSV, chunk_bytes)
+            self.assertEqual(found_header, header)
+            self.assertEqual(ranges[0][0], len(header))
+            self.assertEqual(ranges[-1][1], len(header) + len(body))
+            for (_, end), (start, _) in zip(ranges, ranges[1:]):
+                self.assertEqual(end, start)
+                self.assertEqual(body[end - len(header) - 1:end - len(header)], b'\n')
+
+    def test_chunked_parse_matches_serial_parse(self):
+        with open(MEDICINES_CSV, 'rb') as file:
+            serial = []
+            dates = date_parsers()
+            for row in read_csv_upload(file):
+                try:
+                    serial.append(clean_values(parse_medicines_row(row, dates)))
+                except Exception as e:
+                    serial.append(str(e))
+        with open(MEDICINES_CSV, 'rb') as file:
+            day_first = detect_date_orders(read_csv_upload(file), parse_medicines_row)
+        self.assertEqual(day_first, {'manufacture_date': False, 'expiry_date': False})
+
+        header, ranges = split_csv_ranges(MEDICINES_CSV, 2048)
+        chunked = [
+            row.values if row.error is None else row.error
+            for start, end in ranges
+            for row in parse_csv_range(MEDICINES_CSV, header, start, end, parse_medicines_row, day_first)
+        ]
+        self.assertGreater(len(ranges), 1)
+        self.assertEqual(chunked, serial)
+
+    def test_command_imports_in_batches_and_reports_throughput(self):
+        out = io.StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('import_medicine_csv', path=MEDICINES_CSV, batch_size=200, stdout=out)
+        with open(MEDICINES_CSV, encoding='utf-8') as file:
+            total = sum(1 for _ in csv.DictReader(file))
+
+        imported = Item.objects.count()
+        self.assertGreater(imported, 0)
+        self.assertIn(f'Rows processed: {total}', out.getvalue())
+        self.assertIn(f'Imported: {imported}', out.getvalue())
+        self.assertIn('rows/sec', out.getvalue())
+        item_queries = [q for q in queries if 'api_itemsearchterm' not in q['sql']]
+        self.assertLess(len(item_queries), imported / 5)
+
+    def test_date_order_option(self):
+        with open(MEDICINES_CSV, encoding='utf-8') as file:
+            header, row = file.readline(), file.readline().split(',')
+        row[1:3] = ['05-01-2025', '01-03-2027']
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as feed:
+            feed.write(header + ','.join(row))
+        self.addCleanup(os.remove, feed.name)
+
+        call_command('import_medicine_csv', path=feed.name, date_order='day-first', stdout=io.StringIO())
+        item = Item.objects.get()
+        self.assertEqual((item.manufacture_date, item.expiry_date), (date(2025, 1, 5), date(2027, 3, 1)))
+
+    def test_mis_decoded_temperature_header_is_accepted(self):
+        row = {headers[-1]: '1' for headers in MEDICINES_CSV_COLUMNS.values()}
+        row.update({'Manufacture_Date': '01/15/2025', 'Expiry_Date': '01/15/2027', 'Temperature (Â°C)': '25'})
+        self.assertEqual(parse_medicines_row(row)['temperature'], '25')
+
+
+# ============================================
+# IMPORT DATES
+# ============================================
+
+class DateColumnParserTests(SimpleTestCase):
+
+    def test_mixed_formats(self):
+        parse = DateColumnParser()
+        self.assertEqual(parse('01/15/2025'), date(2025, 1, 15))
+        self.assertEqual(parse('02-10-2025'), date(2025, 2, 10))
+        self.assertEqual(parse('2025-02-10'), date(2025, 2, 10))
+        self.assertEqual(parse('03.04.25'), date(2025, 3, 4))
+        self.assertEqual(parse(' 1/5/2025 '), date(2025, 1, 5))
+
+    def test_day_first_columns(self):
+        self.assertEqual(DateColumnParser(day_first=True)('02-10-2025'), date(2025, 10, 2))
+        with self.assertRaisesMessage(ValueError, 'DD/MM/YYYY'):
+            DateColumnParser(day_first=True)('02/13/2025')
+
+    def test_iso_column_still_accepts_other_layouts(self):
+        parse = DateColumnParser()
+        self.assertEqual(parse('2025-01-15'), date(2025, 1, 15))
+        self.assertEqual(parse('01/16/2025'), date(2025, 1, 16))
+
+    def test_invalid_dates_raise_value_error(self):
+        parse = DateColumnParser()
+        for value in ('', 'soon', '13/13/2025', '02/30/2025', '2025-13-01', '1/2'):
+            with self.assertRaises(ValueError, msg=value):
+                parse(value)
+
+    def test_sample_feed_columns_keep_one_order(self):
+        # The feed's first dates are month-first, so day-first-only dates are rejected, not flipped
+        with open(MEDICINES_CSV, encoding='utf-8') as file:
+            rows = list(csv.DictReader(file))
+        dates = date_parsers()
+        for row in rows:
+            for field, column in (('manufacture_date', 'Manufacture_Date'), ('expiry_date', 'Expiry_Date')):
+                value = row[column]
+                if int(value.replace('-', '/').split('/')[0]) > 12:
+                    with self.assertRaisesMessage(ValueError, 'MM/DD/YYYY', msg=value):
+                        dates[field](value)
+                else:
+                    expected = datetime.strptime(value.replace('-', '/'), '%m/%d/%Y').date()
+                    self.assertEqual(dates[field](value), expected)
+
+    def test_each_distinct_string_is_parsed_once(self):
+        parse = DateColumnParser()
+        with mock.patch.object(parse, 'parse', wraps=parse.parse) as parsed:
+            values = [parse(value) for value in ['01/15/2025', '2025-01-16', '01/15/2025'] * 50]
+        self.assertEqual(parsed.call_count, 2)
+        self.assertEqual(set(values), {date(2025, 1, 15), date(2025, 1, 16)})
+
+    def test_order_is_decided_once_per_column(self):
+        # A first part over 12 makes the column day-first - for every later value too
+        parse = DateColumnParser()
+        self.assertEqual(parse('13.01.2025'), date(2025, 1, 13))
+        self.assertEqual(parse('05.01.2025'), date(2025, 1, 5))
+        with self.assertRaisesMessage(ValueError, 'DD/MM/YYYY'):
+            parse('01/15/2025')
+
+        # Otherwise it is month-first, and a day-first-only value is rejected
+        parse = DateColumnParser()
+        self.assertEqual(parse('2025-01-05'), date(2025, 1, 5))  # ISO values decide nothing
+        self.assertEqual(parse('05.01.2025'), date(2025, 5, 1))
+        self.assertIs(parse.day_first, False)
+        with self.assertRaisesMessage(ValueError, 'MM/DD/YYYY'):
+            parse('13.01.2025')
+
+        # Values invalid in both orders decide nothing either
+        parse = DateColumnParser()
+        with self.assertRaises(ValueError):
+            parse('13/13/2025')
+        self.assertIsNone(parse.day_first)
+
+    def test_dmy_dates_are_read_in_the_given_order(self):
+        self.assertEqual(parse_dmy_date('12/01/2025'), date(2025, 12, 1))
+        self.assertEqual(parse_dmy_date('12/01/2025', day_first=True), date(2025, 1, 12))
+        self.assertEqual(parse_dmy_date('31-12-25', day_first=True), date(2025, 12, 31))
+        with self.assertRaises(ValueError):
+            parse_dmy_date('31-12-25')
+
+    def test_layout_is_detected_from_the_first_value(self):
+        iso = DateColumnParser()
+        iso('2025-01-15')
+        self.assertEqual(iso.layouts[0].__name__, 'parse_iso_date')
+        dmy = DateColumnParser()
+        dmy('01/15/2025')
+        self.assertEqual(dmy.layouts[1].__name__, 'parse_iso_date')
+
+    def test_cache_is_capped(self):
+        parse = DateColumnParser()
+        values = [(date(2024, 1, 1) + timedelta(days=i)).strftime('%m/%d/%Y') for i in range(30)]
+        with mock.patch('api.dates.MAX_CACHED_DATES', 10):
+            parsed = [parse(value) for value in values]
+        self.assertEqual(len(parse._cache), 10)
+        self.assertEqual(parsed, [datetime.strptime(value, '%m/%d/%Y').date() for value in values])
+
+    def test_benchmark_command(self):
+        out = io.StringIO()
+        call_command('benchmark', 'dates', rows=500, stdout=out)
+        self.assertIn('DateColumnParser', out.getvalue())
+
+
+# ============================================
+# STATUS MAINTENANCE
+# ============================================
+
+def _create_status_mix(count):
+    """Items covering every status condition, all stored with a stale 'active' status"""
+    today = date.today()
+    _create_items(
+        count,
+        expiry_date=[today - timedelta(days=3), today, today + timedelta(days=30), today + timedelta(days=400)],
+        manufacture_date=[today - timedelta(days=100)],
+        temperature=[22.0, 37.0, 22.0],
+        humidity=[50.0],
+        ph_level=[7.0],
+        contaminant_level=[0.0, 0.0, 0.0, 0.0, 2.0],
+        active_ingredient_purity=[99.5, 99.5, 50.0],
+    )
+    for item in Item.objects.all():
+        item.set_alerts(item.generate_alerts())
+        Item.objects.filter(pk=item.pk).update(
+            alerts=item.alerts, alert_count=item.alert_count,
+            critical_alert_count=item.critical_alert_count, status='active',
+        )
+
+
+class UpdateMedicineStatusTests(TestCase):
+
+    def expected_statuses(self):
+        return {item.pk: item.update_status() for item in Item.objects.all()}
+
+    def test_matches_update_status(self):
+        _create_status_mix(60)
+        expected = self.expected_statuses()
+        self.assertEqual(len(set(expected.values())), 3)
+
+        call_command('update_medicine_status', batch_size=7, stdout=io.StringIO())
+        self.assertEqual(dict(Item.objects.values_list('pk', 'status')), expected)
+
+    def test_status_filters_agree_with_update_status(self):
+        _create_status_mix(60)
+        filters = Item.status_filters()
+        for pk, expected in self.expected_statuses().items():
+            matches = [name for name, q in filters.items() if Item.objects.filter(q, pk=pk).exists()]
+            self.assertEqual(matches, [expected])
+
+    def test_dry_run_reports_transitions_without_writing(self):
+        _create_status_mix(60)
+        expected = self.expected_statuses()
+        out = io.StringIO()
+        call_command('update_medicine_status', dry_run=True, stdout=out)
+
+        self.assertEqual(set(Item.objects.values_list('status', flat=True)), {'active'})
+        expired = sum(1 for value in expected.values() if value == 'expired')
+        self.assertIn(f'Set to expired: {expired}', out.getvalue())
+        self.assertIn(f'active → expired: {expired}', out.getvalue())
+
+    def test_query_count_does_not_grow_with_the_table(self):
+        _create_status_mix(40)
+        with CaptureQueriesContext(connection) as few:
+            call_command('update_medicine_status', stdout=io.StringIO())
+        Item.objects.all().delete()
+        _create_status_mix(400)
+        with CaptureQueriesContext(connection) as many:
+            call_command('update_medicine_status', stdout=io.StringIO())
+        self.assertEqual(len(few), len(many))
+
+
+class ExpirySweepTests(TestCase):
+
+    def setUp(self):
+        self.today = timezone.now().date()
+        _create_items(
+            10,
+            expiry_date=[self.today + timedelta(days=offset) for offset in range(-5, 5)],
+            manufacture_date=[self.today - timedelta(days=100)],
+            status=['active'],
+        )
+
+    def statuses(self):
+        return dict(Item.objects.values_list('expiry_date', 'status'))
+
+    def test_first_run_catches_up_then_runs_are_incremental(self):
+        expired, since, today = expire_due_items(self.today)
+        self.assertEqual((expired, since), (5, None))
+        self.assertEqual(
+            [status for _, status in sorted(self.statuses().items())],
+            ['expired'] * 5 + ['active'] * 5,
+        )
+
+        self.assertEqual(expire_due_items(self.today)[0], 0)
+
+        tomorrow = self.today + timedelta(days=1)
+        with CaptureQueriesContext(connection) as queries:
+            expired, since, _ = expire_due_items(tomorrow)
+        self.assertEqual((expired, since), (1, self.today))
+        self.assertEqual(self.statuses()[self.today], 'expired')
+
+        update = next(q['sql'] for q in queries if q['sql'].startswith('UPDATE "api_item"'))
+        self.assertIn('"expiry_date" >=', update)
+        self.assertIn('"expiry_date" <', update)
+
+    def test_items_before_the_checkpoint_are_not_rescanned(self):
+        expire_due_items(self.today)
+        Item.objects.filter(expiry_date__lt=self.today).update(status='active')
+        self.assertEqual(expire_due_items(self.today + timedelta(days=1))[0], 1)
+
+    def test_loop_runs_until_stopped(self):
+        stop = threading.Event()
+        runs = []
+
+        def on_run(expired, since, today):
+            runs.append(expired)
+            if len(runs) == 2:
+                stop.set()
+
+        # Closing connections between runs would close the test's own connection
+        with mock.patch('api.expiry.close_old_connections'):
+            run_expiry_loop(interval=0, stop_event=stop, on_run=on_run)
+        self.assertEqual(runs, [5, 0])
+
+    def test_failing_runs_back_off_then_stop(self):
+        class RecordingEvent(threading.Event):
+            waits = []
+
+            def wait(self, timeout=None):
+                self.waits.append(timeout)
+
+        failing = mock.patch('api.expiry.expire_due_items', side_effect=DatabaseError('gone away'))
+        with failing as sweep, mock.patch('api.expiry.close_old_connections'), \
+                self.assertLogs('api.expiry', 'ERROR'):
+            with self.assertRaises(DatabaseError):
+                run_expiry_loop(interval=5, stop_event=RecordingEvent())
+        self.assertEqual(sweep.call_count, MAX_CONSECUTIVE_FAILURES)
+        self.assertEqual(RecordingEvent.waits, [1, 2, 4] + [5] * (MAX_CONSECUTIVE_FAILURES - 4))
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('expire_items', stdout=out)
+        self.assertIn('Expired 5 medicines', out.getvalue())
+
+
+class RegenerateAlertsTests(TestCase):
+
+    def setUp(self):
+        ingest_rows([_upload_row(i, **{'Temperature (°C)': '22'}) for i in range(30)])
+        # A raw update (no Item hooks) changes readings without touching the stored alerts
+        QuerySet(Item).filter(quantity__lt=10).update(temperature=37.0)
+        Item.objects.refresh_quality_scores()
+
+    def test_regenerates_stale_alerts_and_status(self):
+        out = io.StringIO()
+        call_command('regenerate_alerts', batch_size=7, stdout=out)
+
+        for item in Item.objects.all():
+            stored = (item.alert_count, item.critical_alert_count, item.status)
+            item.save()
+            self.assertEqual(stored, (item.alert_count, item.critical_alert_count, item.status))
+        self.assertEqual(Item.objects.filter(critical_alert_count__gt=0).count(), 10)
+        self.assertEqual(ItemAlert.objects.count(), sum(Item.objects.values_list('alert_count', flat=True)))
+        self.assertIn('Items updated: 10', out.getvalue())
+
+    def test_unchanged_items_are_not_written(self):
+        call_command('regenerate_alerts', stdout=io.StringIO())
+        with CaptureQueriesContext(connection) as queries:
+            call_command('regenerate_alerts', batch_size=7, stdout=io.StringIO())
+        self.assertFalse([q for q in queries if q['sql'].startswith(('UPDATE', 'INSERT', 'DELETE'))])
+
+    def test_since_limits_the_rows(self):
+        future = (timezone.now() + timedelta(days=1)).date().isoformat()
+        out = io.StringIO()
+        call_command('regenerate_alerts', since=future, stdout=out)
+        self.assertIn('Regenerating alerts for 0 items', out.getvalue())
+        self.assertEqual(Item.objects.filter(critical_alert_count__gt=0).count(), 0)
+
+    def test_workers_split_the_table_across_a_process_pool(self):
+        from concurrent.futures import Executor
+        from .management.commands import regenerate_alerts
+
+        class InProcessPool(Executor):
+            """Runs the worker function here - the in-memory test database isn't shared with children"""
+            instances = []
+
+            def __init__(self, max_workers, initializer=None):
+                self.instances.append(max_workers)
+
+            def map(self, fn, *iterables):
+                return map(fn, *iterables)
+
+        out = io.StringIO()
+        # Nothing is forked, so the test's connection (and its transaction) must stay open
+        with mock.patch.object(regenerate_alerts, 'ProcessPoolExecutor', InProcessPool), \
+                mock.patch.object(regenerate_alerts.connections, 'close_all') as close_all:
+            call_command('regenerate_alerts', workers=3, batch_size=4, stdout=out)
+        self.assertEqual(InProcessPool.instances, [3])
+        close_all.assert_called_once_with()
+        self.assertIn('Total items: 30', out.getvalue())
+        self.assertIn('Items updated: 10', out.getvalue())
+        self.assertEqual(Item.objects.filter(critical_alert_count__gt=0).count(), 10)
+
+    def test_pk_ranges_cover_every_row_once(self):
+        from .management.commands.regenerate_alerts import split_pk_ranges
+        pks = sorted(Item.objects.values_list('pk', flat=True))
+        for parts in (1, 3, 4, 100):
+            ranges = split_pk_ranges(Item.objects.all(), parts)
+            self.assertLessEqual(len(ranges), parts)
+            covered = [pk for pk in pks for low, high in ranges if low <= pk <= high]
+            self.assertEqual(covered, pks)
+
+
+# ============================================
+# SEARCH INDEX
+# ============================================
+
+def _indexed_terms(item):
+    return dict(ItemSearchTerm.objects.filter(item=item).values_list('trigram', 'weight'))
+
+
+class ItemSearchTests(TestCase):
+
+    def setUp(self):
+        _create_items(
+            60,
+            manufacturer=['PharmaCorp Ltd', 'HealthCare Pharma', 'MediCare Industries'],
+            supplier=['Global Meds', 'Prime Distributors', 'Amoxi Supply'],
+            category=['Pain Relief', 'Antibiotic'],
+        )
+        ItemSearchTerm.objects.index_pending()
+        Item.objects.create(
+            name='Amoxicillin', batch_number='AMX-2024-001', supplier='Global Meds',
+            manufacture_date=date(2025, 1, 1), expiry_date=date(2100, 1, 1),
+        )
+        self.url = reverse('item-list')
+
+    def search_ids(self, query):
+        response = self.client.get(self.url, {'search': query, 'page_size': 1000, 'count': 'false'})
+        self.assertEqual(response.status_code, 200, response.content)
+        return sorted(row['id'] for row in response.json()['results'])
+
+    def scan_ids(self, *terms):
+        queryset = Item.objects.all()
+        for term in terms:
+            matches = Q()
+            for field in SEARCH_FIELDS:
+                matches |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(matches)
+        return sorted(queryset.values_list('id', flat=True))
+
+    def test_matches_equal_a_full_icontains_scan(self):
+        for query in ('amox', 'AMX-2024', '-0004', 'care pharma', 'corp', 'Relief Global', 'me', 'zzz'):
+            terms = query.split()
+            self.assertEqual(self.search_ids(query), self.scan_ids(*terms), query)
+
+    def test_index_follows_item_writes(self):
+        item = Item.objects.get(name='Amoxicillin')
+        self.assertEqual(_indexed_terms(item), index_terms(item.search_values()))
+
+        # save() re-indexes a renamed item
+        item.name = 'Azithromycin'
+        item.save()
+        self.assertEqual(self.search_ids('azithro'), [item.pk])
+        self.assertEqual(self.search_ids('amoxicillin'), [])
+
+        # update() and bulk_update() flag the rows they touch - still found until re-indexed
+        Item.objects.filter(pk=item.pk).update(batch_number='AZI-9')
+        self.assertEqual(self.search_ids('azi-9'), [item.pk])
+        item = Item.objects.get(pk=item.pk)
+        item.manufacturer = 'Zenith Labs'
+        Item.objects.bulk_update([item], ['manufacturer'])
+        self.assertEqual(self.search_ids('zenith'), [item.pk])
+        self.assertFalse(Item.objects.get(pk=item.pk).search_indexed)
+
+        self.assertEqual(ItemSearchTerm.objects.index_pending(), (1, len(index_terms(item.search_values()))))
+        self.assertEqual(_indexed_terms(item), index_terms(item.search_values()))
+        self.assertEqual(self.search_ids('zenith'), [item.pk])
+        self.assertEqual(self.search_ids('azithro'), [item.pk])
+
+        item.delete()
+        self.assertFalse(ItemSearchTerm.objects.filter(item_id=item.pk).exists())
+
+    def test_unindexed_items_are_still_found(self):
+        _create_items(5, manufacturer=['Ciprofloxacin Labs'], supplier=['Amoxi Supply'])
+        pending = sorted(Item.objects.filter(search_indexed=False).values_list('id', flat=True))
+        self.assertEqual(len(pending), 5)
+
+        for query in ('cipro', 'amox', 'amoxicillin', 'labs supply'):
+            self.assertEqual(self.search_ids(query), self.scan_ids(*query.split()), query)
+        self.assertEqual(self.search_ids('ciprofloxacin'), pending)
+
+        # Ranked search keeps them too, below the indexed matches
+        response = self.client.get(reverse('item-search'), {'search': 'cipro', 'limit': 10})
+        self.assertEqual(sorted(row['id'] for row in response.json()['results']), pending)
+
+    def test_search_runs_a_fixed_number_of_queries(self):
+        # One query of bounded trigram counts, one query for the ranked rows
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('item-search'), {'search': 'amoxicillin', 'limit': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['name'], 'Amoxicillin')
+
+    def test_trigram_counts_stop_at_max_postings(self):
+        # 'cil' is in one item, 'amo' in 21 (Amoxicillin and the Amoxi Supply items), 'med' in all of them
+        with mock.patch('api.models.MAX_POSTINGS', 30), CaptureQueriesContext(connection) as queries:
+            rarest = ItemSearchTerm.objects.rarest({'amo', 'cil', 'med'}, limit=3)
+        self.assertEqual(rarest, ['cil', 'amo'])
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(queries[0]['sql'].count('LIMIT 30'), 3)
+        self.assertEqual(ItemSearchTerm.objects.rarest(set()), [])
+
+    def test_pending_command_indexes_flagged_items(self):
+        _create_items(3, manufacturer=['Ciprofloxacin Labs'])
+        out = io.StringIO()
+        call_command('rebuild_search_index', pending=True, stdout=out)
+
+        self.assertIn('Items indexed: 3', out.getvalue())
+        self.assertFalse(Item.objects.filter(search_indexed=False).exists())
+        for item in Item.objects.filter(manufacturer='Ciprofloxacin Labs'):
+            self.assertEqual(_indexed_terms(item), index_terms(item.search_values()))
+
+    def test_saves_without_search_changes_skip_the_index(self):
+        item = Item.objects.get(name='Amoxicillin')
+        item.quantity = 5
+        with CaptureQueriesContext(connection) as queries:
+            item.save()
+        self.assertEqual(len(queries), 1)
+
+    def test_ranked_search_puts_name_matches_first(self):
+        response = self.client.get(reverse('item-search'), {'search': 'amox', 'limit': 5})
+        data = response.json()
+
+        self.assertEqual(data['results'][0]['name'], 'Amoxicillin')
+        ranks = [row['search_rank'] for row in data['results']]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(self.client.get(reverse('item-search')).status_code, 400)
+
+    def test_rebuild_command_restores_the_index(self):
+        expected = dict(
+            ((pk, gram), weight) for pk, gram, weight in ItemSearchTerm.objects.values_list('item', 'trigram', 'weight')
+        )
+        ItemSearchTerm.objects.all().delete()
+        out = io.StringIO()
+        call_command('rebuild_search_index', batch_size=25, stdout=out)
+
+        rebuilt = dict(
+            ((pk, gram), weight) for pk, gram, weight in ItemSearchTerm.objects.values_list('item', 'trigram', 'weight')
+        )
+        self.assertEqual(rebuilt, expected)
+        self.assertIn('Items indexed: 61', out.getvalue())
+
+    def test_only_terms_with_trigrams_use_the_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.search_ids('amoxicillin')
+        self.assertIn('api_itemsearchterm', queries[-1]['sql'])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.search_ids('me')
+        self.assertNotIn('api_itemsearchterm', queries[-1]['sql'])
+
+
+# ============================================
+# COMPILED ROW SERIALIZERS
+# ============================================
+
+class CompiledSerializerTests(TestCase):
+
+    def setUp(self):
+        today = timezone.now().date()
+        _create_items(
+            40,
+            expiry_date=[today - timedelta(days=4), today, today + timedelta(days=9), today + timedelta(days=400)],
+            manufacture_date=[date(2024, 2, 29), date(2025, 7, 1)],
+            price=[Decimal('25.99'), Decimal('0'), Decimal('1234.5')],
+            temperature=[22.0, 37.0, 31.25],
+            humidity=[50.0, 85.0],
+            status=['active', 'expired', 'quarantine'],
+            manufacturer=['Pharmá Ltd', 'Unknown'],
+        )
+        for item in Item.objects.all()[:10]:
+            item.save()  # real alerts with timestamps
+
+    def render(self, data):
+        return JSONRenderer().render(data)
+
+    def request(self, **params):
+        return Request(APIRequestFactory().get('/', params))
+
+    def assert_identical(self, serializer_class, **params):
+        request = self.request(**params)
+        compiled = compiled_serializer(serializer_class, request)
+        queryset = Item.objects.order_by('expiry_date', 'id')
+        expected = serializer_class(queryset, many=True, context={'request': request}).data
+        self.assertEqual(self.render(compiled.serialize(compiled.values_list(queryset))), self.render(expected))
+
+    def test_output_is_byte_identical(self):
+        for serializer_class in (ItemSerializer, ItemSummarySerializer):
+            self.assert_identical(serializer_class)
+            self.assert_identical(serializer_class, fields='id,name,expiry_status')
+            self.assert_identical(serializer_class, exclude='days_until_expiry,category')
+
+        for params in ({'fields': 'name,price,created_at,alerts,status'}, {'exclude': 'alerts,humidity'}):
+            self.assert_identical(ItemSerializer, **params)
+
+    def test_compiled_columns_follow_the_field_set(self):
+        compiled = compiled_serializer(ItemSerializer, self.request(fields='name,is_expired'))
+        self.assertEqual(compiled.columns, ('name', 'expiry_date'))
+        self.assertIs(compiled, compiled_serializer(ItemSerializer, self.request(fields='is_expired,name')))
+
+    def test_endpoints_match_the_serializer(self):
+        data = self.client.get(reverse('item-list'), {'page_size': 1000}).json()['results']
+        expected = ItemSerializer(Item.objects.order_by('expiry_date', 'id'), many=True).data
+        self.assertEqual(self.render(data), self.render(expected))
+
+        expected = ItemSummarySerializer(Item.objects.filter(Item.expiry_filters()['urgent']), many=True).data
+        response = self.client.get(reverse('item-by-status'), {'status': 'urgent'})
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.content, self.render(expected))
+        response = self.client.get(reverse('item-by-status'), {'status': 'urgent', 'stream': 'true'})
+        self.assertEqual(b''.join(response.streaming_content), self.render(expected))
+
+    def test_matches_drf_serializers_over_many_rows(self):
+        # Same output as DRF across a few thousand rows; speed is reported by `benchmark serializers`
+        _create_items(1960)
+        for serializer_class in (ItemSerializer, ItemSummarySerializer):
+            compiled = compiled_serializer(serializer_class)
+            queryset = Item.objects.order_by('expiry_date', 'id')
+            expected = serializer_class(queryset.all(), many=True).data
+            rows = compiled.serialize(compiled.values_list(queryset.all()))
+            self.assertEqual(self.render(rows), self.render(expected))
+
+    def test_benchmark_command(self):
+        out = io.StringIO()
+        call_command('benchmark', 'serializers', rows=50, stdout=out)
+        self.assertIn('ItemSummarySerializer', out.getvalue())
+
+
+# ============================================
+# JSON RENDERING AND STREAMING
+# ============================================
+
+class FastJSONRendererTests(SimpleTestCase):
+
+    def payload(self):
+        aware = datetime(2026, 3, 1, 12, 30, 5, 123456, tzinfo=timezone.utc)
+        return ReturnDict({
+            'date': date(2026, 3, 1),
+            'datetime': aware,
+            'naive': datetime(2026, 3, 1, 8, 0),
+            'whole_second': datetime(2026, 3, 1, 8, 0, tzinfo=timezone.utc),
+            'decimals': [Decimal('25.99'), Decimal('0.00'), Decimal('1234.5')],
+            'floats': [0.1, 22.5, 1.0, -3.75, 99.99],
+            'text': 'Pharmá “quoted” \u2028 line \u2029 end / \\ \n',
+            'nested': [{'id': 1, 'alerts': [], 'ok': True, 'none': None}],
+            5: 'int key',
+            'delta': timedelta(hours=1, seconds=3),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        }, serializer=None)
+
+    def test_output_matches_drf_json_renderer(self):
+        for data in (self.payload(), [], {}, [self.payload()] * 3, 'text', 3):
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indent_and_fallback_use_drf_renderer(self):
+        data = self.payload()
+        indented = FastJSONRenderer().render(data, 'application/json; indent=2')
+        self.assertEqual(indented, JSONRenderer().render(data, 'application/json; indent=2'))
+
+        with mock.patch('api.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+            self.assertEqual(dumps(None), b'null')
+
+    def test_streamed_array_is_lazy_and_well_formed(self):
+        consumed = []
+
+        def rows():
+            for i in range(1200):
+                consumed.append(i)
+                yield {'id': i, 'day': date(2026, 1, 1)}
+
+        chunks = streaming_json_response(rows(), envelope={'total': 1200}, key='items', chunk_rows=500).streaming_content
+        first = next(chunks)
+        self.assertEqual(first, b'{"total":1200,"items":')
+        second = next(chunks)
+        self.assertEqual(len(consumed), 500)
+
+        body = first + second + b''.join(chunks)
+        self.assertEqual(body, JSONRenderer().render({'total': 1200, 'items': list(rows())}))
+
+        for envelope, key in ((None, None), ({}, 'rows')):
+            empty = b''.join(streaming_json_response(iter([]), envelope=envelope, key=key).streaming_content)
+            self.assertEqual(json.loads(empty), [] if envelope is None else {'rows': []})
+
+    def test_stream_errors(self):
+        def rows(fail_at):
+            for i in range(1200):
+                if i == fail_at:
+                    raise DatabaseError('connection lost')
+                yield {'id': i}
+
+        # Errors in the first chunk reach the caller before a response exists
+        with self.assertRaises(DatabaseError):
+            streaming_json_response(rows(0), chunk_rows=500)
+
+        # Later ones are logged and leave the body unterminated - never valid JSON
+        response = streaming_json_response(rows(700), envelope={'total': 1200}, key='items', chunk_rows=500)
+        with self.assertLogs('api.renderers', 'ERROR'):
+            body = b''.join(response.streaming_content)
+        self.assertTrue(body.startswith(b'{"total":1200,"items":[{"id":0}'))
+        with self.assertRaises(ValueError):
+            json.loads(body)
+
+
+class StreamedEndpointTests(TestCase):
+
+    def setUp(self):
+        today = timezone.now().date()
+        _create_items(
+            45,
+            expiry_date=[today - timedelta(days=3), today + timedelta(days=5), today + timedelta(days=90)],
+            temperature=[22.0, 37.0, 28.0, 22.0, 12.0],
+            humidity=[50.0, 85.0, 50.0],
+        )
+        for item in Item.objects.all():
+            item.save()  # alerts and ItemAlert rows
+
+    def test_quality_scores_streams_the_same_document(self):
+        with mock.patch('api.views.STREAM_BATCH_SIZE', 10):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('quality_scores'))
+                data = _response_json(response)
+        self.assertTrue(response.streaming)
+        # COUNT plus one query per batch of 10
+        self.assertEqual(len(queries), 1 + 5)
+
+        medicines = Item.objects.order_by('-quality_score', 'expiry_date', 'id')
+        self.assertEqual(data['total'], 45)
+        self.assertEqual([m['id'] for m in data['medicines']], [m.id for m in medicines])
+        first, medicine = data['medicines'][0], medicines[0]
+        self.assertEqual(first['expiry_date'], medicine.expiry_date.isoformat())
+        self.assertEqual(first['days_until_expiry'], medicine.days_until_expiry)
+        self.assertEqual(first['expiry_status'], medicine.expiry_status)
+        self.assertEqual(first['quality_score'], medicine.quality_score)
+
+    def test_query_errors_return_an_error_response(self):
+        def broken_rows(*args, **kwargs):
+            # Fails once iterated, like a query that reaches the database
+            raise DatabaseError('no such table')
+            yield
+
+        failing = mock.patch('api.views.iter_keyset', broken_rows)
+        with failing:
+            response = self.client.get(reverse('quality_scores'))
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()['details'], 'no such table')
+
+        with failing:
+            response = self.client.get(reverse('item-by-status'), {'stream': 'true'})
+        self.assertEqual(response.status_code, 500)
+
+    def test_alerts_list_stream_matches_the_paged_list(self):
+        url = reverse('alerts_list')
+        for params in ({}, {'severity': 'critical'}, {'type': 'humidity'}):
+            paged = self.client.get(url, {**params, 'page_size': 200}).json()
+            with mock.patch('api.views.ALERT_STREAM_BATCH_SIZE', 7):
+                streamed = _response_json(self.client.get(url, {**params, 'stream': 'true'}))
+            self.assertEqual(streamed['total'], paged['total'])
+            self.assertEqual(streamed['items'], paged['items'])
+
+    def test_expiry_report_json_export(self):
+        with mock.patch('api.views.EXPIRY_EXPORT_BATCH_SIZE', 4):
+            rows = _response_json(self.client.get(reverse('item-expiry-report'), {'export': 'json'}))
+        paged = self.client.get(reverse('item-expiry-report'), {'page_size': 1000}).json()['results']
+        self.assertEqual(rows, paged)
+
+    def test_descending_keyset_pages(self):
+        ordering = ('-quality_score', 'expiry_date', 'id')
+        rows = list(iter_keyset(Item.objects.values('id', 'quality_score', 'expiry_date'), 4, ordering))
+        expected = list(Item.objects.order_by(*ordering).values('id', 'quality_score', 'expiry_date'))
+        self.assertEqual(rows, expected)
@@ -7,7 +7,8 @@ from api.views import (
     quality_poor_performers, quality_statistics, quality_by_grade,
     acceptance_stats, alerts_count, alerts_list, status_statistics,
     inspector_stats, supplier_stats,
-    download_csv_template, bulk_upload_medicines
+    download_csv_template, bulk_upload_medicines,
+    bulk_upload_status, bulk_upload_errors
 )
 
 # Create a router and register the ItemViewSet
@@ -51,6 +52,8 @@ urlpatterns = [
     # CSV Template & Bulk Upload
     path('csv-template/', download_csv_template, name='csv_template'),
     path('bulk-upload/', bulk_upload_medicines, name='bulk_upload'),
+    path('bulk-upload/<uuid:job_id>/', bulk_upload_status, name='bulk_upload_status'),
+    path('bulk-upload/<uuid:job_id>/errors/', bulk_upload_errors, name='bulk_upload_errors'),
     
     # AI Chatbot
     path('chat_with_ai/', chat_with_ai, name='chat_with_ai'),
@@ -1,21 +1,29 @@
-from rest_framework import viewsets, filters, generics, status
+from rest_framework import viewsets, generics, status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.views import APIView
+from rest_framework.exceptions import APIException
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login, logout
-from django.db import connection
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.db.models import Avg, Count, Max, Min, Case, When, F, Q
 import json
 import csv
 from datetime import datetime, timedelta
-from .models import Item, UserProfile
+from itertools import islice
+from .models import Item, ItemAlert, UserProfile, BulkUploadJob, expiry_status_for
+from .filters import ItemSearchFilter
+from .jobs import create_upload_job, submit_upload_job
+from .pagination import ItemKeysetPagination, KEYSET_ORDERING, iter_keyset, parse_page_size
+from .renderers import streaming_json_response
+from .rows import compiled_serializer
 from .serializers import (
     ItemSerializer, ItemSummarySerializer, UserSerializer, UserProfileSerializer,
     UserRegistrationSerializer, UserLoginSerializer, ChangePasswordSerializer,
@@ -275,6 +283,56 @@ def auth_check(request):
     })
 
 
+# ============================================
+# EXPIRY REPORT
+# ============================================
+
+# Columns read for the expiry report
+EXPIRY_REPORT_FIELDS = (
+    'id', 'name', 'batch_number', 'expiry_date', 'quantity',
+    'manufacturer', 'category', 'price', 'manufacture_date',
+)
+
+# Rows read per query when exporting the whole report
+EXPIRY_EXPORT_BATCH_SIZE = 2000
+
+# Rows read per query by streamed list endpoints
+STREAM_BATCH_SIZE = 2000
+
+
+def _expiry_report_row(row, today):
+    """Add days left and expiry bucket to a values() row"""
+    days_left = (row['expiry_date'] - today).days
+    row['days_left'] = days_left
+    row['status'] = expiry_status_for(days_left)
+    row['is_expired'] = 1 if days_left < 0 else 0
+    return row
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for streaming csv.writer output"""
+
+    def write(self, value):
+        return value
+
+
+def _stream_expiry_report(queryset, today):
+    """Stream the whole report as CSV, reading it in keyset batches"""
+    
+    columns = list(EXPIRY_REPORT_FIELDS) + ['days_left', 'status', 'is_expired']
+    writer = csv.writer(_Echo())
+    
+    def lines():
+        yield writer.writerow(columns)
+        for row in iter_keyset(queryset, EXPIRY_EXPORT_BATCH_SIZE):
+            row = _expiry_report_row(row, today)
+            yield writer.writerow([row[column] for column in columns])
+    
+    response = StreamingHttpResponse(lines(), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="expiry_report.csv"'
+    return response
+
+
 # ============================================
 # MEDICINE/ITEM MANAGEMENT VIEWS
 # ============================================
@@ -284,12 +342,14 @@ class ItemViewSet(viewsets.ModelViewSet):
     API endpoint that allows items to be viewed, added, updated, or deleted.
     Includes search functionality for querying items by specific fields.
     Supports filtering by status: ?status=active/expired/quarantine
+    Lists are keyset-paginated by (expiry_date, id) - follow 'next' for the following page
     """
     queryset = Item.objects.all()
     serializer_class = ItemSerializer
     permission_classes = [AllowAny]
+    pagination_class = ItemKeysetPagination  # ?cursor=, ?page_size=, ?count=false
 
-    filter_backends = [filters.SearchFilter]
+    filter_backends = [ItemSearchFilter]  # ?search= on the trigram index
     search_fields = ['name', 'batch_number', 'manufacturer', 'category', 'supplier']
     ordering_fields = ['name', 'batch_number', 'expiry_date', 'manufacture_date', 'quantity', 'status']
     ordering = ['expiry_date']  # Order by expiry date by default
@@ -298,6 +358,7 @@ class ItemViewSet(viewsets.ModelViewSet):
         """
         Override get_queryset to support status filtering
         Usage: /api/items/?status=expired or ?status=active or ?status=quarantine
+        With ?fields= / ?exclude= only the columns of the requested fields are read
         """
         queryset = Item.objects.all()
         
@@ -306,12 +367,38 @@ class ItemViewSet(viewsets.ModelViewSet):
         if status_filter:
             queryset = queryset.filter(status=status_filter)
         
+        if self.action in ('list', 'retrieve'):
+            queryset = self.only_requested_columns(queryset, self.get_serializer_class())
+        
         return queryset
     
+    def only_requested_columns(self, queryset, serializer_class):
+        """Narrow the queryset to the columns the requested fields read (plus the list ordering)"""
+        
+        columns = serializer_class.columns_for(self.request)
+        if columns is None:
+            return queryset
+        return queryset.only(*columns, *KEYSET_ORDERING)
+    
     def list(self, request, *args, **kwargs):
-        """Override list to add error handling"""
+        """
+        Override list to add error handling
+        Rows are serialized by the compiled ItemSerializer (values_list() tuples straight to dicts)
+        """
         try:
-            return super().list(request, *args, **kwargs)
+            
+            compiled = compiled_serializer(self.get_serializer_class(), request, KEYSET_ORDERING)
+            if compiled is None:
+                return super().list(request, *args, **kwargs)
+            
+            rows = compiled.values_list(self.filter_queryset(self.get_queryset()))
+            if self.paginator is None:
+                return Response(compiled.serialize(rows))
+            page = self.paginator.paginate_queryset(rows, request, view=self, columns=compiled.columns)
+            return self.get_paginated_response(compiled.serialize(page))
+        except APIException:
+            # Bad query parameters (e.g. an invalid cursor) are 400s, not 500s
+            raise
         except Exception as e:
             print(f"❌ Error fetching medicines: {str(e)}")
             import traceback
@@ -323,79 +410,131 @@ class ItemViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def expiry_report(self, request):
-        """Get medicines with expiry calculations using raw SQL for better performance"""
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT 
-                    id, name, batch_number, expiry_date, quantity,
-                    manufacturer, category, price, manufacture_date,
-                    DATEDIFF(expiry_date, CURDATE()) AS days_left,
-                    CASE 
-                        WHEN DATEDIFF(expiry_date, CURDATE()) < 0 THEN 'expired'
-                        WHEN DATEDIFF(expiry_date, CURDATE()) <= 7 THEN 'urgent'
-                        WHEN DATEDIFF(expiry_date, CURDATE()) <= 30 THEN 'warning'
-                        ELSE 'safe'
-                    END AS status,
-                    CASE 
-                        WHEN DATEDIFF(expiry_date, CURDATE()) < 0 THEN 1
-                        ELSE 0
-                    END AS is_expired
-                FROM api_item 
-                ORDER BY days_left ASC
-            """)
+        """
+        Get medicines with expiry calculations, soonest expiry first
+        Keyset-paginated: follow 'next', or pass ?cursor= and ?page_size= (max 1000)
+        Filter by expiry bucket: ?status=expired/urgent/warning/safe
+        ?export=csv or ?export=json streams every matching row
+        """
+        try:
             
-            columns = [col[0] for col in cursor.description]
-            results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        
-        return Response(results)
+            today = timezone.now().date()
+            queryset = Item.objects.values(*EXPIRY_REPORT_FIELDS)
+            
+            # Bucket filter runs in SQL as an expiry_date range
+            bucket = request.query_params.get('status')
+            if bucket:
+                bucket_filters = Item.expiry_filters(today)
+                if bucket not in bucket_filters:
+                    return Response({
+                        'error': f'Invalid status: {bucket}',
+                        'valid_statuses': list(bucket_filters)
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                queryset = queryset.filter(bucket_filters[bucket])
+            
+            export = request.query_params.get('export')
+            if export == 'csv':
+                return _stream_expiry_report(queryset, today)
+            if export == 'json':
+                rows = iter_keyset(queryset, EXPIRY_EXPORT_BATCH_SIZE)
+                return streaming_json_response(_expiry_report_row(row, today) for row in rows)
+            
+            paginator = ItemKeysetPagination()
+            paginator.count_by_default = False
+            rows = paginator.paginate_queryset(queryset, request, view=self)
+            return paginator.get_paginated_response([_expiry_report_row(row, today) for row in rows])
+            
+        except APIException:
+            raise
+        except Exception as e:
+            return Response({
+                'error': 'Failed to generate expiry report',
+                'details': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Ranked search: ?search=<terms>&limit=N (default 20, max 100)
+        Best matches first - name matches outrank batch number, manufacturer, then category/supplier
+        """
+        try:
+            search_terms = ItemSearchFilter().get_search_terms(request)
+            if not search_terms:
+                return Response({
+                    'error': 'Provide search terms with ?search='
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            try:
+                limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+            except ValueError:
+                return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+            
+            queryset = self.only_requested_columns(self.filter_queryset(self.get_queryset()), ItemSummarySerializer)
+            queryset = ItemSearchFilter.annotate_rank(queryset, search_terms)
+            medicines = list(queryset.order_by('-search_rank', 'expiry_date', 'id')[:limit])
+            serializer = ItemSummarySerializer(medicines, many=True, context=self.get_serializer_context())
+            
+            results = []
+            for medicine, row in zip(medicines, serializer.data):
+                row['search_rank'] = medicine.search_rank
+                results.append(row)
+            
+            return Response({
+                'query': ' '.join(search_terms),
+                'count': len(results),
+                'results': results
+            })
+            
+        except Exception as e:
+            return Response({
+                'error': 'Search failed',
+                'details': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     @action(detail=False, methods=['get'])
     def by_status(self, request):
-        """Get medicines filtered by expiry status"""
+        """
+        Get medicines filtered by expiry status
+        ?stream=true streams the same array in keyset batches for very large buckets
+        """
         status_filter = request.GET.get('status', None)
         
         queryset = Item.objects.all()
         
-        if status_filter == 'expired':
-            queryset = queryset.filter(expiry_date__lt=timezone.now().date())
-        elif status_filter == 'urgent':
-            queryset = queryset.filter(
-                expiry_date__gte=timezone.now().date(),
-                expiry_date__lte=timezone.now().date() + timedelta(days=7)
-            )
-        elif status_filter == 'warning':
-            queryset = queryset.filter(
-                expiry_date__gt=timezone.now().date() + timedelta(days=7),
-                expiry_date__lte=timezone.now().date() + timedelta(days=30)
-            )
-        elif status_filter == 'safe':
-            queryset = queryset.filter(
-                expiry_date__gt=timezone.now().date() + timedelta(days=30)
-            )
-        
-        serializer = ItemSummarySerializer(queryset, many=True)
-        return Response(serializer.data)
+        bucket_filters = Item.expiry_filters()
+        if status_filter in bucket_filters:
+            queryset = queryset.filter(bucket_filters[status_filter])
+        
+        
+        if request.query_params.get('stream') != 'true':
+            compiled = compiled_serializer(ItemSummarySerializer, request)
+            return Response(compiled.serialize(compiled.values_list(queryset)))
+        
+        
+        try:
+            # Streamed in keyset batches - memory doesn't grow with the bucket size
+            compiled = compiled_serializer(ItemSummarySerializer, request, KEYSET_ORDERING)
+            rows = iter_keyset(compiled.values_list(queryset), STREAM_BATCH_SIZE, columns=compiled.columns)
+            return streaming_json_response(compiled.iter_serialize(rows))
+        except Exception as e:
+            return Response({
+                'error': 'Failed to stream medicines',
+                'details': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     @action(detail=False, methods=['get'])
     def expiry_stats(self, request):
         """Get expiry statistics for dashboard"""
+        
         today = timezone.now().date()
         
-        stats = {
-            'total_medicines': Item.objects.count(),
-            'expired': Item.objects.filter(expiry_date__lt=today).count(),
-            'urgent': Item.objects.filter(
-                expiry_date__gte=today,
-                expiry_date__lte=today + timedelta(days=7)
-            ).count(),
-            'warning': Item.objects.filter(
-                expiry_date__gt=today + timedelta(days=7),
-                expiry_date__lte=today + timedelta(days=30)
-            ).count(),
-            'safe': Item.objects.filter(
-                expiry_date__gt=today + timedelta(days=30)
-            ).count()
-        }
+        # All buckets in one conditional-aggregation query
+        bucket_filters = Item.expiry_filters(today)
+        stats = Item.objects.aggregate(
+            total_medicines=Count('id'),
+            **{bucket: Count('id', filter=q) for bucket, q in bucket_filters.items()}
+        )
         
         return Response(stats)
 
@@ -412,11 +551,19 @@ def status_statistics(request):
     Returns counts and percentages for each status
     """
     try:
-        total_items = Item.objects.count()
         
-        active_count = Item.objects.filter(status='active').count()
-        expired_count = Item.objects.filter(status='expired').count()
-        quarantine_count = Item.objects.filter(status='quarantine').count()
+        # Total and per-status counts in one query
+        counts = Item.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(status='active')),
+            expired=Count('id', filter=Q(status='expired')),
+            quarantine=Count('id', filter=Q(status='quarantine')),
+        )
+        total_items = counts['total']
+        
+        active_count = counts['active']
+        expired_count = counts['expired']
+        quarantine_count = counts['quarantine']
         
         return Response({
             'total_items': total_items,
@@ -445,46 +592,44 @@ def status_statistics(request):
 # QUALITY SCORE VIEWS
 # ============================================
 
+# Columns listed by quality_scores (days_until_expiry and expiry_status are added per row)
+QUALITY_SCORE_FIELDS = (
+    'id', 'name', 'batch_number', 'manufacturer', 'category', 'supplier',
+    'temperature', 'humidity', 'ph_level', 'contaminant_level', 'active_ingredient_purity',
+    'quality_score', 'quality_grade', 'quality_status', 'expiry_date',
+)
+
+# Highest score first (id breaks ties, so the order can be resumed in keyset batches)
+QUALITY_SCORE_ORDERING = ('-quality_score', 'expiry_date', 'id')
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def quality_scores(request):
     """
     Get all medicines with quality scores
-    Returns sorted list with quality metrics
+    Returns sorted list with quality metrics (streamed)
     """
     try:
-        medicines = Item.objects.all()
         
-        # Calculate quality scores for all medicines
-        medicine_scores = []
-        for medicine in medicines:
-            medicine_scores.append({
-                'id': medicine.id,
-                'name': medicine.name,
-                'batch_number': medicine.batch_number,
-                'manufacturer': medicine.manufacturer,
-                'category': medicine.category,
-                'supplier': medicine.supplier,
-                'temperature': medicine.temperature,
-                'humidity': medicine.humidity,
-                'ph_level': medicine.ph_level,
-                'contaminant_level': medicine.contaminant_level,
-                'active_ingredient_purity': medicine.active_ingredient_purity,
-                'quality_score': medicine.quality_score,
-                'quality_grade': medicine.quality_grade,
-                'quality_status': medicine.quality_status,
-                'expiry_date': medicine.expiry_date,
-                'days_until_expiry': medicine.days_until_expiry,
-                'expiry_status': medicine.expiry_status
-            })
+        total = Item.objects.count()
+        today = timezone.now().date()
         
-        # Sort by quality score (descending - highest first)
-        medicine_scores.sort(key=lambda x: x['quality_score'], reverse=True)
+        # Scores are stored columns - sort in SQL (highest first), read in keyset batches
+        # values() rows skip building model instances
+        medicines = iter_keyset(
+            Item.objects.values(*QUALITY_SCORE_FIELDS), STREAM_BATCH_SIZE, QUALITY_SCORE_ORDERING
+        )
         
-        return Response({
-            'total': len(medicine_scores),
-            'medicines': medicine_scores
-        })
+        def medicine_scores():
+            for medicine in medicines:
+                days_left = (medicine['expiry_date'] - today).days
+                medicine['days_until_expiry'] = days_left
+                medicine['expiry_status'] = expiry_status_for(days_left)
+                yield medicine
+        
+        # Streamed - neither the list nor the JSON body is held in memory
+        return streaming_json_response(medicine_scores(), envelope={'total': total}, key='medicines')
         
     except Exception as e:
         return Response({
@@ -500,12 +645,12 @@ def quality_top_performers(request):
     Get top 5 best quality medicines
     """
     try:
-        medicines = Item.objects.all()
+        # Top 5 by stored quality score (descending), served from the score index
+        medicines = Item.objects.order_by('-quality_score', 'expiry_date', 'id')[:5]
         
-        # Calculate quality scores
-        medicine_scores = []
+        top_5 = []
         for medicine in medicines:
-            medicine_scores.append({
+            top_5.append({
                 'id': medicine.id,
                 'name': medicine.name,
                 'batch_number': medicine.batch_number,
@@ -521,10 +666,6 @@ def quality_top_performers(request):
                 'active_ingredient_purity': medicine.active_ingredient_purity
             })
         
-        # Sort by quality score (descending) and get top 5
-        medicine_scores.sort(key=lambda x: x['quality_score'], reverse=True)
-        top_5 = medicine_scores[:5]
-        
         return Response({
             'count': len(top_5),
             'top_performers': top_5
@@ -544,12 +685,12 @@ def quality_poor_performers(request):
     Get top 5 worst quality medicines (need attention)
     """
     try:
-        medicines = Item.objects.all()
+        # Bottom 5 by stored quality score (ascending), served from the score index
+        medicines = Item.objects.order_by('quality_score', 'expiry_date', 'id')[:5]
         
-        # Calculate quality scores
-        medicine_scores = []
+        bottom_5 = []
         for medicine in medicines:
-            medicine_scores.append({
+            bottom_5.append({
                 'id': medicine.id,
                 'name': medicine.name,
                 'batch_number': medicine.batch_number,
@@ -565,10 +706,6 @@ def quality_poor_performers(request):
                 'active_ingredient_purity': medicine.active_ingredient_purity
             })
         
-        # Sort by quality score (ascending) and get bottom 5
-        medicine_scores.sort(key=lambda x: x['quality_score'])
-        bottom_5 = medicine_scores[:5]
-        
         return Response({
             'count': len(bottom_5),
             'poor_performers': bottom_5
@@ -588,8 +725,19 @@ def quality_statistics(request):
     Get overall quality statistics
     """
     try:
-        medicines = Item.objects.all()
-        total = medicines.count()
+        # Aggregate the stored (indexed) score and grade columns in a single query
+        grades = [('A', 'Excellent'), ('B', 'Good'), ('C', 'Fair'), ('D', 'Poor'), ('F', 'Failed')]
+        stats = Item.objects.aggregate(
+            total=Count('id'),
+            average_score=Avg('quality_score'),
+            highest_score=Max('quality_score'),
+            lowest_score=Min('quality_score'),
+            **{
+                f'grade_{grade}': Count(Case(When(quality_grade=grade, then=1)))
+                for grade, _ in grades
+            }
+        )
+        total = stats['total']
         
         if total == 0:
             return Response({
@@ -599,24 +747,16 @@ def quality_statistics(request):
                 'status_distribution': {}
             })
         
-        # Calculate scores for all medicines
-        scores = []
-        grade_count = {'A': 0, 'B': 0, 'C': 0, 'D': 0, 'F': 0}
-        status_count = {'Excellent': 0, 'Good': 0, 'Fair': 0, 'Poor': 0, 'Failed': 0}
-        
-        for medicine in medicines:
-            score = medicine.quality_score
-            scores.append(score)
-            grade_count[medicine.quality_grade] += 1
-            status_count[medicine.quality_status] += 1
-        
-        average_score = sum(scores) / len(scores)
+        # Grades and statuses map one-to-one
+        grade_count = {grade: stats[f'grade_{grade}'] for grade, _ in grades}
+        status_count = {label: stats[f'grade_{grade}'] for grade, label in grades}
+        average_score = stats['average_score']
         
         return Response({
             'total_medicines': total,
             'average_score': round(average_score, 2),
-            'highest_score': max(scores),
-            'lowest_score': min(scores),
+            'highest_score': stats['highest_score'],
+            'lowest_score': stats['lowest_score'],
             'grade_distribution': grade_count,
             'status_distribution': status_count,
             'excellent_count': status_count['Excellent'],
@@ -645,13 +785,9 @@ def quality_by_grade(request, grade):
                 'error': 'Invalid grade. Use A, B, C, D, or F'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        medicines = Item.objects.all()
-        
-        filtered_medicines = []
-        for medicine in medicines:
-            if medicine.quality_grade == grade:
-                serializer = ItemSerializer(medicine)
-                filtered_medicines.append(serializer.data)
+        # Grade is a stored, indexed column - filter in SQL
+        medicines = Item.objects.filter(quality_grade=grade)
+        filtered_medicines = ItemSerializer(medicines, many=True).data
         
         return Response({
             'grade': grade,
@@ -724,52 +860,54 @@ def acceptance_stats(request):
                     'error': 'Invalid date_to format. Use YYYY-MM-DD'
                 }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Calculate overall statistics
-        total_batches = queryset.count()
-        accepted_batches = queryset.filter(accepted_or_rejected__iexact='accepted').count()
-        rejected_batches = queryset.filter(accepted_or_rejected__iexact='rejected').count()
+        
+        accepted_q = Q(accepted_or_rejected__iexact='accepted')
+        rejected_q = Q(accepted_or_rejected__iexact='rejected')
+        
+        # Calculate overall statistics (one conditional-aggregation query)
+        overview = queryset.aggregate(
+            total=Count('id'),
+            accepted=Count('id', filter=accepted_q),
+            rejected=Count('id', filter=rejected_q)
+        )
+        total_batches = overview['total']
+        accepted_batches = overview['accepted']
+        rejected_batches = overview['rejected']
         
         # Calculate acceptance rate
         acceptance_rate = round((accepted_batches / total_batches * 100), 2) if total_batches > 0 else 0.0
         rejection_rate = round((rejected_batches / total_batches * 100), 2) if total_batches > 0 else 0.0
         
-        # Get rejection reasons - calculate quality status in Python (it's a @property, not a DB field)
+        # Get rejection reasons - group rejected batches by their stored quality status
         rejection_reasons = []
-        rejected_items = queryset.filter(accepted_or_rejected__iexact='rejected')
-        
-        # Group rejected items by quality status (calculated in Python)
-        reason_map = {}
-        for item in rejected_items:
-            quality_status = item.quality_status  # This is a @property, calculated on-the-fly
-            if quality_status in reason_map:
-                reason_map[quality_status] += 1
-            else:
-                reason_map[quality_status] = 1
+        reason_counts = queryset.filter(rejected_q).values('quality_status').annotate(
+            count=Count('id')
+        ).order_by('-count', 'quality_status')[:5]
         
-        # Convert to list and sort by count
-        for reason, count in sorted(reason_map.items(), key=lambda x: x[1], reverse=True)[:5]:
+        for reason in reason_counts:
+            count = reason['count']
             rejection_reasons.append({
-                'reason': reason or 'Unknown',
+                'reason': reason['quality_status'] or 'Unknown',
                 'count': count,
                 'percentage': round((count / rejected_batches * 100), 2) if rejected_batches > 0 else 0.0
             })
         
-        # Get supplier-wise breakdown
-        from django.db.models import Q
-        suppliers = queryset.values('supplier').distinct()
+        # Get supplier-wise breakdown (one GROUP BY query for all suppliers)
+        suppliers = queryset.values('supplier').annotate(
+            total=Count('id'),
+            accepted=Count('id', filter=accepted_q),
+            rejected=Count('id', filter=rejected_q)
+        ).order_by()
         supplier_stats = []
         
-        for supplier_obj in suppliers:
-            supplier_name = supplier_obj['supplier']
-            supplier_items = queryset.filter(supplier=supplier_name)
-            
-            supplier_total = supplier_items.count()
-            supplier_accepted = supplier_items.filter(accepted_or_rejected__iexact='accepted').count()
-            supplier_rejected = supplier_items.filter(accepted_or_rejected__iexact='rejected').count()
+        for supplier_row in suppliers:
+            supplier_total = supplier_row['total']
+            supplier_accepted = supplier_row['accepted']
+            supplier_rejected = supplier_row['rejected']
             supplier_acceptance_rate = round((supplier_accepted / supplier_total * 100), 2) if supplier_total > 0 else 0.0
             
             supplier_stats.append({
-                'supplier': supplier_name,
+                'supplier': supplier_row['supplier'],
                 'total_batches': supplier_total,
                 'accepted': supplier_accepted,
                 'rejected': supplier_rejected,
@@ -814,15 +952,19 @@ def acceptance_stats(request):
 @permission_classes([AllowAny])
 def alerts_count(request):
     """
-    Get count of environmental alerts (OPTIMIZED)
+    Get count of environmental alerts
     Returns total alerts, critical alerts, and breakdown by type
+    Item totals come from the stored alert counts, the breakdown from a
+    GROUP BY over the normalized ItemAlert rows
     """
     try:
-        from django.db.models import Q
         
-        # Only fetch items with non-empty alerts and only the alerts field for efficiency
-        items = Item.objects.exclude(Q(alerts__isnull=True) | Q(alerts=[])).only('alerts')
-        total_items_count = Item.objects.count()
+        item_counts = Item.objects.aggregate(
+            total=Count('id'),
+            with_alerts=Count('id', filter=Q(alert_count__gt=0))
+        )
+        total_items_count = item_counts['total']
+        items_with_alerts = item_counts['with_alerts']
         
         total_alerts = 0
         critical_alerts = 0
@@ -834,22 +976,22 @@ def alerts_count(request):
             'purity': 0,
             'ph_level': 0
         }
-        items_with_alerts = items.count()
         
-        for item in items:
-            for alert in item.alerts:
-                total_alerts += 1
-                
-                # Count by severity
-                if alert.get('severity') == 'critical':
-                    critical_alerts += 1
-                else:
-                    warning_alerts += 1
-                
-                # Count by type
-                alert_type = alert.get('type')
-                if alert_type in alert_types:
-                    alert_types[alert_type] += 1
+        # One grouped query - at most (severities x types) rows come back
+        grouped = ItemAlert.objects.values('severity', 'type').annotate(count=Count('id')).order_by()
+        for row in grouped:
+            count = row['count']
+            total_alerts += count
+            
+            # Count by severity
+            if row['severity'] == 'critical':
+                critical_alerts += count
+            else:
+                warning_alerts += count
+            
+            # Count by type
+            if row['type'] in alert_types:
+                alert_types[row['type']] += count
         
         return Response({
             'total_alerts': total_alerts,
@@ -867,88 +1009,139 @@ def alerts_count(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# Rows per query when alerts_list streams every item
+ALERT_STREAM_BATCH_SIZE = 500
+
+
+def _alert_items(page_rows, severity_filter, type_filter):
+    """Output rows for per-item alert counts, loading those items in one query"""
+    items = Item.objects.only(
+        'id', 'name', 'batch_number', 'manufacturer', 'supplier', 'category',
+        'alerts', 'temperature', 'humidity', 'contaminant_level', 
+        'active_ingredient_purity', 'ph_level', 'quality_score', 'quality_grade'
+    ).in_bulk([row['item_id'] for row in page_rows])
+    
+    items_with_alerts = []
+    for row in page_rows:
+        item = items.get(row['item_id'])
+        if item is None:
+            continue
+        
+        # Alert details for this page only, filtered like the counts
+        filtered_alerts = [
+            a for a in (item.alerts or [])
+            if (not severity_filter or a.get('severity') == severity_filter)
+            and (not type_filter or a.get('type') == type_filter)
+        ]
+        
+        items_with_alerts.append({
+            'id': item.id,
+            'name': item.name,
+            'batch_number': item.batch_number,
+            'manufacturer': item.manufacturer,
+            'supplier': item.supplier,
+            'category': item.category,
+            'alerts': filtered_alerts,
+            'alert_count': row['alert_count'],
+            'critical_count': row['critical_count'],
+            'warning_count': row['warning_count'],
+            'quality_score': item.quality_score,
+            'quality_grade': item.quality_grade,
+            'temperature': item.temperature,
+            'humidity': item.humidity,
+            'contaminant_level': item.contaminant_level,
+            'active_ingredient_purity': item.active_ingredient_purity,
+            'ph_level': item.ph_level
+        })
+    return items_with_alerts
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def alerts_list(request):
     """
-    Get list of all items with environmental alerts (OPTIMIZED)
+    Get list of all items with environmental alerts
     Query Parameters:
     - severity: Filter by severity (critical, warning)
     - type: Filter by alert type (temperature, humidity, contamination, purity, ph_level)
     - limit: Limit number of results (default: 100)
     - page: Page number for pagination (default: 1)
     - page_size: Items per page (default: 50, max: 200)
+    - stream: 'true' streams every matching item as {"total": N, "items": [...]}
+    
+    Filtering, per-item counting, ordering and pagination all run in SQL
+    (over ItemAlert rows when filtering, the stored alert counts otherwise);
+    only the requested page of items is loaded
     """
     try:
-        from django.db.models import Q
         
         severity_filter = request.GET.get('severity')  # 'critical' or 'warning'
         type_filter = request.GET.get('type')  # alert type
         limit = request.GET.get('limit')  # total number of items to return
-        page = int(request.GET.get('page', 1))  # current page
-        page_size = min(int(request.GET.get('page_size', 50)), 200)  # items per page (max 200)
-        
-        # Start with database-level filtering - only get items with alerts
-        items = Item.objects.exclude(Q(alerts__isnull=True) | Q(alerts=[])).only(
-            'id', 'name', 'batch_number', 'manufacturer', 'supplier', 'category',
-            'alerts', 'temperature', 'humidity', 'contaminant_level', 
-            'active_ingredient_purity', 'ph_level'
-        )
-        
-        items_with_alerts = []
+        try:
+            page = int(request.GET.get('page', 1))  # current page
+            page_size = int(request.GET.get('page_size', 50))  # items per page (max 200)
+        except ValueError:
+            return Response({
+                'error': 'page and page_size must be integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if page < 1 or page_size < 1:
+            return Response({
+                'error': 'page and page_size must be at least 1'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        page_size = min(page_size, 200)
         
-        for item in items:
-            # Apply filters in-memory (alerts is JSON field)
-            filtered_alerts = item.alerts
-            
+        if severity_filter or type_filter:
+            alert_rows = ItemAlert.objects.all()
             if severity_filter:
-                filtered_alerts = [a for a in filtered_alerts if a.get('severity') == severity_filter]
-            
+                alert_rows = alert_rows.filter(severity=severity_filter)
             if type_filter:
-                filtered_alerts = [a for a in filtered_alerts if a.get('type') == type_filter]
+                alert_rows = alert_rows.filter(type=type_filter)
             
-            # Only include if alerts remain after filtering
-            if filtered_alerts:
-                critical_count = sum(1 for a in filtered_alerts if a.get('severity') == 'critical')
-                warning_count = sum(1 for a in filtered_alerts if a.get('severity') == 'warning')
-                
-                items_with_alerts.append({
-                    'id': item.id,
-                    'name': item.name,
-                    'batch_number': item.batch_number,
-                    'manufacturer': item.manufacturer,
-                    'supplier': item.supplier,
-                    'category': item.category,
-                    'alerts': filtered_alerts,
-                    'alert_count': len(filtered_alerts),
-                    'critical_count': critical_count,
-                    'warning_count': warning_count,
-                    'quality_score': item.quality_score,
-                    'quality_grade': item.quality_grade,
-                    'temperature': item.temperature,
-                    'humidity': item.humidity,
-                    'contaminant_level': item.contaminant_level,
-                    'active_ingredient_purity': item.active_ingredient_purity,
-                    'ph_level': item.ph_level
-                })
-        
-        # Sort by critical count first, then total alert count (most critical first)
-        items_with_alerts.sort(key=lambda x: (x['critical_count'], x['alert_count']), reverse=True)
-        
-        total_count = len(items_with_alerts)
+            # Items with matching alerts, most critical first, then total alert count
+            per_item = alert_rows.values('item_id').annotate(
+                alert_count=Count('id'),
+                critical_count=Count('id', filter=Q(severity='critical')),
+                warning_count=Count('id', filter=Q(severity='warning'))
+            ).order_by('-critical_count', '-alert_count', 'item_id')
+        else:
+            # No alert filters - ordered scan of the stored (critical_alert_count, alert_count) index
+            per_item = Item.objects.filter(alert_count__gt=0).annotate(
+                item_id=F('id'),
+                critical_count=F('critical_alert_count'),
+                warning_count=F('alert_count') - F('critical_alert_count')
+            ).values(
+                'item_id', 'alert_count', 'critical_count', 'warning_count'
+            ).order_by('-critical_alert_count', '-alert_count', 'id')
+        
+        total_count = per_item.count()
+        
+        if request.GET.get('stream') == 'true':
+            # Every matching item, streamed - loaded ALERT_STREAM_BATCH_SIZE items at a time
+            
+            def all_items():
+                rows = per_item.iterator(chunk_size=ALERT_STREAM_BATCH_SIZE)
+                while True:
+                    batch = list(islice(rows, ALERT_STREAM_BATCH_SIZE))
+                    if not batch:
+                        return
+                    yield from _alert_items(batch, severity_filter, type_filter)
+            
+            return streaming_json_response(all_items(), envelope={'total': total_count}, key='items')
         
         # Apply limit if specified (for backward compatibility)
         if limit:
             try:
                 limit = int(limit)
-                items_with_alerts = items_with_alerts[:limit]
+                page_rows = list(per_item[:limit])
             except ValueError:
-                pass
-        else:
+                limit = None
+        if not limit:
             # Apply pagination
             start_idx = (page - 1) * page_size
-            end_idx = start_idx + page_size
-            items_with_alerts = items_with_alerts[start_idx:end_idx]
+            page_rows = list(per_item[start_idx:start_idx + page_size])
+        
+        items_with_alerts = _alert_items(page_rows, severity_filter, type_filter)
         
         return Response({
             'count': len(items_with_alerts),
@@ -970,126 +1163,137 @@ def alerts_list(request):
 # INSPECTOR PERFORMANCE ANALYTICS
 # ============================================
 
+MONTH_NAMES = ['', 'January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December']
+
+
+def _month_windows():
+    """
+    Get the current and previous calendar month as half-open datetime ranges
+    Returns (prev_start, current_start, next_start, current_label, prev_label)
+    """
+    today = timezone.now().date()
+    current_year, current_month = today.year, today.month
+    
+    # Calculate previous and next month
+    prev_year, prev_month = (current_year - 1, 12) if current_month == 1 else (current_year, current_month - 1)
+    next_year, next_month = (current_year + 1, 1) if current_month == 12 else (current_year, current_month + 1)
+    
+    def month_start(year, month):
+        return timezone.make_aware(datetime(year, month, 1))
+    
+    return (
+        month_start(prev_year, prev_month),
+        month_start(current_year, current_month),
+        month_start(next_year, next_month),
+        f'{MONTH_NAMES[current_month]} {current_year}',
+        f'{MONTH_NAMES[prev_month]} {prev_year}',
+    )
+
+
+def _performance_annotations(prev_start, current_start, next_start):
+    """
+    Grouped aggregates shared by the inspector and supplier analytics
+    Exact averages over every row (stored quality_score), monthly windows and grade counts
+    """
+    
+    current_month_q = Q(created_at__gte=current_start, created_at__lt=next_start)
+    prev_month_q = Q(created_at__gte=prev_start, created_at__lt=current_start)
+    
+    annotations = {
+        'average_score': Avg('quality_score'),
+        'current_month_avg': Avg('quality_score', filter=current_month_q),
+        'current_month_count': Count('id', filter=current_month_q),
+        'prev_month_avg': Avg('quality_score', filter=prev_month_q),
+        'prev_month_count': Count('id', filter=prev_month_q),
+    }
+    for grade in ['A', 'B', 'C', 'D', 'F']:
+        annotations[f'grade_{grade}'] = Count('id', filter=Q(quality_grade=grade))
+    return annotations
+
+
+def _performance_summary(row):
+    """Turn one grouped row into the averages, trend and grade distribution of the response"""
+    average_score = round(row['average_score'], 2) if row['average_score'] is not None else 0
+    current_month_avg = round(row['current_month_avg'], 2) if row['current_month_avg'] is not None else 0
+    prev_month_avg = round(row['prev_month_avg'], 2) if row['prev_month_avg'] is not None else 0
+    
+    # Calculate trend
+    if prev_month_avg == 0:
+        trend = 'new'
+        trend_percentage = 0
+    else:
+        diff = current_month_avg - prev_month_avg
+        trend_percentage = round((diff / prev_month_avg * 100), 2) if prev_month_avg > 0 else 0
+        
+        if abs(diff) < 1:
+            trend = 'stable'
+        elif diff > 0:
+            trend = 'up'
+        else:
+            trend = 'down'
+    
+    return {
+        'average_score': average_score,
+        'current_month_avg': current_month_avg,
+        'prev_month_avg': prev_month_avg,
+        'trend': trend,
+        'trend_percentage': trend_percentage,
+        'grade_distribution': {grade: row[f'grade_{grade}'] for grade in ['A', 'B', 'C', 'D', 'F']},
+    }
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def inspector_stats(request):
     """
-    Get inspector performance analytics (OPTIMIZED)
+    Get inspector performance analytics
     Returns stats grouped by inspector with:
     - Average quality score
     - Total inspections
     - Current month vs previous month comparison
     - Trend (up/down/stable)
+    
+    All figures are exact grouped aggregates over every inspection,
+    computed in a single query whatever the number of inspectors
     """
     try:
-        from django.db.models import Avg, Count, Q, Case, When, IntegerField
-        from django.db.models.functions import ExtractMonth, ExtractYear
         
-        # Get current date
-        today = timezone.now().date()
-        current_month = today.month
-        current_year = today.year
-        
-        # Calculate previous month
-        if current_month == 1:
-            prev_month = 12
-            prev_year = current_year - 1
-        else:
-            prev_month = current_month - 1
-            prev_year = current_year
+        prev_start, current_start, next_start, current_label, prev_label = _month_windows()
         
         # Get items that have valid inspectors (exclude Unknown)
         valid_items = Item.objects.exclude(inspected_by='Unknown').exclude(inspected_by='')
         
-        # Get unique inspectors with their counts
+        # One GROUP BY query for every inspector figure
         inspectors = valid_items.values('inspected_by').annotate(
             total_inspections=Count('id'),
-            accepted_count=Count(Case(When(accepted_or_rejected__iexact='accepted', then=1)))
-        ).order_by('-total_inspections')[:50]  # Limit to top 50 inspectors
+            accepted_count=Count('id', filter=Q(accepted_or_rejected__iexact='accepted')),
+            **_performance_annotations(prev_start, current_start, next_start)
+        ).order_by('-total_inspections', 'inspected_by')[:50]  # Limit to top 50 inspectors
         
         inspector_stats = []
         
         for inspector in inspectors:
-            inspector_name = inspector['inspected_by']
             total_inspections = inspector['total_inspections']
-            
-            # Get items for this inspector
-            inspector_items = valid_items.filter(inspected_by=inspector_name)
-            
-            # Sample items to calculate avg score (much faster than all)
-            sample_size = min(100, total_inspections)  # Sample max 100 items
-            sampled_items = list(inspector_items.order_by('?')[:sample_size])
-            
-            # Calculate average quality score from sample
-            if sampled_items:
-                avg_score = round(sum(item.quality_score for item in sampled_items) / len(sampled_items), 2)
-            else:
-                avg_score = 0
-            
-            # Get current month stats
-            current_month_items = list(inspector_items.filter(
-                created_at__month=current_month,
-                created_at__year=current_year
-            )[:50])  # Limit to 50 items
-            
-            current_month_count = len(current_month_items)
-            current_month_avg = round(
-                sum(item.quality_score for item in current_month_items) / len(current_month_items), 2
-            ) if current_month_items else 0
-            
-            # Get previous month stats
-            prev_month_items = list(inspector_items.filter(
-                created_at__month=prev_month,
-                created_at__year=prev_year
-            )[:50])  # Limit to 50 items
-            
-            prev_month_count = len(prev_month_items)
-            prev_month_avg = round(
-                sum(item.quality_score for item in prev_month_items) / len(prev_month_items), 2
-            ) if prev_month_items else 0
-            
-            # Calculate trend
-            if prev_month_avg == 0:
-                trend = 'new'
-                trend_percentage = 0
-            else:
-                diff = current_month_avg - prev_month_avg
-                trend_percentage = round((diff / prev_month_avg * 100), 2) if prev_month_avg > 0 else 0
-                
-                if abs(diff) < 1:
-                    trend = 'stable'
-                elif diff > 0:
-                    trend = 'up'
-                else:
-                    trend = 'down'
-            
-            # Calculate grade distribution (sample)
-            grade_distribution = {'A': 0, 'B': 0, 'C': 0, 'D': 0, 'F': 0}
-            for item in sampled_items[:20]:  # Only check first 20
-                grade = item.quality_grade
-                grade_distribution[grade] += 1
-            
-            # Get month names
-            month_names = ['', 'January', 'February', 'March', 'April', 'May', 'June',
-                          'July', 'August', 'September', 'October', 'November', 'December']
+            summary = _performance_summary(inspector)
             
             inspector_stats.append({
-                'inspector_name': inspector_name,
+                'inspector_name': inspector['inspected_by'],
                 'total_inspections': total_inspections,
-                'average_quality_score': avg_score,
+                'average_quality_score': summary['average_score'],
                 'current_month': {
-                    'average_score': current_month_avg,
-                    'inspections': current_month_count,
-                    'month': f'{month_names[current_month]} {current_year}'
+                    'average_score': summary['current_month_avg'],
+                    'inspections': inspector['current_month_count'],
+                    'month': current_label
                 },
                 'previous_month': {
-                    'average_score': prev_month_avg,
-                    'inspections': prev_month_count,
-                    'month': f'{month_names[prev_month]} {prev_year}'
+                    'average_score': summary['prev_month_avg'],
+                    'inspections': inspector['prev_month_count'],
+                    'month': prev_label
                 },
-                'trend': trend,
-                'trend_percentage': trend_percentage,
-                'grade_distribution': grade_distribution,
+                'trend': summary['trend'],
+                'trend_percentage': summary['trend_percentage'],
+                'grade_distribution': summary['grade_distribution'],
                 'acceptance_rate': round(
                     (inspector['accepted_count'] / total_inspections * 100), 2
                 ) if total_inspections > 0 else 0
@@ -1116,134 +1320,72 @@ def inspector_stats(request):
 @permission_classes([AllowAny])
 def supplier_stats(request):
     """
-    Get supplier performance analytics (OPTIMIZED)
+    Get supplier performance analytics
     Returns stats grouped by supplier with:
     - Average quality score
-    - Total batches supplied
+    - Total, accepted and rejected batches
     - Current month vs previous month comparison
     - Trend (up/down/stable)
     - Acceptance rate
+    - Critical-alert batches and environmental compliance
+    
+    All figures are exact grouped aggregates over every batch,
+    computed in a single query whatever the number of suppliers
     """
     try:
-        from django.db.models import Avg, Count, Q, Case, When
         
-        # Get current date
-        today = timezone.now().date()
-        current_month = today.month
-        current_year = today.year
-        
-        # Calculate previous month
-        if current_month == 1:
-            prev_month = 12
-            prev_year = current_year - 1
-        else:
-            prev_month = current_month - 1
-            prev_year = current_year
+        prev_start, current_start, next_start, current_label, prev_label = _month_windows()
         
         # Get items that have valid suppliers (exclude Unknown)
         valid_items = Item.objects.exclude(supplier='Unknown').exclude(supplier='')
         
-        # Get unique suppliers with their counts
+        # One GROUP BY query for every supplier figure
         suppliers = valid_items.values('supplier').annotate(
             total_batches=Count('id'),
-            accepted_count=Count(Case(When(accepted_or_rejected__iexact='accepted', then=1))),
-            active_count=Count(Case(When(status='active', then=1))),
-            expired_count=Count(Case(When(status='expired', then=1))),
-            quarantine_count=Count(Case(When(status='quarantine', then=1)))
-        ).order_by('-total_batches')[:50]  # Limit to top 50 suppliers
+            accepted_count=Count('id', filter=Q(accepted_or_rejected__iexact='accepted')),
+            rejected_count=Count('id', filter=Q(accepted_or_rejected__iexact='rejected')),
+            active_count=Count('id', filter=Q(status='active')),
+            expired_count=Count('id', filter=Q(status='expired')),
+            quarantine_count=Count('id', filter=Q(status='quarantine')),
+            critical_count=Count('id', filter=Q(critical_alert_count__gt=0)),
+            **_performance_annotations(prev_start, current_start, next_start)
+        ).order_by('-total_batches', 'supplier')[:50]  # Limit to top 50 suppliers
         
         supplier_stats = []
         
         for supplier in suppliers:
-            supplier_name = supplier['supplier']
             total_batches = supplier['total_batches']
-            
-            # Get items for this supplier
-            supplier_items = valid_items.filter(supplier=supplier_name)
-            
-            # Sample items to calculate avg score (much faster than all)
-            sample_size = min(100, total_batches)  # Sample max 100 items
-            sampled_items = list(supplier_items.order_by('?')[:sample_size])
-            
-            # Calculate average quality score from sample
-            if sampled_items:
-                avg_score = round(sum(item.quality_score for item in sampled_items) / len(sampled_items), 2)
-            else:
-                avg_score = 0
-            
-            # Get current month stats
-            current_month_items = list(supplier_items.filter(
-                created_at__month=current_month,
-                created_at__year=current_year
-            )[:50])  # Limit to 50 items
-            
-            current_month_count = len(current_month_items)
-            current_month_avg = round(
-                sum(item.quality_score for item in current_month_items) / len(current_month_items), 2
-            ) if current_month_items else 0
-            
-            # Get previous month stats
-            prev_month_items = list(supplier_items.filter(
-                created_at__month=prev_month,
-                created_at__year=prev_year
-            )[:50])  # Limit to 50 items
-            
-            prev_month_count = len(prev_month_items)
-            prev_month_avg = round(
-                sum(item.quality_score for item in prev_month_items) / len(prev_month_items), 2
-            ) if prev_month_items else 0
-            
-            # Calculate trend
-            if prev_month_avg == 0:
-                trend = 'new'
-                trend_percentage = 0
-            else:
-                diff = current_month_avg - prev_month_avg
-                trend_percentage = round((diff / prev_month_avg * 100), 2) if prev_month_avg > 0 else 0
-                
-                if abs(diff) < 1:
-                    trend = 'stable'
-                elif diff > 0:
-                    trend = 'up'
-                else:
-                    trend = 'down'
-            
-            # Calculate grade distribution (sample)
-            grade_distribution = {'A': 0, 'B': 0, 'C': 0, 'D': 0, 'F': 0}
-            for item in sampled_items[:20]:  # Only check first 20
-                grade = item.quality_grade
-                grade_distribution[grade] += 1
+            summary = _performance_summary(supplier)
             
             # Calculate acceptance rate
             acceptance_rate = round((supplier['accepted_count'] / total_batches * 100), 2) if total_batches > 0 else 0
             
-            # Calculate environmental compliance (items without critical alerts)
-            items_with_critical = sum(1 for item in sampled_items if item.critical_alert_count > 0)
-            environmental_compliance = round(((len(sampled_items) - items_with_critical) / len(sampled_items) * 100), 2) if sampled_items else 0
-            
-            # Get month names
-            month_names = ['', 'January', 'February', 'March', 'April', 'May', 'June',
-                          'July', 'August', 'September', 'October', 'November', 'December']
+            # Calculate environmental compliance (batches without critical alerts)
+            items_with_critical = supplier['critical_count']
+            environmental_compliance = round(((total_batches - items_with_critical) / total_batches * 100), 2) if total_batches > 0 else 0
             
             supplier_stats.append({
-                'supplier_name': supplier_name,
+                'supplier_name': supplier['supplier'],
                 'total_batches': total_batches,
-                'average_quality_score': avg_score,
+                'accepted_batches': supplier['accepted_count'],
+                'rejected_batches': supplier['rejected_count'],
+                'average_quality_score': summary['average_score'],
                 'current_month': {
-                    'average_score': current_month_avg,
-                    'batches': current_month_count,
-                    'month': f'{month_names[current_month]} {current_year}'
+                    'average_score': summary['current_month_avg'],
+                    'batches': supplier['current_month_count'],
+                    'month': current_label
                 },
                 'previous_month': {
-                    'average_score': prev_month_avg,
-                    'batches': prev_month_count,
-                    'month': f'{month_names[prev_month]} {prev_year}'
+                    'average_score': summary['prev_month_avg'],
+                    'batches': supplier['prev_month_count'],
+                    'month': prev_label
                 },
-                'trend': trend,
-                'trend_percentage': trend_percentage,
-                'grade_distribution': grade_distribution,
+                'trend': summary['trend'],
+                'trend_percentage': summary['trend_percentage'],
+                'grade_distribution': summary['grade_distribution'],
                 'acceptance_rate': acceptance_rate,
                 'environmental_compliance': environmental_compliance,
+                'critical_alert_batches': items_with_critical,
                 'active_batches': supplier['active_count'],
                 'expired_batches': supplier['expired_count'],
                 'quarantined_batches': supplier['quarantine_count']
@@ -1374,6 +1516,7 @@ def bulk_upload_medicines(request):
     """
     Bulk upload medicines from CSV file
     Expects CSV file with same format as template
+    The file is processed in the background - poll the returned job for progress
     """
     try:
         # Check if file was uploaded
@@ -1392,57 +1535,113 @@ def bulk_upload_medicines(request):
                 'message': 'Please upload a CSV file'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Read and decode CSV file
-        decoded_file = csv_file.read().decode('utf-8').splitlines()
-        reader = csv.DictReader(decoded_file)
+        # Spool the file and hand it to the background worker pool
+        job = create_upload_job(csv_file, user=request.user)
+        submit_upload_job(job)
         
-        created_count = 0
-        errors = []
+        return Response({
+            'message': 'Bulk upload started',
+            'job_id': str(job.pk),
+            'status': job.status,
+            'status_url': request.build_absolute_uri(reverse('bulk_upload_status', args=[job.pk])),
+            'errors_url': request.build_absolute_uri(reverse('bulk_upload_errors', args=[job.pk]))
+        }, status=status.HTTP_202_ACCEPTED)
         
-        for row_num, row in enumerate(reader, start=2):  # Start at 2 (1 is header)
-            try:
-                # Create medicine from CSV row
-                medicine = Item.objects.create(
-                    name=row.get('Medicine Name', '').strip(),
-                    batch_number=row.get('Batch Number', '').strip(),
-                    manufacture_date=row.get('Manufacture Date', '2000-01-01'),
-                    expiry_date=row.get('Expiry Date', '2100-01-01'),
-                    quantity=int(row.get('Quantity', 0)),
-                    manufacturer=row.get('Manufacturer', 'Unknown').strip(),
-                    category=row.get('Category', 'General').strip(),
-                    price=float(row.get('Price', 0.0)),
-                    supplier=row.get('Supplier', 'Unknown').strip(),
-                    temperature=float(row.get('Temperature (°C)', 0.0)),
-                    humidity=float(row.get('Humidity (%)', 0.0)),
-                    ph_level=float(row.get('pH Level', 0.0)),
-                    contaminant_level=float(row.get('Contaminant Level (ppm)', 0.0)),
-                    active_ingredient_purity=float(row.get('Active Ingredient Purity (%)', 0.0)),
-                    inspected_by=row.get('Inspected By', 'Unknown').strip(),
-                    accepted_or_rejected=row.get('Status (Accepted/Rejected)', 'Unknown').strip()
-                )
-                created_count += 1
-                
-            except Exception as e:
-                errors.append({
-                    'row': row_num,
-                    'data': dict(row),
-                    'error': str(e)
-                })
+    except Exception as e:
+        return Response({
+            'error': 'Bulk upload failed',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _upload_jobs_for(user):
+    """Upload jobs a user may see - their own, or every job for staff"""
+    jobs = BulkUploadJob.objects.all()
+    return jobs if user.is_staff else jobs.filter(user=user)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def bulk_upload_status(request, job_id):
+    """
+    Progress of a background bulk upload
+    Reports rows processed / created / updated / unchanged / duplicates / failed and throughput (rows per second)
+    Rows matching an existing (batch_number, name) update it instead of duplicating;
+    duplicates are rows whose key a later row of the file repeats (the later row wins)
+    """
+    try:
+        job = _upload_jobs_for(request.user).filter(pk=job_id).first()
+        if job is None:
+            return Response({
+                'error': 'Upload job not found'
+            }, status=status.HTTP_404_NOT_FOUND)
         
-        response_data = {
-            'message': 'Bulk upload completed',
-            'created': created_count,
-            'total_rows': created_count + len(errors),
-            'errors_count': len(errors)
-        }
+        return Response({
+            'job_id': str(job.pk),
+            'file_name': job.file_name,
+            'status': job.status,
+            'processed_rows': job.processed_rows,
+            'created': job.created_rows,
+            'updated': job.updated_rows,
+            'unchanged': (job.processed_rows - job.created_rows - job.updated_rows
+                          - job.duplicate_rows - job.failed_rows),
+            'duplicates': job.duplicate_rows,
+            'errors_count': job.failed_rows,
+            'rows_per_second': job.rows_per_second,
+            'error': job.error_message or None,
+            'created_at': job.created_at,
+            'started_at': job.started_at,
+            'finished_at': job.finished_at
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        return Response({
+            'error': 'Failed to fetch upload status',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def bulk_upload_errors(request, job_id):
+    """
+    Paginated list of every row rejected by a bulk upload job
+    Query params:
+    - page: Page number for pagination (default: 1)
+    - page_size: Errors per page (default: 50, max: 500)
+    """
+    try:
+        job = _upload_jobs_for(request.user).filter(pk=job_id).first()
+        if job is None:
+            return Response({
+                'error': 'Upload job not found'
+            }, status=status.HTTP_404_NOT_FOUND)
         
-        if errors:
-            response_data['errors'] = errors[:10]  # Return first 10 errors
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)  # current page
+            page_size = parse_page_size(request.GET.get('page_size'), default=50, maximum=500)  # errors per page
+        except ValueError:
+            return Response({
+                'error': 'page and page_size must be integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response(response_data, status=status.HTTP_201_CREATED)
+        errors = job.errors.all()
+        total_count = errors.count()
+        start_idx = (page - 1) * page_size
+        page_errors = errors[start_idx:start_idx + page_size].values('row', 'data', 'error')
+        
+        return Response({
+            'job_id': str(job.pk),
+            'status': job.status,
+            'total': total_count,
+            'page': page,
+            'page_size': page_size,
+            'total_pages': (total_count + page_size - 1) // page_size,
+            'errors': list(page_errors)
+        }, status=status.HTTP_200_OK)
         
     except Exception as e:
         return Response({
-            'error': 'Bulk upload failed',
+            'error': 'Failed to list upload errors',
             'details': str(e)
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)